@@ -0,0 +1,76 @@
+"""
+Замер памяти на элемент и времени создания для примитивов ядра,
+а также памяти на элемент, размещённый на поле (вместе с пространственным индексом и буфером сигналов).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_elements [--count N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from core.Grid import Grid
+from core.LogicElements import (
+    InputElement, OutputElement, AndElement, OrElement, XorElement, NotElement, DTriggerElement
+)
+
+ELEMENT_CLASSES = [InputElement, OutputElement, AndElement, OrElement, XorElement, NotElement, DTriggerElement]
+
+
+def measure_memory(cls, count: int) -> float:
+    """Средний объём памяти (байт), который занимает один живой экземпляр"""
+    gc.collect()
+    tracemalloc.start()
+    elements = [cls() for _ in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del elements
+    return current / count
+
+
+def measure_placed_memory(cls, count: int) -> float:
+    """Средний прирост памяти поля (байт) на один размещённый элемент, включая сам элемент"""
+    per_row = 100
+    gc.collect()
+    tracemalloc.start()
+    grid = Grid()
+    probe = cls()
+    grid.add_elements((cls(), (i % per_row) * (probe.width + 1), (i // per_row) * (probe.height + 1))
+                      for i in range(count))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del grid
+    return current / count
+
+
+def measure_construction(cls, count: int, repeats: int = 5) -> float:
+    """Время создания одного экземпляра (мкс): лучший из repeats прогонов, без сборщика мусора"""
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            elements = [cls() for _ in range(count)]
+            best = min(best, time.perf_counter() - start)
+            del elements
+    finally:
+        gc.enable()
+    return best / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'Элемент':<18}{'байт/шт':>10}{'мкс/шт':>10}{'на поле':>10}")
+    for cls in ELEMENT_CLASSES:
+        memory = measure_memory(cls, args.count)
+        construction = measure_construction(cls, args.count)
+        placed = measure_placed_memory(cls, args.count)
+        print(f"{cls.__name__:<18}{memory:>10.0f}{construction:>10.2f}{placed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
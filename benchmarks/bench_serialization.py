@@ -0,0 +1,67 @@
+"""
+Время сохранения и загрузки большой схемы: Grid.to_dict / Grid.load_from_dict
+и запись/чтение файла в форматах JSON и двоичном.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_serialization [--sizes 1000 5000 10000]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from core.Grid import Grid
+from core.GridFileFormat import read_grid_file, write_grid_file
+from core.LogicElements import InputElement, AndElement, OrElement, XorElement, NotElement, DTriggerElement
+
+GATE_CLASSES = [AndElement, OrElement, XorElement, NotElement, DTriggerElement]
+ROW_LENGTH = 100
+
+
+def build_grid(count: int) -> Grid:
+    """Цепочка из count элементов: каждый вентиль питается от двух предыдущих"""
+    grid = Grid()
+    placements = [(grid.create_element(InputElement), 0, 0), (grid.create_element(InputElement), 0, 5)]
+    for i in range(2, count):
+        cls = GATE_CLASSES[i % len(GATE_CLASSES)]
+        placements.append((grid.create_element(cls), (i % ROW_LENGTH) * 10, (i // ROW_LENGTH) * 5))
+    elements = grid.add_elements(placements)
+    for i in range(2, len(elements)):
+        target = elements[i]
+        for port in range(min(target.num_inputs, 2)):
+            elements[i - 1 - port].connect_output(0, target, port)
+    return grid
+
+
+def timed(action) -> tuple:
+    gc.collect()
+    start = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'Элементов':>10}{'to_dict':>10}{'load':>10}"
+          f"{'json w':>10}{'json r':>10}{'qgb w':>10}{'qgb r':>10}   мс")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.sizes:
+            grid = build_grid(count)
+            data, to_dict_ms = timed(grid.to_dict)
+            _, load_ms = timed(lambda: Grid().load_from_dict(data))
+
+            row = [to_dict_ms, load_ms]
+            for extension in (".json", ".qgb"):
+                path = os.path.join(directory, f"bench{extension}")
+                _, write_ms = timed(lambda: write_grid_file(path, data))
+                _, read_ms = timed(lambda: read_grid_file(path))
+                row += [write_ms, read_ms]
+            print(f"{count:>10}" + "".join(f"{value:>10.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
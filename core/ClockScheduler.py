@@ -0,0 +1,65 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+
+class ClockScheduler:
+    """
+    Очередь переключений генераторов тактов в модельном времени (куча по времени переключения).
+
+    Все генераторы одной схемы стоят в одной очереди: переключения, выпавшие на один момент,
+    выдаются одной пачкой в порядке запуска генераторов — порядок не зависит от таймеров и нагрузки.
+    """
+
+    def __init__(self):
+        # (время переключения, номер запуска, генератор); номер запуска уникален и задаёт порядок внутри пачки
+        self._heap: List[Tuple[int, int, object]] = []
+        # генератор -> (период, номер запуска); записи остановленных генераторов в куче считаются устаревшими
+        self._clocks: Dict[object, Tuple[int, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._clocks)
+
+    def __contains__(self, clock) -> bool:
+        return clock in self._clocks
+
+    def add(self, clock, interval_ms: int, now_ms: int) -> None:
+        """Ставит генератор в очередь: первое переключение через interval_ms от now_ms"""
+        interval_ms = max(1, int(interval_ms))
+        token = next(self._counter)
+        self._clocks[clock] = (interval_ms, token)
+        heapq.heappush(self._heap, (now_ms + interval_ms, token, clock))
+
+    def remove(self, clock) -> None:
+        self._clocks.pop(clock, None)
+
+    def _is_current(self, token: int, clock) -> bool:
+        entry = self._clocks.get(clock)
+        return entry is not None and entry[1] == token
+
+    def next_due(self) -> Optional[int]:
+        """Время ближайшего переключения или None, если очередь пуста"""
+        heap = self._heap
+        while heap and not self._is_current(heap[0][1], heap[0][2]):
+            heapq.heappop(heap)  # устаревшая запись остановленного или перезапущенного генератора
+        return heap[0][0] if heap else None
+
+    def pop_due(self) -> Tuple[Optional[int], List]:
+        """
+        Снимает с очереди все переключения ближайшего момента и сразу планирует следующие.
+        Возвращает (момент, генераторы в порядке запуска).
+        """
+        due = self.next_due()
+        if due is None:
+            return None, []
+        heap = self._heap
+        fired = []
+        # Куча упорядочена по (время, номер запуска) — пачка сразу выходит в порядке запуска
+        while heap and heap[0][0] == due:
+            _, token, clock = heapq.heappop(heap)
+            if self._is_current(token, clock):
+                fired.append((token, clock))
+        for token, clock in fired:
+            heapq.heappush(heap, (due + self._clocks[clock][0], token, clock))
+        return due, [clock for _, clock in fired]
@@ -1,19 +1,181 @@
+from functools import cached_property
 from math import ceil
+from typing import List, Optional, Tuple
+
+from core.LogicElements import LogicElement, OutputElement, InputElement, ClockGeneratorElement
+from core.LogicElementRegistry import get_element_class_by_name
+from core.TruthTableCache import TruthTableCache
+
+_BIT_VALUES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class GridTemplate:
+    """
+    Разобранное один раз описание схемы (grid_data): классы элементов, аргументы конструкторов,
+    соединения по индексам и карта портов. Экземпляр схемы создаёт только свои элементы и их состояние.
+    """
+
+    def __init__(self, grid_data: dict):
+        self._specs = []  # (класс, аргументы конструктора, исходный словарь)
+        index_map = {}
+        custom_classes = {}
+        # Хэши содержимого всех вложенных пользовательских классов, в том числе взятых из реестра по имени:
+        # их схемы не входят в grid_data, но определяют поведение (и таблицу истинности) этой схемы
+        self.nested_hashes = {}
+
+        for i, elem_data in enumerate(grid_data["elements"]):
+            elem_type = elem_data.get("type")
+            subgrid_data = elem_data.get("subgrid")
+
+            if subgrid_data:
+                if elem_type not in custom_classes:
+                    custom_classes[elem_type] = CustomElementFactory.make_custom_element_class(elem_type, subgrid_data)
+                cls = custom_classes[elem_type]
+                kwargs = {}
+            else:
+                cls = get_element_class_by_name(elem_type)
+                if cls is None:
+                    continue
+                kwargs = cls.constructor_kwargs(elem_data)
+
+            content_hash = getattr(cls, "content_hash", None)
+            if content_hash is not None:
+                self.nested_hashes[elem_type] = content_hash
+            index_map[i] = len(self._specs)
+            self._specs.append((cls, kwargs, elem_data))
+
+        self.names = [elem_data.get("name") for _, _, elem_data in self._specs]
+
+        # Соединения сразу переводим в индексы уже отфильтрованных элементов
+        self.connections = []
+        for conn in grid_data["connections"]:
+            src_idx, src_port = conn["source"]
+            trg_idx, trg_port = conn["target"]
+            if src_idx in index_map and trg_idx in index_map:
+                self.connections.append((index_map[src_idx], src_port, index_map[trg_idx], trg_port))
+
+    @cached_property
+    def _port_map(self):
+        """
+        Карта портов и тип схемы по одному прототипу.
+        Строится при первом обращении: простой загрузке поля (Grid.load_from_dict) она не нужна.
+        """
+        from core.Grid import Grid
+
+        prototype = self.instantiate()
+        input_indices = [i for i, e in enumerate(prototype) if isinstance(e, InputElement)]
+        output_indices = [i for i, e in enumerate(prototype) if isinstance(e, OutputElement)]
+        return (
+            input_indices,
+            output_indices,
+            [prototype[i].name for i in input_indices],
+            [prototype[i].name for i in output_indices],
+            any(getattr(e, "is_sync", False) for e in prototype),
+            any(isinstance(e, ClockGeneratorElement) for e in Grid._iter_simulated_elements(prototype)),
+        )
+
+    @property
+    def input_indices(self) -> List[int]:
+        return self._port_map[0]
+
+    @property
+    def output_indices(self) -> List[int]:
+        return self._port_map[1]
+
+    @property
+    def input_names(self) -> List[str]:
+        return self._port_map[2]
+
+    @property
+    def output_names(self) -> List[str]:
+        return self._port_map[3]
+
+    @property
+    def is_sync(self) -> bool:
+        return self._port_map[4]
+
+    @property
+    def has_clocks(self) -> bool:
+        """Есть ли генераторы тактов, в том числе во вложенных схемах: их выходы меняются сами по себе"""
+        return self._port_map[5]
+
+    def instantiate(self) -> List[LogicElement]:
+        elements = []
+        for cls, kwargs, elem_data in self._specs:
+            element = cls(**kwargs)
+            element.load_attributes(elem_data)
+            elements.append(element)
+
+        for src_idx, src_port, trg_idx, trg_port in self.connections:
+            elements[src_idx].connect_output(src_port, elements[trg_idx], trg_port)
+        return elements
 
-from core.LogicElements import LogicElement, OutputElement, InputElement
 
 class CustomElementFactory:
+    # Комбинаторные схемы с числом входов не больше этого вычисляются по заранее построенной таблице истинности
+    TRUTH_TABLE_MAX_INPUTS = 12
+    # Дисковый кэш таблиц между запусками; None — таблицы строятся заново при каждом создании класса
+    truth_table_cache: Optional[TruthTableCache] = None
+
+    @staticmethod
+    def build_truth_table(template: GridTemplate, grid_data: dict) -> Optional[List[Tuple[int, ...]]]:
+        """
+        Таблица истинности комбинаторной схемы: строка r — выходы для r-й комбинации входов
+        (первый вход — старший бит). None, если схема синхронная, слишком широкая
+        или не вычисляется побитово (циклы, модификаторы, элементы без compute_bitwise),
+        а также если выходы схемы меняются без изменения входов (генераторы тактов).
+        """
+        from core.Grid import Grid
+        from core.Netlist import Netlist
+
+        num_inputs, num_outputs = len(template.input_indices), len(template.output_indices)
+        if template.is_sync or template.has_clocks or num_inputs > CustomElementFactory.TRUTH_TABLE_MAX_INPUTS:
+            return None
+
+        cache = CustomElementFactory.truth_table_cache
+        key = TruthTableCache.key(grid_data, template.nested_hashes) if cache is not None else None
+        masks = cache.load(key, num_inputs, num_outputs) if cache is not None else None
+
+        if masks is None:
+            subgrid = Grid()
+            subgrid.load_from_template(template)
+            inputs = [subgrid.elements[i] for i in template.input_indices]
+            outputs = [subgrid.elements[i] for i in template.output_indices]
+
+            mask = (1 << (1 << num_inputs)) - 1
+            input_masks = dict(zip(inputs, Netlist.truth_table_input_masks(num_inputs)))
+            output_masks = subgrid.get_netlist().evaluate_bitwise(input_masks, mask)
+            if output_masks is None:
+                return None
+            masks = [output_masks.get(out, 0) for out in outputs]
+            if cache is not None:
+                cache.store(key, num_inputs, masks)
+
+        # Маски раскладываются в столбцы по строкам через текстовое представление, одинаковые строки делят один кортеж
+        row_count = 1 << num_inputs
+        if not masks:
+            return [()] * row_count
+        columns = [format(m, f"0{row_count}b")[::-1].encode().translate(_BIT_VALUES) for m in masks]
+        rows = {}
+        return [rows.setdefault(row, row) for row in zip(*columns)]
+
     @staticmethod
     def make_custom_element_class(class_name: str, grid_data: dict):
         from core.Grid import Grid
+
+        # grid_data разбирается один раз на класс, а не при каждом создании экземпляра
+        template = GridTemplate(grid_data)
+        # Карта портов нужна каждому экземпляру: строим её сразу, чтобы ошибки схемы всплывали при создании класса
+        template.input_indices
+        truth_table = CustomElementFactory.build_truth_table(template, grid_data)
+
         class CustomElement(LogicElement):
             def __init__(self):
                 subgrid = Grid()
-                subgrid.load_from_dict(grid_data)
+                subgrid.load_from_template(template)
 
-                # Сортируем входы и выходы по y для воспроизводимого порядка
-                inputs = [e for e in subgrid.elements if isinstance(e, InputElement)]
-                outputs = [e for e in subgrid.elements if isinstance(e, OutputElement)]
+                inputs = [subgrid.elements[i] for i in template.input_indices]
+                outputs = [subgrid.elements[i] for i in template.output_indices]
 
                 input_count = len(inputs)
                 output_count = len(outputs)
@@ -26,17 +188,27 @@ class CustomElementFactory:
                 )
 
                 self._subgrid = subgrid
+                self._inputs = inputs
+                self._outputs = outputs
 
                 # Присваиваем имена портов из вложенной схемы
-                self.input_names = [e.name for e in inputs]
-                self.output_names = [e.name for e in outputs]
+                self.input_names = list(template.input_names)
+                self.output_names = list(template.output_names)
 
                 # Флаг: нужна ли синхронная обработка
-                self.is_sync = any(getattr(e, "is_sync", False) for e in self._subgrid.elements)
+                self.is_sync = template.is_sync
 
             def get_subgrid(self):
                 return self._subgrid
 
+            def get_input_elements(self):
+                """Внутренние InputElement в порядке внешних входов"""
+                return self._inputs
+
+            def get_output_elements(self):
+                """Внутренние OutputElement в порядке внешних выходов"""
+                return self._outputs
+
             def update_port_names_from_subgrid(self):
                 inputs = sorted(
                     [e for e in self._subgrid.elements if isinstance(e, InputElement)],
@@ -52,37 +224,56 @@ class CustomElementFactory:
 
             def _set_inputs(self):
                 """Передаёт значения с внешних входов во внутреннюю схему"""
-                input_index = 0
-                for element in self._subgrid.elements:
-                    if isinstance(element, InputElement):
-                        element.set_value(self.get_input_value(input_index))
-                        input_index += 1
+                for input_index, element in enumerate(self._inputs):
+                    element.set_value(self.get_input_value(input_index))
 
             def _collect_outputs(self):
                 """Собирает выходные значения из внутренних OutputElement"""
-                output_values = []
-                for element in self._subgrid.elements:
-                    if isinstance(element, OutputElement):
-                        val = element.get_input_value(0)
-                        output_values.append(val)
-                self.output_values = output_values
+                self.output_values = [element.get_input_value(0) for element in self._outputs]
+
+            def collect_outputs(self):
+                """Выходы после вычисления внутренней схемы (используется и плоским Netlist)"""
+                self._collect_outputs()
+                self.apply_modifiers()
 
             def compute_outputs(self):
                 if self.is_sync:
                     return
+                if truth_table is not None:
+                    row = 0
+                    for i in range(self.num_inputs):
+                        row = (row << 1) | self.get_input_value(i)
+                    self.output_values = truth_table[row]
+                    self.apply_modifiers()
+                    return
                 self._set_inputs()
+                # Внутренняя схема вычисляется по скомпилированному (и раскрытому) Netlist подсхемы
+                self._subgrid.get_netlist().evaluate()
+                self.collect_outputs()
 
-                for _ in range(10):
-                    prev = [list(e.output_values) for e in self._subgrid.elements if not getattr(e, 'is_sync', False)]
-                    for e in self._subgrid.elements:
-                        if not getattr(e, 'is_sync', False):
-                            e.compute_outputs()
-                    now = [list(e.output_values) for e in self._subgrid.elements if not getattr(e, 'is_sync', False)]
-                    if prev == now:
-                        break
+            if truth_table is not None:
+                def compute_bitwise(self, inputs, mask):
+                    # Маски минтермов: биты делятся по значению каждого входа (первый вход — старший бит строки),
+                    # пустые ветви отбрасываются, поэтому непустых минтермов не больше, чем битов в mask
+                    minterms = [(0, mask)]
+                    for value in inputs:
+                        inverse = mask & ~value
+                        split = []
+                        for row, bits in minterms:
+                            low, high = bits & inverse, bits & value
+                            if low:
+                                split.append((row << 1, low))
+                            if high:
+                                split.append((row << 1 | 1, high))
+                        minterms = split
 
-                self._collect_outputs()
-                self.apply_modifiers()
+                    # Выход — ИЛИ минтермов, в строках которых он равен 1
+                    outputs = [0] * self.num_outputs
+                    for row, bits in minterms:
+                        for j, value in enumerate(truth_table[row]):
+                            if value:
+                                outputs[j] |= bits
+                    return outputs
 
             def compute_next_state(self):
                 """Для stateful-схем"""
@@ -101,4 +292,7 @@ class CustomElementFactory:
                 self.apply_modifiers()
 
         CustomElement.__name__ = class_name
+        CustomElement.template = template
+        CustomElement.truth_table = truth_table
+        CustomElement.content_hash = TruthTableCache.key(grid_data, template.nested_hashes)
         return CustomElement
\ No newline at end of file
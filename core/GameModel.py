@@ -1,10 +1,10 @@
-import json
 import os
 
 from core.LogicElements import *
 from core.Level import Level
 from core.Grid import Grid
 from core.CustomElementFactory import CustomElementFactory
+from core.GridFileFormat import GRID_FILE_EXTENSIONS, read_grid_file
 from core.LogicElementRegistry import ELEMENTS_REGISTRY
 
 USER_ELEMENTS_DIR = "user_elements"
@@ -23,10 +23,9 @@ class GameModel:
 
         for root, dirs, files in os.walk(USER_ELEMENTS_DIR):
             for filename in files:
-                if filename.endswith(".json"):
+                if filename.endswith(GRID_FILE_EXTENSIONS):
                     path = os.path.join(root, filename)
-                    with open(path, "r", encoding="utf-8") as f:
-                        grid_data = json.load(f)
+                    grid_data = read_grid_file(path)
 
                     name = os.path.splitext(filename)[0]
                     try:
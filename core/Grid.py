@@ -1,25 +1,97 @@
+import copy
 import itertools
 import re
 from collections import deque, defaultdict
+from typing import Callable, Generator, Iterable
 
 from core.LogicElements import *
-from core.LogicElementRegistry import create_element_by_name
-from core.Level import Level
-from core.CustomElementFactory import CustomElementFactory
+from core.Level import Level, SequentialLevel
+from core.CustomElementFactory import GridTemplate
 from core.BehaviorModifiers import *
+from core.Netlist import Netlist
+from core.SignalStore import SignalStore
+from core.TimeSource import TimeSource, VirtualTimeSource
+from core.WaveformRecorder import WaveformRecorder
 
 
 class Grid:
+    # Сторона квадрата пространственного индекса в клетках: элемент обычно попадает в один-два квадрата
+    BUCKET_SIZE = 16
+
     def __init__(self):
         self.level = None
         self.elements: List[LogicElement] = []
-        self.occupied_cells: Set[Tuple[int, int]] = set()
+        # Пространственный индекс: квадрат BUCKET_SIZE x BUCKET_SIZE -> элементы, задевающие его.
+        # Обновляется при добавлении, удалении и перемещении; в отличие от индекса по клеткам
+        # не хранит по записи на каждую клетку элемента
+        self.bucket_index: Dict[Tuple[int, int], List[LogicElement]] = {}
         self.name_counter = defaultdict(int)
         self.existing_names = set()
+        # Номер, с которого искать свободное "base N": все меньшие номера заняты
+        self._name_search_start: Dict[str, int] = {}
+        # Общий буфер значений выходов всех элементов поля
+        self.signals = SignalStore()
+        # Сигналов в буфере поля, оставшихся от удалённых элементов
+        self._free_signals = 0
+
+        # Уровневое вычисление по скомпилированной схеме; False — старый итеративный цикл
+        self.use_levelized_engine = True
+        # Раскрывать комбинаторные пользовательские элементы в один плоский граф примитивов
+        self.flatten_custom_elements = True
+        self._elements_version = 0
+        # Счётчик изменений соединений и модификаторов элементов поля (см. LogicElement._topology_changed)
+        self._topology_version = 0
+        self._netlist: Optional[Netlist] = None
+        self._netlist_key = None
+
+        # Событийный режим для step(): пересчитываются только элементы, чьи входы изменились
+        self.use_event_driven = True
+        self._event_netlist: Optional[Netlist] = None
+        self._pending_changes: Set[LogicElement] = set()
+
+        # Источник времени генераторов тактов поля; создаётся при первом обращении (см. time_source)
+        self._time_source: Optional[TimeSource] = None
+        # Сдвиг времени поля относительно источника: набегает за прогоны run_cycles в виртуальном времени
+        self._time_offset = 0
+
+        # Запись осциллограмм включается явно (set_recorder); время записи — время поля (now_ms)
+        self.recorder: Optional[WaveformRecorder] = None
+        self.step_count = 0
 
     def set_level(self, level: Level) -> None:
         self.level = level
 
+    def set_recorder(self, recorder: Optional[WaveformRecorder]) -> None:
+        """Подключает запись осциллограмм (None — отключает)"""
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.now = self.now_ms()
+
+    @property
+    def time_source(self) -> TimeSource:
+        """Источник времени генераторов поля: по умолчанию свой виртуальный, GUI подставляет QtTimeSource"""
+        if self._time_source is None:
+            self.set_time_source(VirtualTimeSource())
+        return self._time_source
+
+    def set_time_source(self, time_source: TimeSource) -> None:
+        """Переводит генераторы поля на time_source; переключения генераторов помечаются как изменения поля"""
+        if self._time_source is not None:
+            self._time_source.remove_listener(self._on_clocks_toggled)
+        self._time_source = time_source
+        time_source.add_listener(self._on_clocks_toggled)
+        for element in self.elements:
+            if isinstance(element, ClockGeneratorElement):
+                element.set_time_source(time_source)
+
+    def now_ms(self) -> int:
+        """Время поля в миллисекундах: время источника плюс время, прошедшее в прогонах run_cycles"""
+        return self._time_offset + self.time_source.now_ms()
+
+    def _on_clocks_toggled(self, clocks: List[ClockGeneratorElement]) -> None:
+        for clock in clocks:
+            self.mark_changed(clock)
+
     def get_input_elements(self) -> List[InputElement]:
         return [e for e in self.elements if isinstance(e, InputElement)]
 
@@ -33,7 +105,43 @@ class Grid:
         return [e.name for e in self.elements if isinstance(e, OutputElement)]
 
     def get_occupied_cells(self) -> Set[Tuple[int, int]]:
-        return set().union(*[elem.occupied_cells for elem in self.elements])
+        return {cell for e in self.elements if e.position is not None for cell in self._footprint(e, *e.position)}
+
+    @staticmethod
+    def _footprint(element: LogicElement, x: int, y: int):
+        return [(x + dx, y + dy) for dx in range(element.width) for dy in range(element.height)]
+
+    @classmethod
+    def _buckets(cls, element: LogicElement, x: int, y: int):
+        """Квадраты индекса, которые задевает элемент, поставленный в (x, y)"""
+        size = cls.BUCKET_SIZE
+        return [(bx, by)
+                for bx in range(x // size, (x + element.width - 1) // size + 1)
+                for by in range(y // size, (y + element.height - 1) // size + 1)]
+
+    def _is_free(self, element: LogicElement, x: int, y: int) -> bool:
+        """Свободны ли клетки под элементом (клетки самого элемента не считаются занятыми)"""
+        right, bottom = x + element.width, y + element.height
+        for bucket in self._buckets(element, x, y):
+            for other in self.bucket_index.get(bucket, ()):
+                if other is element:
+                    continue
+                ox, oy = other.position
+                if ox < right and x < ox + other.width and oy < bottom and y < oy + other.height:
+                    return False
+        return True
+
+    def _index_element(self, element: LogicElement) -> None:
+        for bucket in self._buckets(element, *element.position):
+            self.bucket_index.setdefault(bucket, []).append(element)
+
+    def _unindex_element(self, element: LogicElement) -> None:
+        for bucket in self._buckets(element, *element.position):
+            occupants = self.bucket_index.get(bucket)
+            if occupants is not None and element in occupants:
+                occupants.remove(element)
+                if not occupants:
+                    del self.bucket_index[bucket]
 
     def generate_unique_name(self, base: str) -> str:
         # Если base сам по себе свободен
@@ -42,19 +150,28 @@ class Grid:
             self.name_counter[base] = max(self.name_counter[base], 0)
             return base
 
-        # Ищем свободное "base N"
-        i = 1
+        # Ищем свободное "base N", начиная с наименьшего номера, который ещё может быть свободен
+        i = self._name_search_start.get(base, 1)
         while True:
             candidate = f"{base} {i}"
             if candidate not in self.existing_names:
                 self.existing_names.add(candidate)
                 self.name_counter[base] = max(self.name_counter[base], i)
+                self._name_search_start[base] = i + 1
                 return candidate
             i += 1
 
+    def _forget_name(self, name: str):
+        self.existing_names.discard(name)
+        match = re.match(r"^(.*) (\d+)$", name)
+        if match:
+            base, num = match.group(1), int(match.group(2))
+            if num < self._name_search_start.get(base, 1):
+                self._name_search_start[base] = num
+
     def release_name(self, name: str):
         """ Освобождает имя, например при удалении элемента """
-        self.existing_names.discard(name)
+        self._forget_name(name)
 
         # Опционально: уменьшаем name_counter если удаляем последний с таким индексом
         match = re.match(r"^(.*) (\d+)$", name)
@@ -69,19 +186,35 @@ class Grid:
         return new_element
 
     def add_element(self, element: LogicElement, x: int, y: int) -> bool:
-        if element.position is not None:
-            return False
-
-        # Предварительный расчет клеток
-        new_cells = {(x + dx, y + dy) for dx in range(element.width) for dy in range(element.height)}
+        return bool(self.add_elements([(element, x, y)]))
+
+    def add_elements(self, placements: Iterable[Tuple[LogicElement, int, int]]) -> List[LogicElement]:
+        """
+        Пакетное размещение элементов [(элемент, x, y), ...].
+        Каждый элемент проверяется по индексу клеток, куда уже внесены предыдущие элементы пакета;
+        не поместившиеся пропускаются. Версия схемы увеличивается один раз.
+        Возвращает размещённые элементы.
+        """
+        placed = []
+        for element, x, y in placements:
+            if element.position is not None:
+                continue
+            if not self._is_free(element, x, y):
+                continue
 
-        if any(self.get_occupied_cells() & new_cells):
-            return False
+            # Только теперь устанавливаем позицию
+            element.position = (x, y)
+            element._grid = self
+            self._index_element(element)
+            element.attach_store(self.signals)
+            if isinstance(element, ClockGeneratorElement):
+                element.set_time_source(self.time_source)
+            placed.append(element)
 
-        # Только теперь устанавливаем позицию
-        element.position = (x, y)
-        self.elements.append(element)
-        return True
+        if placed:
+            self.elements.extend(placed)
+            self._elements_version += 1
+        return placed
 
     @staticmethod
     def connect_elements(source: LogicElement, source_port: int,
@@ -95,58 +228,77 @@ class Grid:
         return source.disconnect_port(port_type, port)
 
     def remove_element(self, element: LogicElement) -> bool:
-        if element.position is not None:
+        return bool(self.remove_elements([element]))
+
+    def remove_elements(self, elements: Iterable[LogicElement]) -> List[LogicElement]:
+        """
+        Пакетное удаление элементов вместе с их соединениями.
+        Список элементов схемы фильтруется один раз, версия схемы увеличивается один раз.
+        Возвращает удалённые элементы (неразмещённые пропускаются).
+        """
+        removed = []
+        for element in elements:
+            if element.position is None:
+                continue
+            element.disconnect_all()
+            self._unindex_element(element)
             element.position = None
+            element._grid = None
+            if isinstance(element, ClockGeneratorElement):
+                element.set_time_source(None)
             self.release_name(element.name)
-            self.elements.remove(element)
-            return True
-        return False
+            removed.append(element)
+
+        if removed:
+            removed_set = set(removed)
+            self.elements[:] = [e for e in self.elements if e not in removed_set]
+            self._release_signals(removed)
+            self._elements_version += 1
+        return removed
+
+    def _release_signals(self, removed: List[LogicElement]) -> None:
+        """
+        Переносит значения удалённых элементов в их собственные буферы. Освободившиеся участки буфера
+        поля копятся, и когда их становится больше половины, буфер пересобирается из живых элементов.
+        Смещения меняются — скомпилированная схема пересобирается по версии поля.
+        """
+        for element in removed:
+            self._free_signals += element.num_outputs
+            element.attach_store(SignalStore())
+        if self._free_signals * 2 > len(self.signals):
+            signals = SignalStore()
+            for element in self.elements:
+                element.attach_store(signals)
+            self.signals = signals
+            self._free_signals = 0
 
     def get_element_at(self, x: int, y: int) -> Optional[LogicElement]:
-        for elem in self.elements:
-            if elem.position is None:
-                continue
-            ex, ey = elem.position
-            if (ex <= x < ex + elem.width and
-                    ey <= y < ey + elem.height):
-                return elem
+        for element in self.bucket_index.get((x // self.BUCKET_SIZE, y // self.BUCKET_SIZE), ()):
+            ex, ey = element.position
+            if ex <= x < ex + element.width and ey <= y < ey + element.height:
+                return element
         return None
 
     def rename_element(self, element: LogicElement, new_name: str) -> bool:
         if new_name in self.existing_names:
             return False
-        self.existing_names.discard(element.name)
+        self._forget_name(element.name)
         #self.release_name(element.name)
         element.name = new_name
         self.existing_names.add(new_name)
         return True
 
     def move_element(self, element, new_x: int, new_y: int) -> bool:
-        if element not in self.elements:
+        if element.position is None or element._grid is not self:
             return False
 
-        # Сохраняем оригинальные координаты
-        original_x, original_y = element.position
-        original_cells = element.occupied_cells
-
-        # Временно удаляем элемент
-        self.elements.remove(element)
-        self.occupied_cells = self.get_occupied_cells()
-        self.occupied_cells -= original_cells
-
-        # Пробуем новую позицию
-        element.position = (new_x, new_y)
-        new_cells = element.occupied_cells
-        conflict = bool(new_cells & self.occupied_cells)
-
-        if conflict:
-            element.position = (original_x, original_y)
-            self.elements.append(element)
-            self.occupied_cells.update(original_cells)
+        # Проверяем только клетки новой позиции
+        if not self._is_free(element, new_x, new_y):
             return False
 
-        self.elements.append(element)
-        self.occupied_cells.update(new_cells)
+        self._unindex_element(element)
+        element.position = (new_x, new_y)
+        self._index_element(element)
         return True
 
     def is_valid_circuit(self) -> bool:
@@ -193,25 +345,44 @@ class Grid:
             if getattr(e, 'is_sync', False):
                 e.tick()
 
+    def get_netlist(self) -> Netlist:
+        """Возвращает скомпилированную схему, пересобирая её только после изменения соединений"""
+        key = (self._topology_version, self._elements_version, len(self.elements), self.flatten_custom_elements)
+        if self._netlist is None or self._netlist_key != key:
+            self._netlist = Netlist(self.elements, flatten=self.flatten_custom_elements)
+            self._netlist_key = key
+        return self._netlist
+
     def compute_outputs(self, input_values: Dict[InputElement, int], max_iterations: int = 10):
+        # Полный пересчёт меняет состояние в обход событийного режима
+        self._event_netlist = None
+
         for inp, val in input_values.items():
             inp.set_value(val)
 
-        # Разделение на типы
-        stateless_elements = [e for e in self.elements if not getattr(e, 'is_sync', False)]
-        stateful_elements = [e for e in self.elements if getattr(e, 'is_sync', False)]
+        if self.use_levelized_engine:
+            netlist = self.get_netlist()
+            stateful_elements = netlist.sync_elements
 
-        # 1. Сначала стабилизируем комбинаторную часть
-        for _ in range(max_iterations):
-            prev_outputs = [(e, list(e.output_values)) for e in stateless_elements]
+            # 1. Комбинаторная часть в топологическом порядке
+            if not netlist.evaluate(max_iterations):
+                return None  # Цикл в комбинаторной части не стабилизировался
+        else:
+            # Разделение на типы
+            stateless_elements = [e for e in self.elements if not getattr(e, 'is_sync', False)]
+            stateful_elements = [e for e in self.elements if getattr(e, 'is_sync', False)]
 
-            for e in stateless_elements:
-                e.compute_outputs()
+            # 1. Сначала стабилизируем комбинаторную часть
+            for _ in range(max_iterations):
+                prev_outputs = [(e, list(e.output_values)) for e in stateless_elements]
 
-            if all(e.output_values == old for e, old in prev_outputs):
-                break
-        else:
-            return None  # Комбинаторная часть не стабилизировалась
+                for e in stateless_elements:
+                    e.compute_outputs()
+
+                if all(e.output_values == old for e, old in prev_outputs):
+                    break
+            else:
+                return None  # Комбинаторная часть не стабилизировалась
 
         # 2. Затем обрабатываем stateful-часть (триггеры и модификаторы)
         for _ in range(1): # max_iterations
@@ -227,6 +398,163 @@ class Grid:
 
         return {out: out.value for out in self.get_output_elements()}
 
+    def get_unstable_names(self) -> List[str]:
+        """
+        Иерархические имена элементов цикла, не стабилизировавшегося при последнем вычислении
+        по скомпилированной схеме ("Сумматор 1/Xor 2" — элемент внутри пользовательского элемента)
+        """
+        return self._netlist.get_unstable_names() if self._netlist is not None else []
+
+    def mark_changed(self, element: LogicElement) -> None:
+        """Сообщает, что выходы элемента изменились извне (переключатель входа, тактовый генератор)"""
+        self._pending_changes.add(element)
+
+    def step(self, max_iterations: int = 10) -> Optional[Set[LogicElement]]:
+        """
+        Один шаг симуляции для интерактивного режима.
+
+        В событийном режиме пересчитывается только конус разветвления элементов,
+        помеченных через mark_changed, и синхронные элементы, у которых изменились входы.
+        Возвращает множество элементов с изменившимися выходами или None, если цикл не стабилизировался.
+        """
+        changed = self._step(max_iterations)
+        self.step_count += 1
+        if self.recorder is not None:
+            self.recorder.sample(self.now_ms())
+        return changed
+
+    def _step(self, max_iterations: int) -> Optional[Set[LogicElement]]:
+        if not self.use_event_driven:
+            # Полный пересчёт; изменившиеся элементы находим сравнением наблюдаемых значений до и после
+            before = [Netlist._observed_values(e) for e in self.elements]
+            changed, self._pending_changes = self._pending_changes, set()
+            if self.compute_outputs({inp: inp.value() for inp in self.get_input_elements()}, max_iterations) is None:
+                return None
+            changed.update(e for e, old in zip(self.elements, before) if Netlist._observed_values(e) != old)
+            return changed
+
+        netlist = self.get_netlist()
+        pending = self._pending_changes
+        self._pending_changes = set()
+
+        if netlist is not self._event_netlist:
+            # Схема изменилась — один полный пересчёт, дальше только изменения
+            self._event_netlist = netlist
+            if not netlist.evaluate(max_iterations):
+                self._event_netlist = None
+                return None
+            changed = set(self.elements)
+            to_tick = netlist.sync_set
+        else:
+            result = netlist.propagate(pending, netlist.always_active, max_iterations)
+            if result is None:
+                self._event_netlist = None
+                return None
+            changed, to_tick = result
+            to_tick.update(e for e in netlist.always_active if e in netlist.sync_set)
+
+        # Синхронные элементы с неизменными входами дают тот же результат — их не трогаем
+        sync_elements = [e for e in netlist.sync_elements if e in to_tick]
+        before = [list(e.output_values) for e in sync_elements]
+        for e in sync_elements:
+            e.compute_next_state()
+        for e in sync_elements:
+            e.tick()
+        for e, old in zip(sync_elements, before):
+            if e.output_values != old:
+                changed.add(e)
+                self._pending_changes.add(e)
+
+        return changed
+
+    def run_cycles(self, cycles: int, stop_when: Optional[Callable[[Set[LogicElement]], bool]] = None,
+                   max_iterations: int = 10) -> Optional[int]:
+        """
+        Безголовый прогон на cycles тактов в виртуальном времени — без таймеров, с максимальной скоростью.
+
+        interval_ms генераторов тактов понимаются как относительные полупериоды; такт — полный период
+        самого быстрого генератора. После каждого переключения выполняется step(); stop_when(changed)
+        может остановить прогон досрочно.
+        Возвращает номер такта, на котором прогон закончился, или None, если цикл не стабилизировался.
+        Запущенные генераторы после прогона продолжают работу в своём источнике времени.
+        """
+        return self._run_to_end(self.iter_run_cycles(cycles, stop_when, max_iterations))
+
+    @staticmethod
+    def _run_to_end(run: Generator[int, None, Optional[int]]) -> Optional[int]:
+        try:
+            while True:
+                next(run)
+        except StopIteration as stop:
+            return stop.value
+
+    def iter_run_cycles(self, cycles: int, stop_when: Optional[Callable[[Set[LogicElement]], bool]] = None,
+                        max_iterations: int = 10,
+                        chunk: Optional[int] = None) -> Generator[int, None, Optional[int]]:
+        """
+        То же, что run_cycles, но по частям: после каждых chunk тактов генератор отдаёт число пройденных тактов,
+        а результат прогона возвращает в StopIteration.value. Между частями GUI может обработать события;
+        close() прерывает прогон и возвращает генераторы в их источник времени.
+        """
+        clocks = [e for e in self.elements if isinstance(e, ClockGeneratorElement)]
+        if not clocks or cycles <= 0:
+            return 0
+
+        # Запущенные генераторы переходят в виртуальный источник с сохранением фазы, остальные запускаются на время прогона
+        saved_source = self.time_source
+        stopped = [clock for clock in clocks if not clock.is_running()]
+        source = VirtualTimeSource()
+        # Время поля продолжается с текущего момента: виртуальный источник начинает с нуля
+        start_ms = self.now_ms()
+        self._time_offset = start_ms
+        self.set_time_source(source)
+        for clock in stopped:
+            clock.start()
+
+        try:
+            period = 2 * min(max(1, int(clock.interval_ms)) for clock in clocks)
+            end = cycles * period
+            checkpoint = (chunk or cycles) * period
+            while True:
+                due = source.next_due()
+                if due is None or due > end:
+                    return cycles
+                while due > checkpoint:
+                    yield checkpoint // period
+                    checkpoint += chunk * period
+                source.fire_next()  # переключённые генераторы помечаются через _on_clocks_toggled
+                changed = self.step(max_iterations)
+                if changed is None:
+                    return None
+                if stop_when is not None and stop_when(changed):
+                    return -(-source.now_ms() // period)
+        finally:
+            for clock in stopped:
+                clock.stop()
+            self.set_time_source(saved_source)
+            self._time_offset = start_ms + source.now_ms() - saved_source.now_ms()
+
+    def run_until_changed(self, element: LogicElement, max_cycles: int,
+                          max_iterations: int = 10) -> Optional[int]:
+        """
+        Прогон до первого изменения значения element (выход схемы или выходы любого элемента).
+        Возвращает номер такта, на котором оно изменилось, или None, если за max_cycles тактов изменений не было.
+        """
+        return self._run_to_end(self.iter_run_until_changed(element, max_cycles, max_iterations))
+
+    def iter_run_until_changed(self, element: LogicElement, max_cycles: int, max_iterations: int = 10,
+                               chunk: Optional[int] = None) -> Generator[int, None, Optional[int]]:
+        """run_until_changed по частям (см. iter_run_cycles)"""
+        def observe():
+            return element.value if isinstance(element, OutputElement) else list(element.output_values)
+
+        initial = observe()
+        changed_at = yield from self.iter_run_cycles(max_cycles, lambda _: observe() != initial,
+                                                     max_iterations, chunk)
+        if changed_at is None or observe() == initial:
+            return None
+        return changed_at
+
     def auto_test(self) -> List[Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...] | Tuple[str, ...]]]:
         if not self.level:
             return []
@@ -240,6 +568,14 @@ class Grid:
         except KeyError:
             return []
 
+        if isinstance(self.level, SequentialLevel):
+            return self._auto_test_sequences(input_elements, output_elements)
+
+        # Чисто комбинаторную схему проверяем за один побитово-параллельный проход
+        errors = self._auto_test_bitwise(input_elements, output_elements)
+        if errors is not None:
+            return errors
+
         # Сохраняем текущее состояние всех элементов (только выходы и внутренности)
         saved_states = {}
         for e in self.elements:
@@ -277,13 +613,174 @@ class Grid:
 
         return errors
 
+    # Атрибуты внутреннего состояния: триггеры (state, _next_state), фаза генератора тактов (_state)
+    _STATE_ATTRIBUTES = ("state", "_next_state", "_state")
+
+    @staticmethod
+    def _iter_simulated_elements(elements: Iterable[LogicElement]) -> Iterable[LogicElement]:
+        """Элементы поля вместе с элементами вложенных схем пользовательских элементов"""
+        for e in elements:
+            yield e
+            if hasattr(e, "get_subgrid"):
+                yield from Grid._iter_simulated_elements(e.get_subgrid().elements)
+
+    def _save_simulation_state(self) -> Dict[LogicElement, tuple]:
+        """Снимок выходов и внутреннего состояния всех элементов, включая вложенные схемы и модификаторы"""
+        snapshot = {}
+        for e in self._iter_simulated_elements(self.elements):
+            attributes = {name: getattr(e, name) for name in self._STATE_ATTRIBUTES if hasattr(e, name)}
+            if isinstance(e, OutputElement):
+                attributes["value"] = e.value
+            modifiers = [copy.deepcopy(vars(m)) for m in e.modifiers]
+            snapshot[e] = (list(e.output_values), list(e.next_output_values), attributes, modifiers)
+        return snapshot
+
+    def _restore_simulation_state(self, snapshot: Dict[LogicElement, tuple]) -> None:
+        for e, (outputs, next_outputs, attributes, modifiers) in snapshot.items():
+            e.output_values = outputs
+            e.next_output_values = next_outputs
+            for name in self._STATE_ATTRIBUTES:
+                if name in attributes:
+                    setattr(e, name, attributes[name])
+                elif hasattr(e, name):
+                    # Например, _next_state, появившийся только во время проверки
+                    delattr(e, name)
+            if "value" in attributes:
+                e.value = attributes["value"]
+            for modifier, state in zip(e.modifiers, modifiers):
+                vars(modifier).update(copy.deepcopy(state))
+            if hasattr(e, "get_subgrid"):
+                e.get_subgrid()._reset_event_state()
+        # Значения изменены в обход событийного режима — следующий шаг пересчитает схему целиком
+        self._reset_event_state()
+
+    def _reset_event_state(self) -> None:
+        self._event_netlist = None
+        self._pending_changes.clear()
+
+    def _settle(self, max_iterations: int = 10) -> bool:
+        """
+        Повторяет step(), пока выходы элементов меняются (например, новое состояние триггера
+        ещё не дошло до выходов схемы). False, если схема не успокоилась за max_iterations шагов.
+        """
+        for _ in range(max_iterations):
+            changed = self.step(max_iterations)
+            if changed is None:
+                return False
+            if not changed:
+                return True
+        return False
+
+    def _auto_test_sequences(self, input_elements: List[InputElement], output_elements: List[OutputElement],
+                             max_iterations: int = 10):
+        """
+        Потактовая проверка последовательностного уровня.
+
+        Все последовательности прогоняются за один вызов по одной скомпилированной схеме, каждая —
+        с исходного состояния поля. На такте подаются входы и схема доводится до устойчивого состояния;
+        если на поле есть генераторы тактов, затем проходит один их полный период в виртуальном времени
+        и схема снова доводится до устойчивого состояния.
+        По каждой последовательности сообщается первый несовпавший такт: (входы, ожидаемое, фактическое).
+        """
+        snapshot = self._save_simulation_state()
+        # Прогоны проверки не должны попадать в осциллограммы
+        recorder, self.recorder = self.recorder, None
+        step_count, time_offset = self.step_count, self._time_offset
+        has_clocks = any(isinstance(e, ClockGeneratorElement) for e in self.elements)
+        errors = []
+
+        try:
+            for sequence in self.level.sequences:
+                self._restore_simulation_state(snapshot)
+                for inputs, expected in sequence:
+                    for inp, value in zip(input_elements, inputs):
+                        if inp.value() != value:
+                            inp.set_value(value)
+                            self.mark_changed(inp)
+
+                    settled = self._settle(max_iterations)
+                    if settled and has_clocks:
+                        settled = self.run_cycles(1, max_iterations=max_iterations) is not None \
+                            and self._settle(max_iterations)
+                    if not settled:
+                        errors.append((inputs, expected, ("Cycle",)))
+                        break
+
+                    actual = tuple(out.value for out in output_elements)
+                    if any(exp is not None and exp != act for exp, act in zip(expected, actual)):
+                        errors.append((inputs, expected, actual))
+                        break
+        finally:
+            self._restore_simulation_state(snapshot)
+            self.recorder, self.step_count, self._time_offset = recorder, step_count, time_offset
+
+        return errors
+
+    def _auto_test_bitwise(self, input_elements: List[InputElement], output_elements: List[OutputElement]):
+        """
+        Проверка таблицы истинности, где каждый провод несёт битовую маску всех 2^n строк сразу.
+        Строка r соответствует r-й комбинации itertools.product([0, 1], repeat=n).
+        Возвращает None, если схема не чисто комбинаторная.
+        """
+        netlist = self.get_netlist()
+        if not netlist.is_bitwise_supported():
+            return None
+
+        n = len(input_elements)
+        mask = (1 << (1 << n)) - 1
+        input_masks = dict(zip(input_elements, Netlist.truth_table_input_masks(n)))
+
+        actual_masks = netlist.evaluate_bitwise(input_masks, mask)
+        if actual_masks is None:
+            return None
+        actual_masks = [actual_masks.get(out, 0) for out in output_elements]
+
+        # Ожидаемые значения тоже собираем в маски и сравниваем все строки разом
+        expected_by_row = {}
+        expected_masks = [0] * len(output_elements)
+        forced = 0  # строки, где ожидаемое значение не 0/1 и совпасть не может
+        for combo, expected in self.level.truth_table.items():
+            if len(combo) != n or any(v not in (0, 1) for v in combo):
+                continue
+            row = 0
+            for v in combo:
+                row = (row << 1) | v
+            expected_by_row[row] = expected
+            if len(expected) != len(output_elements) or any(v not in (0, 1) for v in expected):
+                forced |= 1 << row
+                continue
+            for j, v in enumerate(expected):
+                if v:
+                    expected_masks[j] |= 1 << row
+
+        defined = 0
+        for row in expected_by_row:
+            defined |= 1 << row
+
+        mismatch = forced
+        for actual, expected in zip(actual_masks, expected_masks):
+            mismatch |= actual ^ expected
+        mismatch &= defined
+
+        errors = []
+        while mismatch:
+            low = mismatch & -mismatch
+            row = low.bit_length() - 1
+            mismatch ^= low
+            combo = tuple((row >> (n - 1 - i)) & 1 for i in range(n))
+            actual_values = tuple((actual >> row) & 1 for actual in actual_masks)
+            errors.append((combo, expected_by_row[row], actual_values))
+        return errors
+
     def to_dict(self):
+        # Номер элемента по словарю вместо elements.index — сохранение линейно по размеру схемы
+        index_of = {element: i for i, element in enumerate(self.elements)}
         return {
             "elements": [e.to_dict() for e in self.elements],
             "connections": [
                 {
-                    "source": (self.elements.index(src), src_idx),
-                    "target": (self.elements.index(trg), trg_idx)
+                    "source": (index_of[src], src_idx),
+                    "target": (index_of[trg], trg_idx)
                 }
                 for src in self.elements
                 for src_idx, conns in enumerate(src.output_connections)
@@ -292,32 +789,24 @@ class Grid:
         }
 
     def load_from_dict(self, data):
-        self.elements.clear()
-        custom_classes = {}
-
-        for elem_data in data["elements"]:
-            elem_name = elem_data.get("name")
-            elem_type = elem_data.get("type")
-            subgrid_data = elem_data.get("subgrid")
-
-            if subgrid_data:
-                if elem_type not in custom_classes:
-                    CustomClass = CustomElementFactory.make_custom_element_class(elem_type, subgrid_data)
-                    custom_classes[elem_type] = CustomClass
-                cls = custom_classes[elem_type]
-                element = cls()
-            else:
-                cls = create_element_by_name(elem_type)
-                if cls is None:
-                    continue
-                element = cls.from_dict(elem_data)
+        self.load_from_template(GridTemplate(data))
 
-            self.elements.append(element)
-            self.existing_names.add(elem_name)
-
-        # Подключения
-        for conn in data["connections"]:
-            src_idx, src_port = conn["source"]
-            trg_idx, trg_port = conn["target"]
-            if src_idx < len(self.elements) and trg_idx < len(self.elements):
-                self.elements[src_idx].connect_output(src_port, self.elements[trg_idx], trg_port)
\ No newline at end of file
+    def load_from_template(self, template: GridTemplate):
+        for element in self.elements:
+            element._grid = None
+            if isinstance(element, ClockGeneratorElement):
+                element.set_time_source(None)
+        self.elements.clear()
+        self.bucket_index.clear()
+        self.signals = SignalStore()
+        self._free_signals = 0
+        self.elements.extend(template.instantiate())
+        for element in self.elements:
+            element._grid = self
+            element.attach_store(self.signals)
+            if isinstance(element, ClockGeneratorElement):
+                element.set_time_source(self.time_source)
+            if element.position is not None:
+                self._index_element(element)
+        self._elements_version += 1
+        self.existing_names.update(template.names)
@@ -0,0 +1,326 @@
+import json
+import os
+import struct
+from typing import Any, Dict, List
+
+# Расширения файлов схем: текстовый JSON и компактный двоичный формат
+JSON_EXTENSION = ".json"
+BINARY_EXTENSION = ".qgb"
+GRID_FILE_EXTENSIONS = (JSON_EXTENSION, BINARY_EXTENSION)
+
+
+class BinaryGridFormat:
+    """
+    Двоичный формат схемы (grid_data из Grid.to_dict).
+
+    Раскладка файла (little-endian):
+      заголовок  — сигнатура, версия и размеры разделов;
+      строки     — таблица смещений u32 и UTF-8 данные, каждая строка хранится один раз;
+      элементы   — записи фиксированной длины: тип, имя, позиция, участок в таблице имён портов;
+      имена      — номера строк имён портов всех элементов подряд;
+      соединения — массив (источник, выход, приёмник, вход) по u32;
+      прочее     — поля вне фиксированной записи (модификаторы, аргументы конструктора, subgrid)
+                   в компактной теговой кодировке.
+
+    Сохранение и загрузка линейны по размеру схемы; loads(dumps(data)) совпадает
+    с json.loads(json.dumps(data)).
+    """
+
+    MAGIC = b"QGB1"
+    VERSION = 1
+
+    HEADER = struct.Struct("<4sHHIIIIIIII")
+    ELEMENT = struct.Struct("<IIIiiIHHI")
+    EDGE = struct.Struct("<IIII")
+    U32 = struct.Struct("<I")
+    I64 = struct.Struct("<q")
+    F64 = struct.Struct("<d")
+
+    NO_EXTRA = 0xFFFFFFFF
+
+    # Флаги записи элемента: какие поля словаря лежат в фиксированной записи
+    HAS_TYPE = 1
+    HAS_NAME = 2
+    HAS_POSITION = 4
+    POSITION_NONE = 8
+    HAS_INPUT_NAMES = 16
+    HAS_OUTPUT_NAMES = 32
+
+    # Теги значений в разделе «прочее»
+    TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_LIST, TAG_DICT = range(8)
+
+    @classmethod
+    def dumps(cls, grid_data: Dict[str, Any]) -> bytes:
+        strings: Dict[str, int] = {}
+
+        def sid(text: str) -> int:
+            index = strings.get(text)
+            if index is None:
+                index = strings[text] = len(strings)
+            return index
+
+        extras = bytearray()
+        # Одинаковые наборы прочих полей (чаще всего пустые модификаторы) хранятся один раз
+        extra_offsets: Dict[bytes, int] = {}
+        port_names: List[int] = []
+        records = bytearray()
+
+        for elem_data in grid_data.get("elements", []):
+            flags = 0
+            type_sid = name_sid = 0
+            x = y = 0
+            rest = {}
+            for key, value in elem_data.items():
+                if key == "type" and isinstance(value, str):
+                    flags |= cls.HAS_TYPE
+                    type_sid = sid(value)
+                elif key == "name" and isinstance(value, str):
+                    flags |= cls.HAS_NAME
+                    name_sid = sid(value)
+                elif key == "position" and value is None:
+                    flags |= cls.POSITION_NONE
+                elif key == "position" and cls._is_int_pair(value):
+                    flags |= cls.HAS_POSITION
+                    x, y = value
+                elif key in ("input_names", "output_names") and cls._is_str_list(value):
+                    flags |= cls.HAS_INPUT_NAMES if key == "input_names" else cls.HAS_OUTPUT_NAMES
+                else:
+                    rest[key] = value
+
+            names_start = len(port_names)
+            inputs = elem_data["input_names"] if flags & cls.HAS_INPUT_NAMES else []
+            outputs = elem_data["output_names"] if flags & cls.HAS_OUTPUT_NAMES else []
+            port_names.extend(sid(name) for name in inputs)
+            port_names.extend(sid(name) for name in outputs)
+
+            extra_offset = cls.NO_EXTRA
+            if rest:
+                encoded_rest = bytearray()
+                cls._encode(rest, encoded_rest, sid)
+                encoded_rest = bytes(encoded_rest)
+                extra_offset = extra_offsets.get(encoded_rest)
+                if extra_offset is None:
+                    extra_offset = extra_offsets[encoded_rest] = len(extras)
+                    extras += encoded_rest
+
+            records += cls.ELEMENT.pack(flags, type_sid, name_sid, x, y,
+                                        names_start, len(inputs), len(outputs), extra_offset)
+
+        edges = bytearray()
+        connections = grid_data.get("connections", [])
+        for conn in connections:
+            (src_idx, src_port), (trg_idx, trg_port) = conn["source"], conn["target"]
+            edges += cls.EDGE.pack(src_idx, src_port, trg_idx, trg_port)
+
+        grid_rest = {k: v for k, v in grid_data.items() if k not in ("elements", "connections")}
+        grid_extra = cls.NO_EXTRA
+        if grid_rest:
+            grid_extra = len(extras)
+            cls._encode(grid_rest, extras, sid)
+
+        encoded = [text.encode("utf-8") for text in strings]
+        string_offsets = bytearray()
+        position = 0
+        for data in encoded:
+            string_offsets += cls.U32.pack(position)
+            position += len(data)
+        string_offsets += cls.U32.pack(position)
+        string_data = b"".join(encoded)
+
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, 0,
+            len(encoded), len(string_data),
+            len(records) // cls.ELEMENT.size, len(port_names),
+            len(connections), len(extras), grid_extra,
+            ("elements" in grid_data) | ("connections" in grid_data) << 1,
+        )
+        return b"".join((
+            header, string_offsets, string_data, records,
+            struct.pack(f"<{len(port_names)}I", *port_names), edges, extras,
+        ))
+
+    @classmethod
+    def loads(cls, buffer) -> Dict[str, Any]:
+        view = memoryview(buffer)
+        if len(view) < cls.HEADER.size:
+            raise ValueError("Файл схемы повреждён: нет заголовка")
+        (magic, version, _, string_count, string_bytes, element_count, name_count,
+         edge_count, extra_bytes, grid_extra, sections) = cls.HEADER.unpack_from(view, 0)
+        if magic != cls.MAGIC:
+            raise ValueError("Не двоичный файл схемы")
+        if version != cls.VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата: {version}")
+        expected = (cls.HEADER.size + 4 * (string_count + 1) + string_bytes + element_count * cls.ELEMENT.size
+                    + 4 * name_count + edge_count * cls.EDGE.size + extra_bytes)
+        if len(view) != expected:
+            raise ValueError("Файл схемы повреждён: размер не совпадает с заголовком")
+
+        offset = cls.HEADER.size
+        string_offsets = struct.unpack_from(f"<{string_count + 1}I", view, offset)
+        offset += 4 * (string_count + 1)
+        string_data = bytes(view[offset:offset + string_bytes])
+        offset += string_bytes
+        strings = [string_data[string_offsets[i]:string_offsets[i + 1]].decode("utf-8")
+                   for i in range(string_count)]
+
+        records = view[offset:offset + element_count * cls.ELEMENT.size]
+        offset += element_count * cls.ELEMENT.size
+        port_names = struct.unpack_from(f"<{name_count}I", view, offset)
+        offset += 4 * name_count
+        edges_offset = offset
+        offset += edge_count * cls.EDGE.size
+        extras = view[offset:offset + extra_bytes]
+
+        elements = []
+        for (flags, type_sid, name_sid, x, y, names_start, n_in, n_out,
+             extra_offset) in cls.ELEMENT.iter_unpack(records):
+            elem_data = {}
+            if flags & cls.HAS_TYPE:
+                elem_data["type"] = strings[type_sid]
+            if flags & cls.HAS_NAME:
+                elem_data["name"] = strings[name_sid]
+            if flags & cls.HAS_POSITION:
+                elem_data["position"] = [x, y]
+            elif flags & cls.POSITION_NONE:
+                elem_data["position"] = None
+            if flags & cls.HAS_INPUT_NAMES:
+                elem_data["input_names"] = [strings[i] for i in port_names[names_start:names_start + n_in]]
+            if flags & cls.HAS_OUTPUT_NAMES:
+                start = names_start + n_in
+                elem_data["output_names"] = [strings[i] for i in port_names[start:start + n_out]]
+            if extra_offset != cls.NO_EXTRA:
+                elem_data.update(cls._decode(extras, extra_offset, strings)[0])
+            elements.append(elem_data)
+
+        connections = [
+            {"source": [src_idx, src_port], "target": [trg_idx, trg_port]}
+            for src_idx, src_port, trg_idx, trg_port
+            in cls.EDGE.iter_unpack(view[edges_offset:edges_offset + edge_count * cls.EDGE.size])
+        ]
+
+        grid_data = {}
+        if sections & 1:
+            grid_data["elements"] = elements
+        if sections & 2:
+            grid_data["connections"] = connections
+        if grid_extra != cls.NO_EXTRA:
+            grid_data.update(cls._decode(extras, grid_extra, strings)[0])
+        return grid_data
+
+    @classmethod
+    def load_file(cls, path: str) -> Dict[str, Any]:
+        """Читает файл одним вызовом read и разбирает его целиком"""
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data:
+            raise ValueError("Пустой файл схемы")
+        return cls.loads(data)
+
+    @staticmethod
+    def _is_int_pair(value) -> bool:
+        return (isinstance(value, (list, tuple)) and len(value) == 2
+                and all(type(v) is int and -2 ** 31 <= v < 2 ** 31 for v in value))
+
+    @staticmethod
+    def _is_str_list(value) -> bool:
+        return isinstance(value, (list, tuple)) and len(value) < 2 ** 16 and all(isinstance(v, str) for v in value)
+
+    @classmethod
+    def _encode(cls, value, out: bytearray, sid) -> None:
+        if value is None:
+            out.append(cls.TAG_NONE)
+        elif value is True:
+            out.append(cls.TAG_TRUE)
+        elif value is False:
+            out.append(cls.TAG_FALSE)
+        elif isinstance(value, int):
+            out.append(cls.TAG_INT)
+            out += cls.I64.pack(value)
+        elif isinstance(value, float):
+            out.append(cls.TAG_FLOAT)
+            out += cls.F64.pack(value)
+        elif isinstance(value, str):
+            out.append(cls.TAG_STR)
+            out += cls.U32.pack(sid(value))
+        elif isinstance(value, (list, tuple)):
+            out.append(cls.TAG_LIST)
+            out += cls.U32.pack(len(value))
+            for item in value:
+                cls._encode(item, out, sid)
+        elif isinstance(value, dict):
+            out.append(cls.TAG_DICT)
+            out += cls.U32.pack(len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Ключи словаря должны быть строками: {key!r}")
+                out += cls.U32.pack(sid(key))
+                cls._encode(item, out, sid)
+        else:
+            raise TypeError(f"Значение не сериализуется в схему: {value!r}")
+
+    @classmethod
+    def _decode(cls, data: memoryview, offset: int, strings: List[str]):
+        """Возвращает (значение, смещение за ним)"""
+        tag = data[offset]
+        offset += 1
+        if tag == cls.TAG_NONE:
+            return None, offset
+        if tag == cls.TAG_FALSE:
+            return False, offset
+        if tag == cls.TAG_TRUE:
+            return True, offset
+        if tag == cls.TAG_INT:
+            return cls.I64.unpack_from(data, offset)[0], offset + 8
+        if tag == cls.TAG_FLOAT:
+            return cls.F64.unpack_from(data, offset)[0], offset + 8
+        if tag == cls.TAG_STR:
+            return strings[cls.U32.unpack_from(data, offset)[0]], offset + 4
+        if tag == cls.TAG_LIST:
+            count = cls.U32.unpack_from(data, offset)[0]
+            offset += 4
+            items = []
+            for _ in range(count):
+                item, offset = cls._decode(data, offset, strings)
+                items.append(item)
+            return items, offset
+        if tag == cls.TAG_DICT:
+            count = cls.U32.unpack_from(data, offset)[0]
+            offset += 4
+            result = {}
+            for _ in range(count):
+                key = strings[cls.U32.unpack_from(data, offset)[0]]
+                result[key], offset = cls._decode(data, offset + 4, strings)
+            return result, offset
+        raise ValueError(f"Файл схемы повреждён: неизвестный тег {tag}")
+
+
+def read_grid_file(path: str) -> Dict[str, Any]:
+    """Загружает grid_data из файла схемы; формат определяется по расширению"""
+    if path.endswith(BINARY_EXTENSION):
+        return BinaryGridFormat.load_file(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_grid_file(path: str, grid_data: Dict[str, Any]) -> None:
+    """Сохраняет grid_data в файл схемы; формат определяется по расширению"""
+    if path.endswith(BINARY_EXTENSION):
+        with open(path, "wb") as f:
+            f.write(BinaryGridFormat.dumps(grid_data))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(grid_data, f, indent=2)
+
+
+def convert_grid_file(path: str) -> str:
+    """
+    Пересохраняет файл схемы в другом формате (JSON <-> .qgb) рядом с исходным и удаляет исходный.
+    Возвращает путь нового файла; FileExistsError, если файл с таким именем уже есть.
+    """
+    root, extension = os.path.splitext(path)
+    new_path = root + (JSON_EXTENSION if extension == BINARY_EXTENSION else BINARY_EXTENSION)
+    if os.path.exists(new_path):
+        raise FileExistsError(new_path)
+    write_grid_file(new_path, read_grid_file(path))
+    os.remove(path)
+    return new_path
@@ -15,4 +15,24 @@ class Level:
         self.unlocked = unlocked
 
     def get_truth_table(self) -> Dict[Tuple[int, ...], Tuple[int, ...]]:
-        return self.truth_table
\ No newline at end of file
+        return self.truth_table
+
+class SequentialLevel(Level):
+    """
+    Уровень со схемой с памятью: вместо одной таблицы истинности — последовательности тактов.
+
+    sequences — список последовательностей [(входы, ожидаемые выходы), ...]; каждая прогоняется
+    с одного и того же начального состояния схемы. None в ожидаемых выходах — значение на этом
+    такте не проверяется (например, запрещённая комбинация входов).
+    truth_table остаётся описанием уровня для показа игроку.
+    """
+    def __init__(self,
+                 truth_table: Dict[Tuple[int, ...], Tuple],
+                 input_names: List[str],
+                 output_names: List[str],
+                 sequences: List[List[Tuple[Tuple[int, ...], Tuple[Optional[int], ...]]]],
+                 name = "Уровень",
+                 unlocked = False
+                 ):
+        super().__init__(truth_table, input_names, output_names, name, unlocked)
+        self.sequences = sequences
@@ -1,4 +1,5 @@
 from core import Level
+from core.Level import SequentialLevel
 
 class LevelFactory:
     @staticmethod
@@ -164,10 +165,15 @@ class LevelFactory:
             (1, 0): (1,),
             (1, 1): ("invalid",)
         }
+        # Проверка по тактам: удержание (0, 0) сохраняет предыдущее значение, после (1, 1) значение не проверяется
+        sequences = [
+            [((1, 0), (1,)), ((0, 0), (1,)), ((0, 1), (0,)), ((0, 0), (0,)), ((1, 0), (1,)), ((0, 0), (1,))],
+            [((0, 1), (0,)), ((0, 0), (0,)), ((1, 1), (None,)), ((0, 1), (0,)), ((0, 0), (0,))],
+        ]
         input_names = ["S", "R"]
         output_names = ["Q"]
         name = "Уровень 10: Триггер SR"
-        return Level(truth_table, input_names, output_names, name, unlocked=True)
+        return SequentialLevel(truth_table, input_names, output_names, sequences, name, unlocked=True)
 
     @staticmethod
     def _make_level_freeplay():
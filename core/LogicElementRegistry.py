@@ -31,6 +31,9 @@ def register_element(cls_or_name=None, *, cls=None, is_custom=False, category="
 def get_registered_element_names() -> list[str]:
     return list(ELEMENTS_REGISTRY.keys())
 
+def get_element_class_by_name(name: str):
+    return ELEMENTS_REGISTRY.get(name)
+
 def create_element_by_name(name: str):
     cls = ELEMENTS_REGISTRY.get(name)
     if cls:
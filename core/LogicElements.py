@@ -3,17 +3,29 @@ from abc import ABC, abstractmethod
 from math import ceil
 from typing import List, Tuple, Optional, Set, Dict
 
-from PyQt6.QtCore import QTimer
-
 from core.BehaviorModifiers import BehaviorModifier
+from core.SignalStore import SignalStore, SignalView
+from core.PortConnections import PortConnections
+from core.TimeSource import TimeSource, VirtualTimeSource
 from core.LogicElementRegistry import register_element
 from core.BehaviorModifiersRegistry import MODIFIERS_REGISTRY, create_modifier_by_name
 
 class Categorized:
-    def __init__(self, category: str = "Прочее"):
-        self.category = category
+    __slots__ = ()
+    # Категория задаётся на уровне класса (см. register_element)
+    category = "Прочее"
 
 class LogicElement(Categorized, ABC):
+    # Слоты для всех общих атрибутов; у примитивов нет __dict__ (он появляется только у подклассов без __slots__)
+    __slots__ = (
+        "num_inputs", "num_outputs", "width", "height", "position", "name", "is_sync",
+        "input_connections", "output_connections", "input_names", "output_names",
+        "_modifiers", "_signal_store", "_signal_offset", "_grid", "__weakref__",
+    )
+
+    # Класс -> параметры конструктора для сериализации (см. constructor_schema)
+    _constructor_schemas: Dict[type, Tuple[Tuple[str, object], ...]] = {}
+
     def __init__(
             self,
             num_inputs: int,
@@ -21,40 +33,95 @@ class LogicElement(Categorized, ABC):
             width: int = 6,
             height: int = 4,
             name: str = "Element",
-            category: str = "Прочее"
+            category: Optional[str] = None
     ):
-        super().__init__(category)
+        if category is not None:
+            self.category = category
         self.num_inputs = num_inputs
         self.num_outputs = num_outputs
         self.width = width
         self.height = max(self.num_inputs, self.num_outputs) + 2
         self.position: Optional[Tuple[int, int]] = None
+        # Поле, на котором стоит элемент (назначает Grid); его скомпилированная схема зависит от соединений элемента
+        self._grid = None
         self.name = name
         self.is_sync = False
 
-        # Модифицировано: теперь каждый вход может иметь несколько соединений
-        self.input_connections: List[List[Tuple['LogicElement', int]]] = [
-            [] for _ in range(num_inputs)
+        # Модифицировано: теперь каждый вход может иметь несколько соединений.
+        # У каждого порта — упорядоченное множество (элемент, порт): подключение, отключение и проверка за O(1)
+        self.input_connections: List[PortConnections] = [
+            PortConnections() for _ in range(num_inputs)
         ]
-        self.output_connections: List[List[Tuple['LogicElement', int]]] = [
-            [] for _ in range(num_outputs)
+        self.output_connections: List[PortConnections] = [
+            PortConnections() for _ in range(num_outputs)
         ]
-        self.output_values: List[int] = [0] * self.num_outputs
-        self.next_output_values: List[int] = [0] * self.num_outputs
+        # Значения выходов хранятся в общем буфере сигналов поля. Элемент не на поле получает собственный
+        # маленький буфер при первом обращении (см. __getattr__): элементам, которые сразу попадают
+        # на поле или во вложенную схему, он не нужен
 
         self.input_names = [f"In{i + 1}" for i in range(num_inputs)]
         self.output_names = [f"Out{i + 1}" for i in range(num_outputs)]
 
         self._modifiers: List[BehaviorModifier] = []
 
+    def __getattr__(self, name):
+        # Вызывается только для незаполненных атрибутов: буфер ещё не создан — создаём собственный
+        if name in ("_signal_store", "_signal_offset"):
+            store = SignalStore()
+            self._signal_offset = store.allocate(self.num_outputs)
+            self._signal_store = store
+            return getattr(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def attach_store(self, store: SignalStore):
+        """Переносит значения выходов элемента в буфер store"""
+        try:
+            # Чтение слота напрямую, в обход __getattr__: у ещё не использованного элемента буфера нет
+            old = LogicElement._signal_store.__get__(self)
+        except AttributeError:
+            old = None
+        if store is old:
+            return
+        offset = store.allocate(self.num_outputs)
+        if old is not None:
+            old_offset = self._signal_offset
+            store.values[offset:offset + self.num_outputs] = old.values[old_offset:old_offset + self.num_outputs]
+            store.next_values[offset:offset + self.num_outputs] = old.next_values[old_offset:old_offset + self.num_outputs]
+        self._signal_store = store
+        self._signal_offset = offset
+
+    @property
+    def output_values(self) -> SignalView:
+        return SignalView(self._signal_store.values, self._signal_offset, self.num_outputs)
+
+    @output_values.setter
+    def output_values(self, values: List[int]):
+        SignalStore.write(self._signal_store.values, self._signal_offset, self.num_outputs, values)
+
+    @property
+    def next_output_values(self) -> SignalView:
+        return SignalView(self._signal_store.next_values, self._signal_offset, self.num_outputs)
+
+    @next_output_values.setter
+    def next_output_values(self, values: List[int]):
+        SignalStore.write(self._signal_store.next_values, self._signal_offset, self.num_outputs, values)
+
+    def _topology_changed(self):
+        # Изменились соединения или модификаторы: пересобрать скомпилированную схему нужно только полю элемента
+        if self._grid is not None:
+            self._grid._topology_version += 1
+
     def add_modifier(self, modifier: BehaviorModifier):
         self._modifiers.append(modifier)
+        self._topology_changed()
 
     def remove_modifier(self, modifier: BehaviorModifier):
         self._modifiers.remove(modifier)
+        self._topology_changed()
 
     def clear_modifiers(self):
         self._modifiers.clear()
+        self._topology_changed()
 
     @property
     def modifiers(self) -> List[BehaviorModifier]:
@@ -63,6 +130,7 @@ class LogicElement(Categorized, ABC):
     @modifiers.setter
     def modifiers(self, value: List[BehaviorModifier]):
         self._modifiers = value
+        self._topology_changed()
 
     def apply_modifiers(self):
         for modifier in self._modifiers:
@@ -111,32 +179,27 @@ class LogicElement(Categorized, ABC):
             return False
 
         # Проверка на дублирование соединения
-        for existing_target, existing_input in self.output_connections[output_port]:
-            if existing_target is target and existing_input == target_input:
-                return False
-
-        self.output_connections[output_port].append((target, target_input))
-        target.input_connections[target_input].append((self, output_port))  # Модифицировано
+        if not self.output_connections[output_port].add((target, target_input)):
+            return False
+        target.input_connections[target_input].add((self, output_port))  # Модифицировано
+        self._topology_changed()
+        target._topology_changed()
 
         return True
 
     def disconnect_port(self, port_type, port_index):
         if port_type == "input":
             for source, source_output_index in self.input_connections[port_index]:
-                source.output_connections[source_output_index] = [
-                    (t, tp) for (t, tp) in source.output_connections[source_output_index]
-                    if not (t is self and tp == port_index)
-                ]
+                source.output_connections[source_output_index].discard((self, port_index))
             self.input_connections[port_index].clear()
 
         elif port_type == "output":
             for target, target_port in self.output_connections[port_index]:
-                target.input_connections[target_port] = [
-                    (s, sp) for (s, sp) in target.input_connections[target_port]
-                    if not (s is self and sp == port_index)
-                ]
+                target.input_connections[target_port].discard((self, port_index))
             self.output_connections[port_index].clear()
 
+        self._topology_changed()
+
     def disconnect_all(self):
         for i in range(len(self.input_connections)):
             self.disconnect_port("input", i)
@@ -146,8 +209,9 @@ class LogicElement(Categorized, ABC):
     def get_input_value(self, input_port: int) -> int:
         result = 0
         for source, source_output in self.input_connections[input_port]:
-            if 0 <= source_output < len(source.output_values):
-                if source.output_values[source_output]:
+            # Читаем прямо из буфера сигналов источника, минуя SignalView
+            if 0 <= source_output < source.num_outputs:
+                if source._signal_store.values[source._signal_offset + source_output]:
                     result = 1
                     break
         return result
@@ -160,9 +224,26 @@ class LogicElement(Categorized, ABC):
         for modifier in self._modifiers:
             modifier.compute_next_state(self)
 
+    def compute_bitwise(self, inputs: List[int], mask: int) -> Optional[List[int]]:
+        """
+        Побитово-параллельное вычисление: i-й бит каждого значения — i-я строка таблицы истинности.
+        Возвращает None, если элемент не поддерживает такой режим.
+        """
+        return None
+
+    def _latch_outputs(self, *values: int):
+        """Записывает следующие значения выходов прямо в буфер сигналов"""
+        next_values = self._signal_store.next_values
+        for i, value in enumerate(values, self._signal_offset):
+            next_values[i] = value
+
     def tick(self):
-        self.output_values = self.next_output_values[:]
-        self.apply_modifiers()
+        # Следующие значения становятся текущими одним копированием среза буфера
+        store, offset = self._signal_store, self._signal_offset
+        end = offset + self.num_outputs
+        store.values[offset:end] = store.next_values[offset:end]
+        if self._modifiers:
+            self.apply_modifiers()
 
     def to_dict(self):
         base = {
@@ -182,42 +263,45 @@ class LogicElement(Categorized, ABC):
             ]
         }
 
-        # Получаем сигнатуру конструктора и добавляем нужные аргументы
-        sig = inspect.signature(self.__init__)
-        for param in sig.parameters.values():
-            if param.name == "self":
-                continue
-            val = getattr(self, param.name, None)
+        # Добавляем аргументы конструктора
+        for name, _ in self.constructor_schema():
+            val = getattr(self, name, None)
             if val is not None:
-                base[param.name] = val
+                base[name] = val
 
         return base
 
     @classmethod
-    def from_dict(cls, data):
-        # Получаем сигнатуру конструктора
-        sig = inspect.signature(cls.__init__)
+    def constructor_schema(cls) -> Tuple[Tuple[str, object], ...]:
+        """Параметры конструктора (имя, значение по умолчанию); сигнатура разбирается один раз на класс"""
+        schema = LogicElement._constructor_schemas.get(cls)
+        if schema is None:
+            sig = inspect.signature(cls.__init__)
+            schema = tuple((name, param.default) for name, param in sig.parameters.items() if name != "self")
+            LogicElement._constructor_schemas[cls] = schema
+        return schema
+
+    @classmethod
+    def constructor_kwargs(cls, data) -> dict:
+        """Аргументы конструктора из сериализованного словаря (по сигнатуре)"""
         kwargs = {}
 
         # Извлекаем только параметры, которые явно указаны в сигнатуре
-        for name, param in sig.parameters.items():
-            if name == "self":
-                continue
+        for name, default in cls.constructor_schema():
             if name in data:
                 kwargs[name] = data[name]
-            elif param.default is not inspect.Parameter.empty:
-                kwargs[name] = param.default
+            elif default is not inspect.Parameter.empty:
+                kwargs[name] = default
             else:
                 raise ValueError(f"Отсутствуют аргументы конструктора: {name}")
+        return kwargs
 
-        # Создание объекта с аргументами конструктора
-        obj = cls(**kwargs)
-
-        # Дополнительные параметры, не передаваемые в конструктор
-        obj.name = data.get("name", obj.name)
-        obj.position = tuple(data.get("position", (0, 0)))
-        obj.input_names = data.get("input_names", obj.input_names)
-        obj.output_names = data.get("output_names", obj.output_names)
+    def load_attributes(self, data):
+        """Дополнительные параметры, не передаваемые в конструктор"""
+        self.name = data.get("name", self.name)
+        self.position = tuple(data.get("position", (0, 0)))
+        self.input_names = data.get("input_names", self.input_names)
+        self.output_names = data.get("output_names", self.output_names)
 
         # Модификаторы
         for mod in data.get("modifiers", []):
@@ -230,17 +314,23 @@ class LogicElement(Categorized, ABC):
                 for k, v in mod_data.items():
                     setattr(modifier, k, v)
             if modifier:
-                obj.add_modifier(modifier)
+                self.add_modifier(modifier)
 
+    @classmethod
+    def from_dict(cls, data):
+        # Создание объекта с аргументами конструктора
+        obj = cls(**cls.constructor_kwargs(data))
+        obj.load_attributes(data)
         return obj
 
 
 @register_element(category="Вход-Выход")
 class InputElement(LogicElement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(num_inputs=0, num_outputs=1, name="Input")
         self._hide_ports_names()
-        self.output_values[0] = 0
         self.height = 2
         self.width = 8
 
@@ -253,12 +343,17 @@ class InputElement(LogicElement):
     def compute_outputs(self):
         pass
 
+    def compute_bitwise(self, inputs, mask):
+        return [mask if self.output_values[0] else 0]
+
     def tick(self):
         pass
 
 
 @register_element(category="Вход-Выход")
 class OutputElement(LogicElement):
+    __slots__ = ("value",)
+
     def __init__(self):
         super().__init__(num_inputs=1, num_outputs=0, name="Output")
         self._hide_ports_names()
@@ -269,9 +364,14 @@ class OutputElement(LogicElement):
     def compute_outputs(self):
         self.value = self.get_input_value(0)
 
+    def compute_bitwise(self, inputs, mask):
+        return []
+
 
 @register_element
 class AndElement(LogicElement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(num_inputs=2, num_outputs=1, name="And")
         self.height = 3
@@ -283,9 +383,14 @@ class AndElement(LogicElement):
         b = self.get_input_value(1)
         self.output_values[0] = a & b
 
+    def compute_bitwise(self, inputs, mask):
+        return [inputs[0] & inputs[1]]
+
 
 @register_element
 class OrElement(LogicElement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(num_inputs=2, num_outputs=1, name="Or")
         self.height = 3
@@ -297,9 +402,14 @@ class OrElement(LogicElement):
             self.get_input_value(0) or self.get_input_value(1)
         ) else 0
 
+    def compute_bitwise(self, inputs, mask):
+        return [inputs[0] | inputs[1]]
+
 
 @register_element
 class XorElement(LogicElement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(num_inputs=2, num_outputs=1, name="Xor")
         self.height = 3
@@ -311,9 +421,14 @@ class XorElement(LogicElement):
             self.get_input_value(0) == self.get_input_value(1)
         ) else 1
 
+    def compute_bitwise(self, inputs, mask):
+        return [inputs[0] ^ inputs[1]]
+
 
 @register_element
 class NotElement(LogicElement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(num_inputs=1, num_outputs=1, name="Not")
         self.height = 3
@@ -325,9 +440,14 @@ class NotElement(LogicElement):
                 self.get_input_value(0) == 0
         ) else 0
 
+    def compute_bitwise(self, inputs, mask):
+        return [~inputs[0] & mask]
+
 
 @register_element
 class RSTriggerElement(LogicElement):
+    __slots__ = ("state", "_next_state")
+
     def __init__(self):
         super().__init__(num_inputs=3, num_outputs=2, name="RSFF")
         self.is_sync = True
@@ -355,12 +475,14 @@ class RSTriggerElement(LogicElement):
 
     def tick(self):
         self.state = getattr(self, "_next_state", self.state)
-        self.next_output_values = [self.state, 1 - self.state]
+        self._latch_outputs(self.state, 1 - self.state)
         super().tick()
 
 
 @register_element
 class DTriggerElement(LogicElement):
+    __slots__ = ("state", "_next_state")
+
     def __init__(self):
         super().__init__(num_inputs=2, num_outputs=2, name="DFF")  # D и CLK
         self.is_sync = True
@@ -379,32 +501,49 @@ class DTriggerElement(LogicElement):
 
     def tick(self):
         self.state = getattr(self, "_next_state", self.state)
-        self.next_output_values = [self.state, 1 - self.state]
+        self._latch_outputs(self.state, 1 - self.state)
         super().tick()
 
 
 @register_element(category="Вход-Выход")
 class ClockGeneratorElement(LogicElement):
+    __slots__ = ("time_source", "interval_ms", "_state")
+
     def __init__(self, interval_ms=500):
         super().__init__(num_inputs=0, num_outputs=1, name="Clock")
-        self._timer = QTimer()
-        self._timer.timeout.connect(self._toggle_output)
+        # Источник времени назначает поле (Grid.set_time_source); генератор вне поля получает
+        # собственный виртуальный источник при запуске
+        self.time_source: Optional[TimeSource] = None
         self.interval_ms = interval_ms
         self._state = 0
 
         self.width = 8
         self._hide_ports_names()
 
-    def get_timer(self) -> QTimer:
-        return self._timer
+    def set_time_source(self, time_source: Optional[TimeSource]):
+        """Переводит генератор на другой источник времени, сохраняя запущенное состояние; None — останавливает и отвязывает"""
+        running = self.is_running()
+        self.stop()
+        self.time_source = time_source
+        if running and time_source is not None:
+            self.start()
 
     def start(self):
-        self._timer.start(self.interval_ms)
+        if self.time_source is None:
+            self.time_source = VirtualTimeSource()
+        self.time_source.start(self, self.interval_ms)
 
     def stop(self):
-        self._timer.stop()
+        if self.time_source is not None:
+            self.time_source.stop(self)
+
+    def is_running(self) -> bool:
+        return self.time_source is not None and self.time_source.is_active(self)
+
+    def compute_bitwise(self, inputs, mask):
+        return [mask if self.output_values[0] else 0]
 
-    def _toggle_output(self):
+    def toggle(self):
         self._state ^= 1
         self.output_values[0] = self._state
         self.next_output_values[0] = self._state
@@ -0,0 +1,482 @@
+import heapq
+import operator
+from typing import List, Tuple, Dict, Optional, Iterable, Set, Callable
+
+from core.LogicElements import LogicElement, OutputElement, AndElement, OrElement, XorElement, NotElement
+
+# Примитивы, которые ядро вычисляет прямо по буферу значений
+_BINARY_OPS = {AndElement: operator.and_, OrElement: operator.or_, XorElement: operator.xor}
+
+
+def _read_fanin(values: bytearray, slots: Tuple[int, ...]) -> int:
+    """Монтажное ИЛИ нескольких источников"""
+    for slot in slots:
+        if values[slot]:
+            return 1
+    return 0
+
+
+class Netlist:
+    """
+    Скомпилированное представление схемы для уровневого (levelized) вычисления.
+
+    Комбинаторные элементы сортируются топологически один раз; каждый элемент
+    ациклической части вычисляется ровно один раз за проход. Итеративный поиск
+    неподвижной точки остаётся только для настоящих циклов (сильно связных компонент).
+
+    При flatten=True комбинаторные пользовательские элементы раскрываются в свои примитивы,
+    и вся иерархия вычисляется как один плоский граф без рекурсии во вложенные Grid.
+    """
+
+    def __init__(self, elements: List[LogicElement], flatten: bool = False):
+        self.elements = list(elements)
+        self.flatten = flatten
+        self.sync_elements = [e for e in self.elements if getattr(e, 'is_sync', False)]
+        self.sync_set: Set[LogicElement] = set(self.sync_elements)
+
+        # Узлы плоского графа и их входы: для каждого порта — список (источник, порт источника)
+        self.nodes: List[LogicElement] = []
+        self.port_sources: Dict[LogicElement, List[List[Tuple[LogicElement, int]]]] = {}
+        self.compute_of: Dict[LogicElement, Callable[[], None]] = {}
+        # Внутренние InputElement раскрытых элементов (повторяют вход родителя)
+        self.port_buffers: Set[LogicElement] = set()
+        # Раскрытые пользовательские элементы: собирают выходы со своих внутренних OutputElement
+        self.collectors: Set[LogicElement] = set()
+        # Иерархические имена для отображения: "Сумматор 1/Xor 2"
+        self.hierarchical_names: Dict[LogicElement, str] = {}
+        # Цикл, который не стабилизировался при последнем вычислении (пусто, если всё сошлось)
+        self.unstable_group: List[LogicElement] = []
+
+        for e in self.elements:
+            if not getattr(e, 'is_sync', False):
+                self._add_node(e, e.name)
+
+        # Расписание: список групп (элементы, является_ли_циклом) в топологическом порядке
+        self.schedule: List[Tuple[List[LogicElement], bool]] = self._build_schedule()
+
+        # Таблицы входов: у каждого выхода свой слот в общем буфере значений,
+        # у каждого входного порта — кортеж слотов его источников
+        self.values = bytearray(1)  # слот 0 — константный ноль для неподключённых портов
+        self.slot_of: Dict[LogicElement, int] = {}
+        self.fanin_slots: Dict[LogicElement, List[Tuple[int, ...]]] = {}
+        self._source_elements: List[LogicElement] = []
+        self._build_fanin_tables()
+        self._computes = [[self._compile(e) for e in group] for group, _ in self.schedule]
+
+        # Для событийного режима: номер группы каждого элемента — его ранг в топологическом порядке
+        self.group_of: Dict[LogicElement, int] = {
+            e: i for i, (group, _) in enumerate(self.schedule) for e in group
+        }
+        self.fanout_groups: Dict[LogicElement, List[int]] = {}
+        self.sync_fanout: Dict[LogicElement, List[LogicElement]] = {}
+        self._build_fanout()
+
+        # Элементы со своим внутренним состоянием пересчитываются на каждом шаге, даже без изменений на входах
+        self.always_active = [
+            e for e in self.nodes + self.sync_elements
+            if e.modifiers or (hasattr(e, "get_subgrid") and e not in self.collectors and e.truth_table is None)
+        ]
+
+    @staticmethod
+    def _is_flattenable(element: LogicElement) -> bool:
+        # Элемент с готовой таблицей истинности выгоднее вычислять одним поиском по таблице
+        return hasattr(element, "get_subgrid") and not getattr(element, 'is_sync', False) \
+            and element.truth_table is None
+
+    def _add_node(self, element: LogicElement, name: str) -> None:
+        self.hierarchical_names[element] = name
+        if self.flatten and self._is_flattenable(element):
+            self._expand(element, name)
+            return
+        self.nodes.append(element)
+        self.port_sources[element] = element.input_connections
+        self.compute_of[element] = element.compute_outputs
+
+    def _expand(self, custom: LogicElement, name: str) -> None:
+        """Раскрывает пользовательский элемент в узлы его внутренней схемы"""
+        port_index = {inner: k for k, inner in enumerate(custom.get_input_elements())}
+
+        for inner in custom.get_subgrid().elements:
+            inner_name = f"{name}/{inner.name}"
+            k = port_index.get(inner)
+            if k is None:
+                self._add_node(inner, inner_name)
+                continue
+
+            self.hierarchical_names[inner] = inner_name
+            self.nodes.append(inner)
+            self.port_sources[inner] = [custom.input_connections[k]]
+            self.compute_of[inner] = lambda inner=inner, k=k: inner.set_value(custom.get_input_value(k))
+            self.port_buffers.add(inner)
+
+        self.nodes.append(custom)
+        self.port_sources[custom] = [out.input_connections[0] for out in custom.get_output_elements()]
+        self.compute_of[custom] = custom.collect_outputs
+        self.collectors.add(custom)
+
+    def get_hierarchical_name(self, element: LogicElement) -> str:
+        return self.hierarchical_names.get(element, element.name)
+
+    def get_unstable_names(self) -> List[str]:
+        """Иерархические имена элементов цикла, не стабилизировавшегося при последнем вычислении"""
+        return [self.get_hierarchical_name(e) for e in self.unstable_group]
+
+    def _build_schedule(self) -> List[Tuple[List[LogicElement], bool]]:
+        nodes = self.nodes
+        members = {e: i for i, e in enumerate(nodes)}
+        successors = [[] for _ in nodes]
+        for i, node in enumerate(nodes):
+            for conns in self.port_sources[node]:
+                for source, _ in conns:
+                    idx = members.get(source)
+                    if idx is not None:
+                        successors[idx].append(i)
+
+        # Алгоритм Тарьяна (итеративный, чтобы длинные цепочки не упирались в лимит рекурсии)
+        index_of = [-1] * len(nodes)
+        lowlink = [0] * len(nodes)
+        on_stack = [False] * len(nodes)
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(len(nodes)):
+            if index_of[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child_pos = work.pop()
+                if child_pos == 0:
+                    index_of[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+
+                recurse = False
+                children = successors[node]
+                while child_pos < len(children):
+                    child = children[child_pos]
+                    child_pos += 1
+                    if index_of[child] == -1:
+                        work.append((node, child_pos))
+                        work.append((child, 0))
+                        recurse = True
+                        break
+                    elif on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                if recurse:
+                    continue
+
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+        # Тарьян выдаёт компоненты в обратном топологическом порядке
+        schedule = []
+        for component in reversed(components):
+            # Внутри цикла сохраняем исходный порядок элементов на поле
+            component.sort()
+            is_cycle = len(component) > 1 or component[0] in successors[component[0]]
+            schedule.append(([nodes[i] for i in component], is_cycle))
+        return schedule
+
+    def _allocate_slots(self, element: LogicElement) -> int:
+        base = len(self.values)
+        self.slot_of[element] = base
+        self.values.extend(bytes(element.num_outputs))
+        return base
+
+    def _build_fanin_tables(self) -> None:
+        for node in self.nodes:
+            self._allocate_slots(node)
+
+        # Всё, что не вычисляется в графе (входы схемы, триггеры, внешние элементы), — источники:
+        # их значения копируются в буфер перед вычислением
+        for node in self.nodes:
+            ports = []
+            for conns in self.port_sources[node]:
+                slots = []
+                for source, source_port in conns:
+                    if source not in self.slot_of:
+                        self._allocate_slots(source)
+                        self._source_elements.append(source)
+                    if 0 <= source_port < source.num_outputs:
+                        slots.append(self.slot_of[source] + source_port)
+                ports.append(tuple(slots) or (0,))
+            self.fanin_slots[node] = ports
+
+    def _load(self, element: LogicElement) -> None:
+        """Копирует текущие выходы элемента из его буфера сигналов в буфер схемы"""
+        base = self.slot_of.get(element)
+        if base is None:
+            return
+        offset, count = element._signal_offset, element.num_outputs
+        self.values[base:base + count] = element._signal_store.values[offset:offset + count]
+
+    def load_sources(self) -> None:
+        for element in self._source_elements:
+            self._load(element)
+
+    def _compile(self, element: LogicElement) -> Callable[[], None]:
+        """
+        Собирает функцию вычисления узла. Примитивы без модификаторов читают входы
+        одним индексированным обращением к буферу; остальные вычисляются как раньше,
+        а их выходы затем копируются в буфер.
+        """
+        values = self.values
+        # Запись результата прямо в буфер сигналов элемента
+        signals, so = element._signal_store.values, element._signal_offset
+        ports = self.fanin_slots[element]
+        out = self.slot_of[element]
+        kind = type(element)
+        single = all(len(p) == 1 for p in ports)
+
+        # Переопределённое поведение на экземпляре или модификаторы — только общий путь
+        generic = (
+            element.modifiers
+            or "compute_outputs" in getattr(element, "__dict__", ())
+            or "get_input_value" in getattr(element, "__dict__", ())
+            or (element not in self.port_buffers and element not in self.collectors
+                and kind not in _BINARY_OPS and kind not in (NotElement, OutputElement))
+        )
+        if generic:
+            compute = self.compute_of[element]
+            load = self._load
+
+            def run_generic():
+                compute()
+                load(element)
+            return run_generic
+
+        if kind in _BINARY_OPS:
+            op = _BINARY_OPS[kind]
+            if single:
+                a, b = ports[0][0], ports[1][0]
+
+                def run_binary():
+                    v = op(values[a], values[b])
+                    values[out] = v
+                    signals[so] = v
+            else:
+                a, b = ports
+
+                def run_binary():
+                    v = op(_read_fanin(values, a), _read_fanin(values, b))
+                    values[out] = v
+                    signals[so] = v
+            return run_binary
+
+        if kind is NotElement:
+            a = ports[0]
+
+            def run_not():
+                v = 1 ^ _read_fanin(values, a)
+                values[out] = v
+                signals[so] = v
+            return run_not
+
+        if kind is OutputElement:
+            a = ports[0]
+
+            def run_output():
+                element.value = _read_fanin(values, a)
+            return run_output
+
+        if element in self.port_buffers:
+            a = ports[0]
+
+            def run_buffer():
+                v = _read_fanin(values, a)
+                values[out] = v
+                signals[so] = v
+            return run_buffer
+
+        # Сборщик раскрытого пользовательского элемента
+        def run_collector():
+            for i, slots in enumerate(ports):
+                v = _read_fanin(values, slots)
+                values[out + i] = v
+                signals[so + i] = v
+        return run_collector
+
+    def _build_fanout(self) -> None:
+        fanout: Dict[LogicElement, Set[int]] = {}
+        for node in self.nodes:
+            idx = self.group_of[node]
+            for conns in self.port_sources[node]:
+                for source, _ in conns:
+                    fanout.setdefault(source, set()).add(idx)
+        self.fanout_groups = {source: sorted(groups) for source, groups in fanout.items()}
+
+        for sync in self.sync_elements:
+            for conns in sync.input_connections:
+                for source, _ in conns:
+                    targets = self.sync_fanout.setdefault(source, [])
+                    if sync not in targets:
+                        targets.append(sync)
+
+    def evaluate(self, max_iterations: int = 10) -> bool:
+        """
+        Вычисляет комбинаторную часть схемы.
+        Возвращает False, если какой-либо цикл не стабилизировался.
+        """
+        self.load_sources()
+        self.unstable_group = []
+        for (group, is_cycle), computes in zip(self.schedule, self._computes):
+            if not is_cycle:
+                computes[0]()
+            elif not self._evaluate_cycle(group, computes, max_iterations):
+                self.unstable_group = group
+                return False
+        return True
+
+    @staticmethod
+    def _evaluate_cycle(group, computes, max_iterations: int) -> bool:
+        for _ in range(max_iterations):
+            prev_outputs = [list(e.output_values) for e in group]
+            for compute in computes:
+                compute()
+            if all(e.output_values == old for e, old in zip(group, prev_outputs)):
+                return True
+        return False
+
+    @staticmethod
+    def _observed_values(element: LogicElement) -> List[int]:
+        # У OutputElement нет выходов, наблюдаемое значение хранится в value
+        if isinstance(element, OutputElement):
+            return [element.value]
+        return list(element.output_values)
+
+    def propagate(self, changed: Iterable[LogicElement], dirty: Iterable[LogicElement] = (),
+                  max_iterations: int = 10) -> Optional[Tuple[Set[LogicElement], Set[LogicElement]]]:
+        """
+        Событийный пересчёт: вычисляет только конус разветвления элементов,
+        чьи выходы изменились (changed), и явно помеченные элементы (dirty).
+
+        Группы обрабатываются по возрастанию ранга, поэтому каждая вычисляется не более одного раза.
+        Возвращает (элементы с изменившимися выходами, затронутые синхронные элементы)
+        или None, если цикл не стабилизировался.
+        """
+        heap = []
+        queued = set()
+        changed_elements = set()
+        touched_sync = set()
+        self.unstable_group = []
+
+        def schedule_group(idx):
+            if idx not in queued:
+                queued.add(idx)
+                heapq.heappush(heap, idx)
+
+        def schedule_fanout(element):
+            for idx in self.fanout_groups.get(element, ()):
+                schedule_group(idx)
+            touched_sync.update(self.sync_fanout.get(element, ()))
+
+        for element in changed:
+            self._load(element)
+            changed_elements.add(element)
+            schedule_fanout(element)
+        for element in dirty:
+            idx = self.group_of.get(element)
+            if idx is not None:
+                schedule_group(idx)
+
+        while heap:
+            idx = heapq.heappop(heap)
+            group, is_cycle = self.schedule[idx]
+            computes = self._computes[idx]
+            before = [self._observed_values(e) for e in group]
+
+            if not is_cycle:
+                computes[0]()
+            elif not self._evaluate_cycle(group, computes, max_iterations):
+                self.unstable_group = group
+                return None
+
+            for e, old in zip(group, before):
+                if self._observed_values(e) != old:
+                    changed_elements.add(e)
+                    schedule_fanout(e)
+
+        return changed_elements, touched_sync
+
+    def is_bitwise_supported(self) -> bool:
+        """Чисто комбинаторная ациклическая схема из элементов с побитовым вычислением"""
+        if self.sync_elements:
+            return False
+        for group, is_cycle in self.schedule:
+            element = group[0]
+            if is_cycle or element.modifiers:
+                return False
+            if element in self.port_buffers or element in self.collectors:
+                continue
+            if type(element).compute_bitwise is LogicElement.compute_bitwise:
+                return False
+        return True
+
+    @staticmethod
+    def truth_table_input_masks(num_inputs: int) -> List[int]:
+        """
+        Маски перебираемых входов: строка r — r-я комбинация itertools.product([0, 1], repeat=num_inputs).
+        Вход i меняется с периодом 2^(n-i): блок нулей, затем блок единиц.
+        """
+        rows = 1 << num_inputs
+        masks = []
+        for i in range(num_inputs):
+            half = 1 << (num_inputs - 1 - i)
+            block = ((1 << half) - 1) << half
+            period = half * 2
+            repeat = ((1 << rows) - 1) // ((1 << period) - 1)
+            masks.append(block * repeat)
+        return masks
+
+    def evaluate_bitwise(self, input_masks: Dict[LogicElement, int], mask: int) -> Optional[Dict[LogicElement, int]]:
+        """
+        Вычисляет схему сразу для всех строк таблицы истинности.
+        input_masks задаёт маску для выхода каждого перебираемого входа.
+        Возвращает маски на входах всех OutputElement или None, если схема не поддерживает режим.
+        """
+        if not self.is_bitwise_supported():
+            return None
+
+        outputs: Dict[LogicElement, List[int]] = {}
+        result = {}
+
+        def read_port(conns):
+            value = 0
+            for source, source_port in conns:
+                source_values = outputs.get(source)
+                if source_values is None:
+                    # Источник вне схемы — берём его текущее значение для всех строк
+                    if 0 <= source_port < len(source.output_values) and source.output_values[source_port]:
+                        value = mask
+                elif 0 <= source_port < len(source_values):
+                    value |= source_values[source_port]
+            return value
+
+        for group, _ in self.schedule:
+            element = group[0]
+            if element in input_masks:
+                outputs[element] = [input_masks[element]]
+                continue
+            inputs = [read_port(conns) for conns in self.port_sources[element]]
+            if element in self.port_buffers or element in self.collectors:
+                # Буфер повторяет вход родителя, сборщик — входы внутренних OutputElement
+                outputs[element] = inputs
+            else:
+                outputs[element] = element.compute_bitwise(inputs, mask)
+            if isinstance(element, OutputElement):
+                result[element] = inputs[0]
+
+        return result
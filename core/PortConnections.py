@@ -0,0 +1,62 @@
+from typing import Iterable, Iterator, Tuple
+
+# Общий пустой словарь для ещё не подключённых портов; свой словарь порт получает при первом соединении
+_NO_EDGES: dict = {}
+
+
+class PortConnections:
+    """
+    Соединения одного порта: упорядоченное множество пар (элемент, номер порта).
+
+    Добавление, удаление и проверка наличия — O(1); порядок обхода совпадает с порядком
+    подключения, как у прежних списков, и со списками же он сравнивается.
+    """
+    __slots__ = ("_edges",)
+    __hash__ = None
+
+    def __init__(self, edges: Iterable[Tuple[object, int]] = ()):
+        self._edges = dict.fromkeys(edges) if edges else _NO_EDGES
+
+    def __iter__(self) -> Iterator[Tuple[object, int]]:
+        return iter(self._edges)
+
+    def __len__(self) -> int:
+        return len(self._edges)
+
+    def __contains__(self, edge) -> bool:
+        return edge in self._edges
+
+    def __getitem__(self, index):
+        return list(self._edges)[index]
+
+    def add(self, edge: Tuple[object, int]) -> bool:
+        """Добавляет соединение; False, если оно уже есть"""
+        if edge in self._edges:
+            return False
+        self.append(edge)
+        return True
+
+    def append(self, edge: Tuple[object, int]) -> None:
+        if self._edges is _NO_EDGES:
+            self._edges = {}
+        self._edges[edge] = None
+
+    def discard(self, edge: Tuple[object, int]) -> None:
+        self._edges.pop(edge, None)
+
+    def remove(self, edge: Tuple[object, int]) -> None:
+        if edge not in self._edges:
+            raise ValueError(f"{edge!r} not in connections")
+        del self._edges[edge]
+
+    def clear(self) -> None:
+        self._edges.clear()
+
+    def __eq__(self, other):
+        try:
+            return list(self._edges) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self._edges))
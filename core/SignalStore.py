@@ -0,0 +1,85 @@
+from array import array
+from typing import Iterable
+
+
+class SignalStore:
+    """
+    Общий буфер сигналов схемы (структура массивов).
+
+    Текущие и следующие значения выходов всех элементов лежат подряд в двух массивах байтов;
+    элемент хранит только смещение своего участка.
+    """
+    __slots__ = ("values", "next_values")
+
+    def __init__(self):
+        self.values = array('B')
+        self.next_values = array('B')
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def allocate(self, count: int) -> int:
+        """Выделяет участок из count сигналов и возвращает его смещение"""
+        offset = len(self.values)
+        zeros = bytes(count)
+        self.values.frombytes(zeros)
+        self.next_values.frombytes(zeros)
+        return offset
+
+    @staticmethod
+    def write(buffer: array, offset: int, count: int, values: Iterable[int]) -> None:
+        """Записывает count значений в участок буфера, начиная со смещения offset"""
+        values = array('B', values)
+        if len(values) != count:
+            raise ValueError(f"Ожидалось {count} значений, получено {len(values)}")
+        buffer[offset:offset + count] = values
+
+
+class SignalView:
+    """Окно в буфер сигналов, ведущее себя как список значений выходов элемента"""
+    __slots__ = ("_buffer", "_offset", "_count")
+    __hash__ = None
+
+    def __init__(self, buffer: array, offset: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return iter(self._buffer[self._offset:self._offset + self._count])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._buffer[self._offset:self._offset + self._count])[index]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("signal index out of range")
+        return self._buffer[self._offset + index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            values = list(self)
+            values[index] = value
+            self.assign(values)
+            return
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("signal index out of range")
+        self._buffer[self._offset + index] = 1 if value else 0
+
+    def assign(self, values: Iterable[int]) -> None:
+        SignalStore.write(self._buffer, self._offset, self._count, values)
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
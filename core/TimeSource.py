@@ -0,0 +1,96 @@
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+from core.ClockScheduler import ClockScheduler
+
+
+class TimeSource(ABC):
+    """
+    Источник времени для генераторов тактов.
+
+    Генератор только просит запустить или остановить себя с заданным периодом;
+    кто и как отсчитывает время (виртуальные такты, QTimer в GUI), решает источник.
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable] = []
+
+    def add_listener(self, callback: Callable) -> None:
+        """callback(clocks) вызывается один раз на пачку генераторов, переключившихся в один момент"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _fire(self, clocks: List) -> None:
+        for clock in clocks:
+            clock.toggle()
+        for callback in self._listeners:
+            callback(clocks)
+
+    @abstractmethod
+    def now_ms(self) -> int:
+        """Текущее время источника в миллисекундах"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def start(self, clock, interval_ms: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self, clock) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_active(self, clock) -> bool:
+        raise NotImplementedError
+
+
+class VirtualTimeSource(TimeSource):
+    """Безголовый режим: время продвигается явно вызовом advance(), без таймеров и Qt"""
+
+    def __init__(self):
+        super().__init__()
+        self._now_ms = 0
+        self._scheduler = ClockScheduler()
+
+    def now_ms(self) -> int:
+        return self._now_ms
+
+    def start(self, clock, interval_ms: int) -> None:
+        self._scheduler.add(clock, interval_ms, self._now_ms)
+
+    def stop(self, clock) -> None:
+        self._scheduler.remove(clock)
+
+    def is_active(self, clock) -> bool:
+        return clock in self._scheduler
+
+    def next_due(self) -> Optional[int]:
+        """Время ближайшего переключения или None, если ни один генератор не запущен"""
+        return self._scheduler.next_due()
+
+    def fire_next(self) -> List:
+        """
+        Переводит время к ближайшему переключению и переключает все генераторы, назначенные на этот момент.
+        Возвращает переключённые генераторы.
+        """
+        due, clocks = self._scheduler.pop_due()
+        if due is None:
+            return []
+        self._now_ms = due
+        self._fire(clocks)
+        return clocks
+
+    def advance(self, ms: int) -> int:
+        """Продвигает время на ms миллисекунд и переключает генераторы по порядку; возвращает число переключений"""
+        target = self._now_ms + ms
+        fired = 0
+        while True:
+            due = self.next_due()
+            if due is None or due > target:
+                break
+            fired += len(self.fire_next())
+        self._now_ms = target
+        return fired
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import struct
+from typing import Dict, List, Optional
+
+# Каталог кэша по умолчанию (рядом с user_elements, но вне его: там каждая папка — раздел панели элементов)
+TRUTH_TABLE_CACHE_DIR = os.path.join(".cache", "truth_tables")
+
+
+class TruthTableCache:
+    """
+    Дисковый кэш таблиц истинности комбинаторных пользовательских элементов.
+
+    Ключ — хэш JSON-описания схемы (вместе с вложенными subgrid) и хэшей пользовательских элементов,
+    которые схема берёт из реестра по имени, поэтому таблица переиспользуется между запусками,
+    пока не изменилась ни сама схема, ни вложенные в неё элементы. Таблица хранится как
+    маски выходов: бит r маски — значение выхода в r-й строке itertools.product([0, 1], repeat=n).
+
+    Файл (little-endian): сигнатура, число входов и выходов, затем маски по ceil(2^n / 8) байт.
+    VERSION входит в ключ: его нужно увеличить, если изменится поведение примитивов или правила построения таблиц.
+    """
+
+    MAGIC = b"QGT1"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHH")
+    EXTENSION = ".qgt"
+
+    def __init__(self, directory: str = TRUTH_TABLE_CACHE_DIR):
+        self.directory = directory
+
+    @classmethod
+    def key(cls, grid_data: dict, nested_hashes: Optional[Dict[str, str]] = None) -> str:
+        """nested_hashes — хэши (тип -> key) вложенных пользовательских элементов, не описанных в grid_data"""
+        text = json.dumps([grid_data, nested_hashes or {}], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(f"{cls.VERSION}:{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.EXTENSION)
+
+    @staticmethod
+    def _mask_size(num_inputs: int) -> int:
+        return ((1 << num_inputs) + 7) // 8
+
+    def load(self, key: str, num_inputs: int, num_outputs: int) -> Optional[List[int]]:
+        """Маски выходов или None, если таблицы нет или файл не подходит"""
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        size = self._mask_size(num_inputs)
+        if len(data) != self.HEADER.size + size * num_outputs:
+            return None
+        magic, inputs, outputs = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or inputs != num_inputs or outputs != num_outputs:
+            return None
+
+        offset = self.HEADER.size
+        return [int.from_bytes(data[offset + j * size:offset + (j + 1) * size], "little")
+                for j in range(num_outputs)]
+
+    def store(self, key: str, num_inputs: int, masks: List[int]) -> None:
+        """Сохраняет таблицу; ошибки записи не мешают работе — таблица просто будет построена заново"""
+        size = self._mask_size(num_inputs)
+        data = self.HEADER.pack(self.MAGIC, num_inputs, len(masks))
+        data += b"".join(mask.to_bytes(size, "little") for mask in masks)
+
+        path = self._path(key)
+        # Запись через временный файл: параллельно запущенная игра не прочитает файл наполовину
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,162 @@
+import heapq
+import re
+from array import array
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from core.LogicElements import LogicElement, OutputElement
+
+
+class SignalTrace:
+    """
+    История одного сигнала: кольцевой буфер изменений (время, значение).
+    Хранятся только моменты смены значения; при переполнении затираются самые старые записи.
+    """
+    __slots__ = ("element", "port", "name", "_times", "_values", "_start", "_size", "last_value")
+
+    def __init__(self, element: LogicElement, port: int, name: str, capacity: int):
+        self.element = element
+        self.port = port
+        self.name = name
+        self._times = array('Q', bytes(8 * capacity))
+        self._values = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self.last_value: Optional[int] = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self._values)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self) -> int:
+        if isinstance(self.element, OutputElement):
+            return self.element.value
+        return self.element._signal_store.values[self.element._signal_offset + self.port]
+
+    def append(self, time: int, value: int) -> None:
+        capacity = len(self._values)
+        if self._size:
+            last = (self._start + self._size - 1) % capacity
+            if self._times[last] == time:
+                # Несколько шагов в один момент времени: остаётся только итоговое значение
+                if self._size > 1 and self._values[(last - 1) % capacity] == value:
+                    self._size -= 1
+                else:
+                    self._values[last] = value
+                self.last_value = value
+                return
+        index = (self._start + self._size) % capacity
+        self._times[index] = time
+        self._values[index] = value
+        if self._size == capacity:
+            self._start = (self._start + 1) % capacity
+        else:
+            self._size += 1
+        self.last_value = value
+
+    def changes(self) -> Iterator[Tuple[int, int]]:
+        """Изменения от старых к новым: (время, значение)"""
+        capacity = len(self._values)
+        for i in range(self._size):
+            index = (self._start + i) % capacity
+            yield self._times[index], self._values[index]
+
+
+class WaveformRecorder:
+    """
+    Запись осциллограмм выбранных сигналов схемы.
+
+    Подключается к полю через Grid.set_recorder и получает sample() после каждого шага симуляции;
+    время — время поля в миллисекундах (Grid.now_ms). Память ограничена: capacity изменений на сигнал.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.traces: List[SignalTrace] = []
+        self._by_key: Dict[Tuple[LogicElement, int], SignalTrace] = {}
+        self.now = 0
+
+    def watch(self, element: LogicElement, port: int = 0, name: Optional[str] = None) -> SignalTrace:
+        """Начинает запись выхода port элемента (для выхода схемы — его значения); текущее значение пишется сразу"""
+        key = (element, port)
+        trace = self._by_key.get(key)
+        if trace is not None:
+            return trace
+        if name is None:
+            name = element.name
+            if element.num_outputs > 1:
+                name = f"{name}.{element.output_names[port] or port}"
+        trace = SignalTrace(element, port, name, self.capacity)
+        trace.append(self.now, trace.read())
+        self.traces.append(trace)
+        self._by_key[key] = trace
+        return trace
+
+    def unwatch(self, element: LogicElement, port: int = 0) -> None:
+        trace = self._by_key.pop((element, port), None)
+        if trace is not None:
+            self.traces.remove(trace)
+
+    def is_watched(self, element: LogicElement, port: int = 0) -> bool:
+        return (element, port) in self._by_key
+
+    def clear(self) -> None:
+        """Стирает историю, оставляя набор сигналов; текущие значения становятся начальными"""
+        for trace in self.traces:
+            trace._start = trace._size = 0
+            trace.append(self.now, trace.read())
+
+    def sample(self, time: int) -> None:
+        """Сверяет текущие значения сигналов с последними записанными и дописывает изменившиеся"""
+        self.now = time
+        for trace in self.traces:
+            value = trace.read()
+            if value != trace.last_value:
+                trace.append(time, value)
+
+    def write_vcd(self, stream: IO[str], timescale: str = "1 ms") -> None:
+        """
+        Записывает историю в формате VCD (Value Change Dump).
+        Одна единица времени — одна миллисекунда времени поля.
+        """
+        codes = [self._vcd_code(i) for i in range(len(self.traces))]
+        stream.write("$comment QuartusGame waveform $end\n")
+        stream.write(f"$timescale {timescale} $end\n")
+        stream.write("$scope module grid $end\n")
+        for code, trace in zip(codes, self.traces):
+            stream.write(f"$var wire 1 {code} {self._vcd_name(trace.name)} $end\n")
+        stream.write("$upscope $end\n$enddefinitions $end\n")
+
+        current_time = None
+        streams = [self._indexed_changes(i, trace) for i, trace in enumerate(self.traces)]
+        for time, i, value in heapq.merge(*streams):
+            if time != current_time:
+                stream.write(f"#{time}\n")
+                current_time = time
+            stream.write(f"{value}{codes[i]}\n")
+
+    def export_vcd(self, path: str) -> None:
+        with open(path, "w", encoding="ascii", errors="replace") as f:
+            self.write_vcd(f)
+
+    @staticmethod
+    def _indexed_changes(index: int, trace: SignalTrace) -> Iterator[Tuple[int, int, int]]:
+        for time, value in trace.changes():
+            yield time, index, value
+
+    @staticmethod
+    def _vcd_code(index: int) -> str:
+        """Короткий идентификатор сигнала из печатных символов ASCII ('!'..'~')"""
+        code = ""
+        while True:
+            code += chr(33 + index % 94)
+            index //= 94
+            if index == 0:
+                return code
+
+    @staticmethod
+    def _vcd_name(name: str) -> str:
+        # В VCD имя — одно слово из печатных ASCII-символов
+        return re.sub(r"[^\x21-\x7e]", "_", name) or "_"
@@ -8,6 +8,15 @@ from core import CELL_SIZE
 
 PORTS_OFFSET = CELL_SIZE
 
+# Общие кисти и перья вместо создания новых на каждый кадр
+BODY_BRUSH = QBrush(QColor(200, 200, 255))
+SELECTED_BRUSH = QBrush(QColor(180, 220, 255))
+BODY_PEN = QPen(Qt.GlobalColor.black, 1)
+SELECTED_PEN = QPen(Qt.GlobalColor.black, 2)
+FRAME_BRUSH = QBrush(QColor(240, 240, 255))
+PORT_BRUSH = QBrush(QColor(255, 0, 0))
+SELECTED_PORT_BRUSH = QBrush(QColor(29, 16, 24))
+
 class AbstractElementPainter(ABC):
     @abstractmethod
     def paint(self, painter: QPainter, rect: QRectF, element, is_selected: bool, game_item) -> None:
@@ -26,9 +35,7 @@ class AbstractElementPainter(ABC):
                     scene.selected_element == game_item and
                     scene.selected_port == (port_type, port_index)
             )
-            color = QColor(29, 16, 24) if is_selected_port else QColor(255, 0, 0)
-
-            painter.setBrush(QBrush(color))
+            painter.setBrush(SELECTED_PORT_BRUSH if is_selected_port else PORT_BRUSH)
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawEllipse(QPointF(x, y), 6, 6)
 
@@ -37,23 +44,7 @@ class AbstractElementPainter(ABC):
 
             if port_type == "input" and port_index < len(element.input_connections):
                 port_name = element.input_names[port_index]
-                conns = element.input_connections[port_index]
-
-                if isinstance(conns, list):
-                    for conn in conns:
-                        if conn is None:
-                            continue
-                        source, source_port = conn
-                        if 0 <= source_port < len(source.get_output_values()):
-                            if source.get_output_values()[source_port]:
-                                value = 1
-                                break
-                    else:
-                        value = 0
-                elif isinstance(conns, tuple):
-                    source, source_port = conns
-                    if 0 <= source_port < len(source.get_output_values()):
-                        value = source.get_output_values()[source_port]
+                value = element.get_input_value(port_index)
             elif port_type == "output":
                 port_name = element.output_names[port_index]
                 if 0 <= port_index < len(element.get_output_values()):
@@ -79,8 +70,8 @@ class AbstractElementPainter(ABC):
 class DefaultElementPainter(AbstractElementPainter):
     def paint(self, painter, rect, element, is_selected, game_item):
         # Внешний прямоугольник
-        painter.setBrush(QBrush(QColor(240, 240, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
+        painter.setBrush(FRAME_BRUSH)
+        painter.setPen(SELECTED_PEN if is_selected else BODY_PEN)
         painter.drawRect(rect)
 
         # Параметры внутреннего прямоугольника
@@ -88,8 +79,8 @@ class DefaultElementPainter(AbstractElementPainter):
         inner_rect = rect.adjusted(margin, margin + 15, -margin, -margin)
 
         # Внутренний прямоугольник
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
+        painter.setBrush(SELECTED_BRUSH if is_selected else BODY_BRUSH)
+        painter.setPen(SELECTED_PEN if is_selected else BODY_PEN)
         painter.drawRect(inner_rect)
 
         # Название элемента сверху, между прямоугольниками
@@ -103,7 +94,7 @@ class DefaultElementPainter(AbstractElementPainter):
     def create_ports(self, element, game_item):
         ports = []
 
-        rect = game_item.boundingRect()
+        rect = game_item.body_rect()
         margin = 5
         inner_rect = rect.adjusted(margin, margin + 15, -margin, -margin)
         total_height = inner_rect.height()
@@ -150,12 +141,32 @@ class DefaultElementPainter(AbstractElementPainter):
 
 
 class PrimitiveElementPainter(AbstractElementPainter):
+    def __init__(self):
+        # Контуры корпуса строятся один раз на размер элемента и переиспользуются при каждой отрисовке
+        self._body_paths_cache: dict[tuple, list[QPainterPath]] = {}
+
     @abstractmethod
-    def paint(self, painter: QPainter, rect: QRectF, element, is_selected: bool, game_item) -> None:
+    def build_body_paths(self, rect: QRectF) -> list[QPainterPath]:
         raise NotImplementedError
 
+    def body_paths(self, rect: QRectF) -> list[QPainterPath]:
+        key = (rect.x(), rect.y(), rect.width(), rect.height())
+        paths = self._body_paths_cache.get(key)
+        if paths is None:
+            paths = self._body_paths_cache[key] = self.build_body_paths(rect)
+        return paths
+
+    def paint(self, painter, rect, element, is_selected, game_item):
+        painter.setBrush(SELECTED_BRUSH if is_selected else BODY_BRUSH)
+        painter.setPen(SELECTED_PEN if is_selected else BODY_PEN)
+        for path in self.body_paths(rect):
+            painter.drawPath(path)
+        painter.setPen(Qt.GlobalColor.black)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
+        self.paint_ports(painter, element, game_item)
+
     def create_ports(self, element, game_item) -> list[tuple[int, int, str, int]]:
-        rect = game_item.boundingRect()
+        rect = game_item.body_rect()
 
         total_height = rect.height()
         left_x = rect.left()
@@ -187,25 +198,17 @@ class PrimitiveElementPainter(AbstractElementPainter):
 
 
 class InOutElementPainter(PrimitiveElementPainter):
-    def paint(self, painter, rect, element, is_selected, game_item):
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
-        painter.drawRect(rect)
-        painter.setPen(Qt.GlobalColor.black)
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
-        self.paint_ports(painter, element, game_item)
+    def build_body_paths(self, rect):
+        path = QPainterPath()
+        path.addRect(rect)
+        return [path]
 
 
 class AndElementPainter(PrimitiveElementPainter):
-    def paint(self, painter, rect, element, is_selected, game_item):
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
-
+    def build_body_paths(self, rect):
         left = rect.left()
-        right = rect.right()
         top = rect.top()
         bottom = rect.bottom()
-        center_y = rect.center().y()
         width = rect.width()
         height = rect.height()
         radius = height / 2
@@ -216,25 +219,17 @@ class AndElementPainter(PrimitiveElementPainter):
         path.arcTo(left + width * 0.08 + width / 2 - radius, top, height, height, 90, -180)
         path.lineTo(left + width * 0.08, bottom)
         path.closeSubpath()
-
-        painter.drawPath(path)
-        painter.setPen(Qt.GlobalColor.black)
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
-        self.paint_ports(painter, element, game_item)
+        return [path]
 
 
 class OrElementPainter(PrimitiveElementPainter):
-    def paint(self, painter, rect, element, is_selected, game_item):
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
-
+    def build_body_paths(self, rect):
         left = rect.left()
         right = rect.right()
         top = rect.top()
         bottom = rect.bottom()
         center_y = rect.center().y()
         width = rect.width()
-        height = rect.height()
 
         path = QPainterPath()
         path.moveTo(left, top)
@@ -242,18 +237,11 @@ class OrElementPainter(PrimitiveElementPainter):
         path.quadTo(right - width * 0.2, bottom, right- width * 0.1, center_y)
         path.quadTo(right - width * 0.2, top, left + width * 0.2, top)
         path.closeSubpath()
-
-        painter.drawPath(path)
-        painter.setPen(Qt.GlobalColor.black)
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
-        self.paint_ports(painter, element, game_item)
+        return [path]
 
 
 class NotElementPainter(PrimitiveElementPainter):
-    def paint(self, painter, rect, element, is_selected, game_item):
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
-
+    def build_body_paths(self, rect):
         left = rect.left()
         right = rect.right()
         top = rect.top()
@@ -267,30 +255,22 @@ class NotElementPainter(PrimitiveElementPainter):
         path.lineTo(right - height * 0.2, center_y)
         path.lineTo(left + width * 0.08, bottom)
         path.closeSubpath()
-        painter.drawPath(path)
 
         # Если нужен кружочек
         # circle_radius = rect.height() * 0.1
         # circle_center = QPointF(rect.right() - circle_radius * 2, rect.center().y())
-        # painter.drawEllipse(circle_center, circle_radius, circle_radius)
-
-        painter.setPen(Qt.GlobalColor.black)
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
-        self.paint_ports(painter, element, game_item)
+        # path.addEllipse(circle_center, circle_radius, circle_radius)
+        return [path]
 
 
 class XorElementPainter(PrimitiveElementPainter):
-    def paint(self, painter, rect, element, is_selected, game_item):
-        painter.setBrush(QBrush(QColor(180, 220, 255) if is_selected else QColor(200, 200, 255)))
-        painter.setPen(QPen(Qt.GlobalColor.black, 2 if is_selected else 1))
-
+    def build_body_paths(self, rect):
         left = rect.left()
         right = rect.right()
         top = rect.top()
         bottom = rect.bottom()
         center_y = rect.center().y()
         width = rect.width()
-        height = rect.height()
 
         path = QPainterPath()
         path.moveTo(left + width * 0.15, top)
@@ -307,12 +287,7 @@ class XorElementPainter(PrimitiveElementPainter):
         xor_path.lineTo(left, bottom)
         xor_path.quadTo(left + width * 0.2, center_y, left, top)
         xor_path.closeSubpath()
-
-        painter.drawPath(path)
-        painter.drawPath(xor_path)
-        painter.setPen(Qt.GlobalColor.black)
-        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, element.name)
-        self.paint_ports(painter, element, game_item)
+        return [path, xor_path]
 
 
 painter_registry = {
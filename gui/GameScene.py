@@ -1,18 +1,19 @@
 import math
-from typing import Set
+from typing import Set, Dict, Optional, Iterable, List, Generator
 
 from PyQt6.QtWidgets import (
     QPushButton, QGraphicsScene, QGraphicsItem,
     QCheckBox, QGraphicsProxyWidget, QGraphicsPathItem, QLineEdit, QMessageBox,
     QMenu, QDialog, QFormLayout, QComboBox, QVBoxLayout, QTabWidget, QWidget,
-    QHBoxLayout, QListWidgetItem, QListWidget
+    QHBoxLayout, QListWidgetItem, QListWidget, QStyleOptionGraphicsItem
 )
-from PyQt6.QtGui import QPen, QColor, QTransform, QPainterPath, QIcon, QIntValidator, QCursor
-from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QPen, QColor, QTransform, QPainterPath, QIcon, QIntValidator, QCursor, QPixmap, QPainter
+from PyQt6.QtCore import Qt, QPointF, QRectF
 
-from core.LogicElements import InputElement, ClockGeneratorElement
+from core.LogicElements import LogicElement, InputElement, ClockGeneratorElement
 from core.Grid import Grid
 from gui.LogicElementItem import LogicElementItem
+from gui.QtTimeSource import QtTimeSource
 
 from core.BehaviorModifiersRegistry import (
     get_available_modifier_names,
@@ -21,19 +22,39 @@ from core.BehaviorModifiersRegistry import (
 )
 
 CELL_SIZE = 15
+# Начальный размер поля и запас, на который сцена расширяется за крайними элементами
+MIN_SCENE_RECT = QRectF(0, 0, 1200, 800)
+SCENE_MARGIN = 20 * CELL_SIZE
+# При сильном отдалении точки сетки сливаются в шум — не рисуем их
+GRID_LOD = 0.3
+# Тактов в одной порции прогона: между порциями GUI обрабатывает события, и прогон можно отменить
+RUN_CHUNK_CYCLES = 500
 
 class GameScene(QGraphicsScene):
+    _grid_tile_pixmap = None
+
     def __init__(self, grid: Grid):
         super().__init__()
-        self.setSceneRect(0, 0, 1200, 800)
+        self.setSceneRect(MIN_SCENE_RECT)
         self.grid = grid
         self._parent_ui = None
         self._view = None
         self.selected_port = None
         self.selected_element = None
         self.selected_elements: Set[LogicElementItem] = set()
-        self.connections = []
-        self.draw_grid()
+        # Элемент схемы -> его графический элемент
+        self.element_items: Dict[LogicElement, LogicElementItem] = {}
+        # Провод (источник, выход, приёмник, вход) -> QGraphicsPathItem и провода каждого элемента
+        self.connections: Dict[tuple, QGraphicsPathItem] = {}
+        self._wires_of: Dict[LogicElement, Set[tuple]] = {}
+        self._moved_elements: Set[LogicElement] = set()
+        # Во время пакетной вставки уведомления и подгонка размера сцены откладываются
+        self._batch_insert = False
+        # Генераторы тактов поля этой сцены стоят в одной очереди переключений с общим QTimer;
+        # поле само помечает переключившиеся генераторы, сцене остаётся пересчёт и перерисовка
+        self.time_source = QtTimeSource()
+        self.grid.set_time_source(self.time_source)
+        self.time_source.add_listener(self._on_clock_timeout)
         self.render_elements()
         self.update_connections()
 
@@ -46,12 +67,31 @@ class GameScene(QGraphicsScene):
     def parent(self):
         return self._parent_ui
 
-    def draw_grid(self):
-        dot_pen = QPen(QColor(200, 200, 200))
-        dot_pen.setWidth(2)
-        for x in range(0, int(self.width()), CELL_SIZE):
-            for y in range(0, int(self.height()), CELL_SIZE):
-                self.addEllipse(x, y, 1, 1, dot_pen)
+    @classmethod
+    def _grid_tile(cls) -> QPixmap:
+        """Плитка фона с одной точкой сетки в центре; создаётся один раз на все сцены"""
+        if cls._grid_tile_pixmap is None:
+            tile = QPixmap(CELL_SIZE, CELL_SIZE)
+            tile.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(tile)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            dot_pen = QPen(QColor(200, 200, 200))
+            dot_pen.setWidth(2)
+            painter.setPen(dot_pen)
+            center = CELL_SIZE // 2
+            painter.drawEllipse(QRectF(center, center, 1, 1))
+            painter.end()
+            cls._grid_tile_pixmap = tile
+        return cls._grid_tile_pixmap
+
+    def drawBackground(self, painter: QPainter, rect: QRectF):
+        # Точечная сетка рисуется плиткой прямо в фоне — без элементов сцены и для любого размера поля
+        super().drawBackground(painter, rect)
+        if QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) < GRID_LOD:
+            return
+        center = CELL_SIZE // 2
+        offset = QPointF((rect.left() + center) % CELL_SIZE, (rect.top() + center) % CELL_SIZE)
+        painter.drawTiledPixmap(rect, self._grid_tile(), offset)
 
     def render_elements(self):
         # Удаляем старые визуальные элементы
@@ -60,20 +100,53 @@ class GameScene(QGraphicsScene):
                 self.removeItem(item)
 
         # Добавляем новые
+        items = []
         for element in self.grid.elements:
             x, y = element.position
-            item = LogicElementItem(element, x * CELL_SIZE, y * CELL_SIZE)
-            self.addItem(item)
+            items.append(LogicElementItem(element, x * CELL_SIZE, y * CELL_SIZE))
+        self.add_items(items)
 
     def addItem(self, item: QGraphicsItem):
         super().addItem(item)
-        self.notify_modified()
+        if isinstance(item, LogicElementItem):
+            self.element_items[item.logic_element] = item
+            if not self._batch_insert:
+                self.fit_scene_to(item.sceneBoundingRect())
+        if not self._batch_insert:
+            self.notify_modified()
         if isinstance(item, LogicElementItem) and isinstance(item.logic_element, InputElement):
             self._add_input_switch(item)
         elif isinstance(item, LogicElementItem) and isinstance(item.logic_element, ClockGeneratorElement):
-            item.logic_element.get_timer().timeout.connect(self.update_scene)
             self._add_clock_controls(item)
 
+    def add_items(self, items: List[LogicElementItem]):
+        """Добавляет группу элементов: одно уведомление об изменении и одна подгонка размера сцены"""
+        if not items:
+            return
+        self._batch_insert = True
+        try:
+            for item in items:
+                self.addItem(item)
+        finally:
+            self._batch_insert = False
+
+        bounds = items[0].sceneBoundingRect()
+        for item in items[1:]:
+            bounds = bounds.united(item.sceneBoundingRect())
+        self.fit_scene_to(bounds)
+        self.notify_modified()
+
+    def update(self, *args):
+        # Элементы кэшируют отрисовку — сбрасываем кэш, чтобы показать новые значения и выделение
+        for item in self.element_items.values():
+            item.update()
+        super().update(*args)
+
+    def removeItem(self, item: QGraphicsItem):
+        if isinstance(item, LogicElementItem) and self.element_items.get(item.logic_element) is item:
+            del self.element_items[item.logic_element]
+        super().removeItem(item)
+
     def _add_input_switch(self, item: LogicElementItem):
         button = QCheckBox()
         button.setChecked(item.logic_element.get_output_values()[0] == 1)
@@ -92,6 +165,7 @@ class GameScene(QGraphicsScene):
 
         def _on_toggle():
             item.logic_element.set_value(1 if button.isChecked() else 0)
+            self.grid.mark_changed(item.logic_element)
             self.update_scene()
 
         button.toggled.connect(_on_toggle)
@@ -180,7 +254,7 @@ class GameScene(QGraphicsScene):
             try:
                 val = int(interval_input.text())
                 item.logic_element.interval_ms = val
-                if item.logic_element._timer.isActive():
+                if item.logic_element.is_running():
                     item.logic_element.stop()
                     item.logic_element.start()
             except ValueError:
@@ -200,6 +274,16 @@ class GameScene(QGraphicsScene):
             if isinstance(element, ClockGeneratorElement):
                 element.stop()
 
+    def run_cycles(self, cycles: int) -> Generator[int, None, Optional[int]]:
+        """Прогон cycles тактов в виртуальном времени порциями по RUN_CHUNK_CYCLES (см. Grid.iter_run_cycles)"""
+        return self.grid.iter_run_cycles(cycles, chunk=RUN_CHUNK_CYCLES)
+
+    def run_until_changed(self, element: LogicElement, max_cycles: int) -> Generator[int, None, Optional[int]]:
+        """Прогон до изменения значения element, но не дольше max_cycles тактов (см. Grid.iter_run_until_changed)"""
+        return self.grid.iter_run_until_changed(element, max_cycles, chunk=RUN_CHUNK_CYCLES)
+
+    # Выделение меняет отрисовку только затронутых элементов — перерисовываются только они
+
     def select_item(self, item: LogicElementItem, additive=False):
         if not additive:
             self.clear_selection()
@@ -212,23 +296,26 @@ class GameScene(QGraphicsScene):
             self.selected_elements.remove(item)
             item.is_selected = False
             self.selected_element = None
+        item.update()
 
     def select_all(self):
         self.clear_selection()
-        for item in self.items():
-            if isinstance(item, LogicElementItem):
-                item.is_selected = True
-                self.selected_elements.add(item)
-        self.update()
+        for item in self.element_items.values():
+            item.is_selected = True
+            self.selected_elements.add(item)
+            item.update()
 
     def clear_selection(self):
-        for item in self.selected_elements:
+        deselected = set(self.selected_elements)
+        if self.selected_element is not None:
+            deselected.add(self.selected_element)
+        for item in deselected:
             item.is_selected = False
             item.selected_port_index = None
+            item.update()
         self.selected_elements.clear()
         self.selected_port = None
         self.selected_element = None
-        self.update()
 
     def place_element(self, type, pos):
         x = math.floor(pos.x() / CELL_SIZE) * CELL_SIZE
@@ -250,10 +337,33 @@ class GameScene(QGraphicsScene):
         return source.connect_output(source_idx, target, target_idx)
 
     def delete_element(self, item: LogicElementItem):
-        if item.scene() is self:
-            self.removeItem(item)
-        self.remove_connections_of(item.logic_element)
-        self.grid.remove_element(item.logic_element)
+        self.delete_elements([item])
+
+    def delete_elements(self, items: Iterable[LogicElementItem]):
+        """
+        Удаляет группу элементов за один проход: снимаются их графические элементы и провода,
+        схема обновляется одним пакетом, уведомление об изменении одно
+        """
+        items = list(items)
+        if not items:
+            return
+
+        wires = set()
+        for item in items:
+            element = item.logic_element
+            if item.scene() is self:
+                self.removeItem(item)
+            if isinstance(element, ClockGeneratorElement):
+                element.stop()
+            wires.update(self._wires_of.get(element, ()))
+            self.selected_elements.discard(item)
+
+        # Провода удаляемых элементов — ровно те, что ведут к ним; остальные не трогаем
+        for key in wires:
+            if key in self.connections:
+                self._remove_wire(key)
+
+        self.grid.remove_elements([item.logic_element for item in items])
         self.selected_element = None
         self.notify_modified()
 
@@ -284,7 +394,7 @@ class GameScene(QGraphicsScene):
                     # Повторное нажатие — удаляем соединения
                     if self.selected_element == item and self.selected_port == (port_type, port_index):
                         item.logic_element.disconnect_port(port_type, port_index)
-                        self.update_connections()
+                        self.update_connections([item.logic_element])
                         self.clear_selection()
                         return
                     # Первый порт
@@ -304,7 +414,7 @@ class GameScene(QGraphicsScene):
                                 if prev_type == "output" else (self.selected_element.logic_element, prev_index)
                             )
                             if self.connect_elements(source, source_idx, target, target_idx):
-                                self.update_connections()
+                                self.update_connections([source, target])
                                 self.tick()
                                 self.update()
                         self.clear_selection()
@@ -328,7 +438,7 @@ class GameScene(QGraphicsScene):
         item = self.itemAt(event.scenePos(), QTransform())
         if isinstance(item, LogicElementItem):
             # Получаем координаты в сцене
-            scene_pos = item.scenePos() + QPointF(item.boundingRect().width() / 2, item.boundingRect().height() / 2)
+            scene_pos = item.scenePos() + item.body_rect().center()
 
             # Создаем QLineEdit
             edit = QLineEdit(item.logic_element.name, self._view)
@@ -353,11 +463,6 @@ class GameScene(QGraphicsScene):
 
         super().mouseDoubleClickEvent(event)
 
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.update()
-        super().mouseReleaseEvent(event)
-
     def keyPressEvent(self, event):
         modifiers = event.modifiers()
         key = event.key()
@@ -368,8 +473,7 @@ class GameScene(QGraphicsScene):
             return
         elif modifiers == Qt.KeyboardModifier.ControlModifier and key == Qt.Key.Key_X:
             self.copy_selected()
-            for item in list(self.selected_elements):
-                self.delete_element(item)
+            self.delete_elements(list(self.selected_elements))
             self.update()
             event.accept()
             return
@@ -379,8 +483,7 @@ class GameScene(QGraphicsScene):
             event.accept()
             return
         elif key in (Qt.Key.Key_Backspace, Qt.Key.Key_Delete):
-            for item in list(self.selected_elements):
-                self.delete_element(item)
+            self.delete_elements(list(self.selected_elements))
             self.update()
             event.accept()
             return
@@ -424,13 +527,11 @@ class GameScene(QGraphicsScene):
 
     def cut_selected(self):
         self.copy_selected()
-        for item in list(self.selected_elements):
-            self.delete_element(item)
+        self.delete_elements(list(self.selected_elements))
         self.update()
 
     def delete_selected(self):
-        for item in list(self.selected_elements):
-            self.delete_element(item)
+        self.delete_elements(list(self.selected_elements))
         self.update()
 
     def paste_clipboard(self):
@@ -448,36 +549,40 @@ class GameScene(QGraphicsScene):
 
         mouse_pos = self._view.mapToScene(self._view.mapFromGlobal(QCursor.pos()))
 
+        placements = []
         for data in elements_data:
             orig_element = data['element']
-            new_name = self.grid.generate_unique_name(orig_element.name.split()[0])
             new_element = type(orig_element)()
-            new_element.name = new_name
+            new_element.name = self.grid.generate_unique_name(orig_element.name.split()[0])
 
             offset_pos = data['rel_pos'] + mouse_pos
-            x = int(offset_pos.x()) // CELL_SIZE * CELL_SIZE
-            y = int(offset_pos.y()) // CELL_SIZE * CELL_SIZE
-
-            if self.grid.add_element(new_element, x // CELL_SIZE, y // CELL_SIZE):
-                item = LogicElementItem(new_element, x, y)
-                self.addItem(item)
-                new_items.append(item)
+            x = int(offset_pos.x()) // CELL_SIZE
+            y = int(offset_pos.y()) // CELL_SIZE
+            placements.append((new_element, x, y))
+
+        # Все элементы размещаются в сетке одним пакетом, на сцену добавляются тоже пакетом
+        placed = set(self.grid.add_elements(placements))
+        for data, (new_element, x, y) in zip(elements_data, placements):
+            if new_element in placed:
+                new_items.append(LogicElementItem(new_element, x * CELL_SIZE, y * CELL_SIZE))
                 name_map[data['name']] = new_element
+            else:
+                self.grid.release_name(new_element.name)
+        self.add_items(new_items)
 
         for src_name, src_idx, dst_name, dst_idx in connections:
             src_elem = name_map.get(src_name)
             dst_elem = name_map.get(dst_name)
             if src_elem and dst_elem:
                 try:
-                    src_elem.output_connections[src_idx].append((dst_elem, dst_idx))
-                    dst_elem.input_connections[dst_idx].append((src_elem, src_idx))
+                    src_elem.connect_output(src_idx, dst_elem, dst_idx)
                 except Exception as e:
                     print(f"Ошибка при восстановлении соединения: {e}")
 
         self.clear_selection()
         for item in new_items:
             self.select_item(item, additive=True)
-        self.update_connections()
+        self.update_connections(name_map.values())
 
     def notify_modified(self):
         if self._parent_ui:
@@ -492,61 +597,151 @@ class GameScene(QGraphicsScene):
 
     def remove_connections_of(self, element):
         element.disconnect_all()
-        self.update_connections()
+        self.update_connections([element])
+
+    def _on_clock_timeout(self, clocks: List[ClockGeneratorElement]):
+        # Генераторы, переключившиеся в один момент, дают одно вычисление схемы
+        self.update_scene()
 
-    def tick(self):
+    def tick(self) -> Optional[Set[LogicElement]]:
         if self.grid:
-            input_values = {
-                inp: inp.value()
-                for inp in self.grid.get_input_elements()
-            }
-            self.grid.compute_outputs(input_values)
+            return self.grid.step()
+        return None
 
     def update_scene(self):
-        self.tick()
-        self.update()
+        changed = self.tick()
+        if changed is None:
+            self.update()  # цикл не стабилизировался — перерисовываем всё
+            if self._parent_ui:
+                self._parent_ui.notify_scene_unstable(self)
+            return
+        self.refresh_elements(changed)
 
-    def update_connections(self):
-        for conn in self.connections:
-            self.removeItem(conn)
-        self.connections.clear()
+    def refresh_elements(self, elements: Iterable[LogicElement]):
+        """
+        Перерисовывает только графические элементы с изменившимися выходами
+        и их приёмники (у них на входных портах подписаны значения)
+        """
+        dirty = set()
+        for element in elements:
+            item = self.element_items.get(element)
+            if item is None:
+                continue  # внутренние элементы раскрытых пользовательских элементов
+            dirty.add(item)
+            for output_conns in element.output_connections:
+                for target, _ in output_conns:
+                    target_item = self.element_items.get(target)
+                    if target_item is not None:
+                        dirty.add(target_item)
+        for item in dirty:
+            item.update()
+
+    def _port_point(self, item: LogicElementItem, port_type: str, port_index: int) -> Optional[QPointF]:
+        for x, y, p_type, p_index in item.ports:
+            if p_type == port_type and p_index == port_index:
+                return item.mapToScene(QPointF(x, y))
+        return None
+
+    def _route(self, key) -> Optional[QPainterPath]:
+        """Ортогональный путь провода (источник, выход, приёмник, вход) или None, если элемента нет на сцене"""
+        source, output_index, target, input_index = key
+        source_item = self.element_items.get(source)
+        target_item = self.element_items.get(target)
+        if source_item is None or target_item is None:
+            return None
+
+        source_point = self._port_point(source_item, 'output', output_index)
+        target_point = self._port_point(target_item, 'input', input_index)
+        if source_point is None or target_point is None:
+            return None  # защита от ошибок
+
+        x1, y1 = source_point.x(), source_point.y()
+        x2, y2 = target_point.x(), target_point.y()
+        path = QPainterPath(QPointF(x1, y1))
+        mid_x = (x1 + x2) / 2
+        path.lineTo(mid_x, y1)
+        path.lineTo(mid_x, y2)
+        path.lineTo(x2, y2)
+        return path
 
-        for element_item in self.items():
-            if not isinstance(element_item, LogicElementItem):
+    @staticmethod
+    def _connection_keys_of(element) -> Set[tuple]:
+        keys = set()
+        for output_index, output_conns in enumerate(element.output_connections):
+            for target, target_port in output_conns:
+                keys.add((element, output_index, target, target_port))
+        for input_index, input_conns in enumerate(element.input_connections):
+            for source, source_port in input_conns:
+                keys.add((source, source_port, element, input_index))
+        return keys
+
+    def _remove_wire(self, key):
+        path_item = self.connections.pop(key)
+        self.removeItem(path_item)
+        for element in (key[0], key[2]):
+            wires = self._wires_of.get(element)
+            if wires is not None:
+                wires.discard(key)
+                if not wires:
+                    del self._wires_of[element]
+
+    def update_connections(self, elements: Optional[Iterable] = None):
+        """
+        Синхронизирует провода на сцене со схемой.
+        Если передан elements — пересматриваются только провода этих элементов:
+        устаревшие удаляются, новые создаются, существующие перестраиваются.
+        """
+        if elements is None:
+            elements = list(self.element_items)
+            stale = set(self.connections)
+        else:
+            elements = list(elements)
+            stale = set().union(*(self._wires_of.get(e, ()) for e in elements))
+
+        current = set().union(*(self._connection_keys_of(e) for e in elements))
+        for key in stale - current:
+            self._remove_wire(key)
+
+        created = False
+        for key in current:
+            path = self._route(key)
+            path_item = self.connections.get(key)
+            if path is None:
+                if path_item is not None:
+                    self._remove_wire(key)
+                continue
+            if path_item is not None:
+                path_item.setPath(path)
                 continue
 
-            for output_index, output_conns in enumerate(element_item.logic_element.output_connections):
-                for target, target_port in output_conns:
-                    for other_item in self.items():
-                        if isinstance(other_item, LogicElementItem) and other_item.logic_element == target:
-                            # Получаем координаты выходного порта по индексу
-                            source_port = next(
-                                (x for x in element_item.ports if x[2] == 'output' and x[3] == output_index), None
-                            )
-                            target_port_info = next(
-                                (x for x in other_item.ports if x[2] == 'input' and x[3] == target_port), None
-                            )
+            path_item = QGraphicsPathItem(path)
+            path_item.setPen(QPen(Qt.GlobalColor.black, 2))
+            self.connections[key] = path_item
+            self._wires_of.setdefault(key[0], set()).add(key)
+            self._wires_of.setdefault(key[2], set()).add(key)
+            super().addItem(path_item)  # без уведомления на каждый провод
+            created = True
 
-                            if source_port is None or target_port_info is None:
-                                continue  # защита от ошибок
+        if created:
+            self.notify_modified()
 
-                            # Локальные координаты в координаты сцены
-                            source_point = element_item.mapToScene(QPointF(source_port[0], source_port[1]))
-                            target_point = other_item.mapToScene(QPointF(target_port_info[0], target_port_info[1]))
-                            x1, y1 = source_point.x(), source_point.y()
-                            x2, y2 = target_point.x(), target_point.y()
+    def mark_moved(self, element):
+        self._moved_elements.add(element)
+        x, y = element.position
+        self.fit_scene_to(QRectF(x * CELL_SIZE, y * CELL_SIZE, element.width * CELL_SIZE, element.height * CELL_SIZE))
 
-                            # Построение ортогонального пути
-                            path = QPainterPath(QPointF(x1, y1))
-                            mid_x = (x1 + x2) / 2
-                            path.lineTo(mid_x, y1)
-                            path.lineTo(mid_x, y2)
-                            path.lineTo(x2, y2)
+    def fit_scene_to(self, rect: QRectF):
+        """Расширяет сцену вправо и вниз так, чтобы rect помещался с запасом SCENE_MARGIN"""
+        current = self.sceneRect()
+        grown = current.united(QRectF(0, 0, rect.right() + SCENE_MARGIN, rect.bottom() + SCENE_MARGIN))
+        if grown != current:
+            self.setSceneRect(grown)
 
-                            path_item = QGraphicsPathItem(path)
-                            path_item.setPen(QPen(Qt.GlobalColor.black, 2))
-                            self.connections.append(path_item)
-                            self.addItem(path_item)
+    def update_moved_connections(self):
+        """Перестраивает только провода элементов, сдвинутых с прошлого вызова"""
+        moved, self._moved_elements = self._moved_elements, set()
+        if moved:
+            self.update_connections(moved)
 
 
 class EditElementInstanceDialog(QDialog):
@@ -659,7 +854,7 @@ class EditElementInstanceDialog(QDialog):
         if editor is None:
             return
 
-        self.logic_element.modifiers.append(new_mod)
+        self.logic_element.add_modifier(new_mod)
         self._modifier_editors[new_mod] = editor
         self._modifier_list.addItem(name)
 
@@ -668,7 +863,8 @@ class EditElementInstanceDialog(QDialog):
         if index < 0:
             return
 
-        mod = self.logic_element.modifiers.pop(index)
+        mod = self.logic_element.modifiers[index]
+        self.logic_element.remove_modifier(mod)
         self._modifier_editors.pop(mod, None)
         self._modifier_list.takeItem(index)
         self._on_modifier_selected(-1)
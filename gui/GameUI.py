@@ -1,23 +1,27 @@
-import json
 import os
 
 from typing import Tuple, List, Optional
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QPushButton, QGraphicsView, QHBoxLayout,
                              QLabel, QVBoxLayout, QFrame, QMessageBox, QInputDialog, QTabWidget,
-                             QHeaderView, QGroupBox)
+                             QHeaderView, QGroupBox, QSpinBox, QDockWidget)
 from PyQt6.QtGui import QPainter, QIcon, QShortcut, QKeySequence
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 from core import USER_ELEMENTS_DIR, InputElement, OutputElement
 from core.Grid import Grid
 from core.Level import Level
 from core.CustomElementFactory import CustomElementFactory
+from core.GridFileFormat import write_grid_file
 
 from gui.GameScene import GameScene
 from gui.GameView import GameView
 from gui.TruthTableView import TruthTableView
 from gui.ToolboxExplorer import ToolboxExplorer
+from gui.WaveformView import WaveformPanel
+
+# Сколько элементов незатухающего цикла перечислять в строке состояния
+UNSTABLE_NAMES_SHOWN = 5
 
 
 class GameUI(QMainWindow):
@@ -124,6 +128,49 @@ class GameUI(QMainWindow):
         simulation_layout.addWidget(self.start_simulation_button)
         simulation_layout.addWidget(self.stop_simulation_button)
 
+        # Быстрый прогон в виртуальном времени, без ожидания таймеров
+        self.run_cycles_spin = QSpinBox()
+        self.run_cycles_spin.setRange(1, 1_000_000)
+        self.run_cycles_spin.setValue(1000)
+        self.run_cycles_spin.setSuffix(" тактов")
+
+        self.run_cycles_button = QPushButton("Прогнать")
+        self.run_cycles_button.setIcon(QIcon.fromTheme("media-seek-forward"))
+        self.run_cycles_button.clicked.connect(self._handle_run_cycles)
+
+        self.run_until_button = QPushButton("До изменения выхода")
+        self.run_until_button.clicked.connect(self._handle_run_until_changed)
+
+        self.run_cancel_button = QPushButton("Отмена")
+        self.run_cancel_button.setEnabled(False)
+        self.run_cancel_button.clicked.connect(self._cancel_run)
+
+        self.run_status_label = QLabel()
+
+        simulation_layout.addWidget(self.run_cycles_spin)
+        simulation_layout.addWidget(self.run_cycles_button)
+        simulation_layout.addWidget(self.run_until_button)
+        simulation_layout.addWidget(self.run_cancel_button)
+        simulation_layout.addWidget(self.run_status_label)
+
+        # Прогон идёт порциями по таймеру, чтобы окно не замирало: (сцена, генератор прогона, обработчик результата)
+        self._run = None
+        self._run_timer = QTimer(self)
+        self._run_timer.timeout.connect(self._continue_run)
+
+        # Панель осциллограмм снизу окна, по умолчанию скрыта
+        self.waveform_panel = WaveformPanel(self)
+        self.waveform_dock = QDockWidget("Осциллограмма", self)
+        self.waveform_dock.setWidget(self.waveform_panel)
+        self.waveform_dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.waveform_dock)
+        self.waveform_dock.hide()
+
+        self.waveform_button = QPushButton("Осциллограмма")
+        self.waveform_button.clicked.connect(
+            lambda: self.waveform_dock.setVisible(not self.waveform_dock.isVisible()))
+        simulation_layout.addWidget(self.waveform_button)
+
         side_panel.addWidget(simulation_group)
 
         # Таблица истинности (если вкладка - уровень)
@@ -371,6 +418,8 @@ class GameUI(QMainWindow):
             elif reply == QMessageBox.StandardButton.Save:
                 self.save_custom_element()
 
+        if self._run is not None and self._run[0] is metadata.get("scene"):
+            self._cancel_run()
         self.tab_metadata.pop(index, None)
         self.tab_widget.removeTab(index)
 
@@ -385,6 +434,74 @@ class GameUI(QMainWindow):
         self.scene.stop_simulation()
         self.start_simulation_button.setEnabled(True)
 
+    def _start_run(self, scene, run, on_finish):
+        self._run = (scene, run, on_finish)
+        self.run_cycles_button.setEnabled(False)
+        self.run_until_button.setEnabled(False)
+        self.run_cancel_button.setEnabled(True)
+        self._run_timer.start(0)
+
+    def _continue_run(self):
+        scene, run, on_finish = self._run
+        try:
+            done = next(run)
+        except StopIteration as stop:
+            self._finish_run()
+            on_finish(stop.value)
+            return
+        scene.update()
+        self.run_status_label.setText(f"Пройдено тактов: {done}…")
+
+    def _cancel_run(self):
+        if self._run is not None:
+            self._run[1].close()
+            self._finish_run()
+            self.run_status_label.setText("Прогон отменён")
+
+    def _finish_run(self):
+        scene = self._run[0]
+        self._run = None
+        self._run_timer.stop()
+        scene.update()
+        self.run_cycles_button.setEnabled(True)
+        self.run_until_button.setEnabled(True)
+        self.run_cancel_button.setEnabled(False)
+
+    def _handle_run_cycles(self):
+        scene = self._get_active_scene() or self.scene
+
+        def on_finish(result):
+            if result is None:
+                self.run_status_label.setText(self._unstable_message(scene))
+            elif result == 0:
+                self.run_status_label.setText("На поле нет генераторов тактов")
+            else:
+                self.run_status_label.setText(f"Пройдено тактов: {result}")
+
+        self._start_run(scene, scene.run_cycles(self.run_cycles_spin.value()), on_finish)
+
+    def _handle_run_until_changed(self):
+        scene = self._get_active_scene() or self.scene
+        outputs = scene.grid.get_output_elements()
+        if not outputs:
+            QMessageBox.information(self, "Нет выходов", "На поле нет выходов.")
+            return
+
+        name, ok = QInputDialog.getItem(self, "До изменения выхода", "Выход:", [o.name for o in outputs], 0, False)
+        if not ok:
+            return
+        output = next(o for o in outputs if o.name == name)
+
+        max_cycles = self.run_cycles_spin.value()
+
+        def on_finish(result):
+            if result is None:
+                self.run_status_label.setText(f"{name} не изменился за {max_cycles} тактов")
+            else:
+                self.run_status_label.setText(f"{name} изменился на такте {result}")
+
+        self._start_run(scene, scene.run_until_changed(output, max_cycles), on_finish)
+
     def create_new_custom_element(self):
         name, ok = QInputDialog.getText(self, "Новый элемент", "Введите название элемента:")
         if not ok or not name.strip():
@@ -408,6 +525,18 @@ class GameUI(QMainWindow):
                 self.tab_widget.setTabText(index, f'*{tab_name}')
             self.tab_metadata[index]["modified"] = True
 
+    def notify_scene_unstable(self, scene):
+        self.run_status_label.setText(self._unstable_message(scene))
+
+    @staticmethod
+    def _unstable_message(scene) -> str:
+        """Сообщение о незатухающем цикле с иерархическими именами его элементов"""
+        names = scene.grid.get_unstable_names()
+        if not names:
+            return "Схема не стабилизировалась"
+        shown = ", ".join(names[:UNSTABLE_NAMES_SHOWN]) + ("…" if len(names) > UNSTABLE_NAMES_SHOWN else "")
+        return f"Схема не стабилизировалась: {shown}"
+
     def notify_scene_modified(self, scene):
         for index, meta in self.tab_metadata.items():
             if meta["scene"] == scene:
@@ -446,8 +575,7 @@ class GameUI(QMainWindow):
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(grid_dict, f, indent=2)
+            write_grid_file(filepath, grid_dict)
 
             new_class = CustomElementFactory.make_custom_element_class(name, grid_dict)
             new_class._is_custom = True
@@ -1,10 +1,14 @@
-from PyQt6.QtWidgets import QGraphicsItem
-from PyQt6.QtGui import QPainter
+from PyQt6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt6.QtGui import QPainter, QPen, QPainterPath
 from PyQt6.QtCore import QRectF, QPointF, Qt
 
-from gui.ElementRenderStrategy import get_render_strategy_for
+from gui.ElementRenderStrategy import get_render_strategy_for, BODY_BRUSH, SELECTED_BRUSH
 
 CELL_SIZE = 15
+# Ниже этого масштаба элемент рисуется упрощённо: только корпус, без портов и подписей
+DETAIL_LOD = 0.5
+# Запас вокруг корпуса под подписи значений портов
+LABEL_MARGIN = 2 * CELL_SIZE
 
 class LogicElementItem(QGraphicsItem):
     def __init__(self, logic_element, x, y):
@@ -20,6 +24,9 @@ class LogicElementItem(QGraphicsItem):
             QGraphicsItem.GraphicsItemFlag.ItemIsSelectable |
             QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges
         )
+        # Отрисовка кэшируется в пикселях устройства: панорамирование не перерисовывает элементы.
+        # Сцена сбрасывает кэш через update(), когда меняются значения или выделение
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
@@ -34,6 +41,7 @@ class LogicElementItem(QGraphicsItem):
             if self.scene() and hasattr(self.scene(), "parent") and self.scene().parent():
                 success = self.scene().grid.move_element(self.logic_element, snapped_x, snapped_y)
                 if success:
+                    self.scene().mark_moved(self.logic_element)
                     return snapped_pos
                 else:
                     # Вернуть старую позицию
@@ -45,22 +53,39 @@ class LogicElementItem(QGraphicsItem):
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
-            if self.scene() and hasattr(self.scene(), "update_connections"):
-                self.scene().update_connections()
+            if self.scene() and hasattr(self.scene(), "update_moved_connections"):
+                self.scene().update_moved_connections()
             if self.scene() and hasattr(self.scene(), 'notify_modified'):
                 self.scene().notify_modified()
         super().mouseReleaseEvent(event)
 
-    def boundingRect(self) -> QRectF:
+    def body_rect(self) -> QRectF:
+        """Корпус элемента: по нему раскладываются порты и работает выбор мышью"""
         w = self.logic_element.width
         h = self.logic_element.height
         return QRectF(0, 0, w * CELL_SIZE, h * CELL_SIZE)
 
+    def boundingRect(self) -> QRectF:
+        # Значения портов подписываются снаружи корпуса; кэш отрисовки обрезает всё за boundingRect
+        return self.body_rect().adjusted(-LABEL_MARGIN, -LABEL_MARGIN / 4, LABEL_MARGIN, LABEL_MARGIN / 4)
+
+    def shape(self) -> QPainterPath:
+        path = QPainterPath()
+        path.addRect(self.body_rect())
+        return path
+
     def create_ports(self):
         return self.render_strategy.create_ports(self.logic_element, self)
 
     def paint(self, painter: QPainter, option, widget):
-        rect = self.boundingRect()
+        rect = self.body_rect()
         is_selected = self in self.scene().selected_elements
-        painter_strategy = get_render_strategy_for(self.logic_element)
-        painter_strategy.paint(painter, rect, self.logic_element, is_selected, self)
+
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < DETAIL_LOD:
+            painter.setBrush(SELECTED_BRUSH if is_selected else BODY_BRUSH)
+            painter.setPen(QPen(Qt.GlobalColor.black, 0))
+            painter.drawRect(rect)
+            return
+
+        self.render_strategy.paint(painter, rect, self.logic_element, is_selected, self)
@@ -0,0 +1,56 @@
+from PyQt6.QtCore import QTimer, QElapsedTimer, Qt
+
+from core.ClockScheduler import ClockScheduler
+from core.TimeSource import TimeSource
+
+# Сколько отставших моментов переключения обработать за один вызов таймера, прежде чем вернуть управление Qt
+MAX_CATCH_UP = 100
+
+
+class QtTimeSource(TimeSource):
+    """
+    Источник времени для GUI: все генераторы сцены стоят в одной очереди ClockScheduler,
+    а один QTimer срабатывает к ближайшему переключению
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._scheduler = ClockScheduler()
+        self._elapsed = QElapsedTimer()
+        self._elapsed.start()
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def now_ms(self) -> int:
+        return self._elapsed.elapsed()
+
+    def start(self, clock, interval_ms: int) -> None:
+        self._scheduler.add(clock, interval_ms, self.now_ms())
+        self._schedule_timer()
+
+    def stop(self, clock) -> None:
+        self._scheduler.remove(clock)
+        self._schedule_timer()
+
+    def is_active(self, clock) -> bool:
+        return clock in self._scheduler
+
+    def _schedule_timer(self) -> None:
+        due = self._scheduler.next_due()
+        if due is None:
+            self._timer.stop()
+        else:
+            self._timer.start(max(0, due - self.now_ms()))
+
+    def _on_timeout(self) -> None:
+        # Если таймер опоздал, пропущенные моменты обрабатываются по порядку, каждый — отдельной пачкой
+        now = self.now_ms()
+        for _ in range(MAX_CATCH_UP):
+            due = self._scheduler.next_due()
+            if due is None or due > now:
+                break
+            _, clocks = self._scheduler.pop_due()
+            self._fire(clocks)
+        self._schedule_timer()
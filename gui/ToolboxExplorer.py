@@ -1,5 +1,4 @@
 import os
-import json
 import shutil
 from collections import defaultdict
 
@@ -9,6 +8,7 @@ from PyQt6.QtCore import Qt, QPoint
 from core import USER_ELEMENTS_DIR
 from core.Grid import Grid
 from core.CustomElementFactory import CustomElementFactory
+from core.GridFileFormat import GRID_FILE_EXTENSIONS, BINARY_EXTENSION, read_grid_file, convert_grid_file
 
 
 class ToolboxExplorer(QTreeWidget):
@@ -99,17 +99,16 @@ class ToolboxExplorer(QTreeWidget):
                 folder_item = QTreeWidgetItem(parent_item, [entry])
                 folder_item.setData(0, Qt.ItemDataRole.UserRole, {"type": "folder", "path": full_path})
                 self._load_user_elements_recursive(full_path, folder_item)
-            elif entry.endswith(".json"):
-                with open(full_path, encoding="utf-8") as f:
-                    try:
-                        data = json.load(f)
-                        cls = CustomElementFactory.make_custom_element_class(entry[:-5], data)
-                        cls._is_custom = True  # <-- обязательно!
-                        item = QTreeWidgetItem(parent_item, [cls.__name__])
-                        item.setData(0, Qt.ItemDataRole.UserRole, cls)
-                        item.setData(1, Qt.ItemDataRole.UserRole, {"path": full_path})
-                    except Exception:
-                        continue
+            elif entry.endswith(GRID_FILE_EXTENSIONS):
+                try:
+                    data = read_grid_file(full_path)
+                    cls = CustomElementFactory.make_custom_element_class(os.path.splitext(entry)[0], data)
+                    cls._is_custom = True  # <-- обязательно!
+                    item = QTreeWidgetItem(parent_item, [cls.__name__])
+                    item.setData(0, Qt.ItemDataRole.UserRole, cls)
+                    item.setData(1, Qt.ItemDataRole.UserRole, {"path": full_path})
+                except Exception:
+                    continue
 
     def handle_item_clicked(self, item: QTreeWidgetItem, _column: int):
         element_class = item.data(0, Qt.ItemDataRole.UserRole)
@@ -126,12 +125,19 @@ class ToolboxExplorer(QTreeWidget):
 
         if isinstance(element_data, type):  # логический элемент
             edit_action = menu.addAction("Редактировать")
+            convert_action = None
+            path_data = item.data(1, Qt.ItemDataRole.UserRole)
+            if path_data:
+                is_binary = path_data["path"].endswith(BINARY_EXTENSION)
+                convert_action = menu.addAction("Сохранять в JSON" if is_binary else "Сохранять в двоичном формате")
             delete_action = menu.addAction("Удалить")
             action = menu.exec(self.viewport().mapToGlobal(position))
             if action == delete_action:
                 self._handle_delete_element(item)
             elif action == edit_action:
                 self._handle_edit_element(item)
+            elif convert_action is not None and action == convert_action:
+                self._handle_convert_element(item)
         elif isinstance(element_data, dict) and element_data.get("type") == "folder":
             create_file = menu.addAction("Создать элемент")
             create_folder = menu.addAction("Создать папку")
@@ -200,15 +206,31 @@ class ToolboxExplorer(QTreeWidget):
         element_name = item.text(0)
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                grid = Grid()
-                grid.load_from_dict(data)
-                self.game_ui.add_new_scene_tab(f"Редакт: {element_name}", grid,
-                                               element_name=element_name, save_path=path)
+            data = read_grid_file(path)
+            grid = Grid()
+            grid.load_from_dict(data)
+            self.game_ui.add_new_scene_tab(f"Редакт: {element_name}", grid,
+                                           element_name=element_name, save_path=path)
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить элемент: {e}")
 
+    def _handle_convert_element(self, item: QTreeWidgetItem):
+        path = item.data(1, Qt.ItemDataRole.UserRole)["path"]
+        try:
+            new_path = convert_grid_file(path)
+        except FileExistsError:
+            QMessageBox.warning(self, "Ошибка", "Файл элемента в другом формате уже существует.")
+            return
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось преобразовать элемент: {e}")
+            return
+
+        # Открытые на редактирование вкладки сохраняются уже в новый файл
+        for metadata in self.game_ui.tab_metadata.values():
+            if metadata.get("save_path") == path:
+                metadata["save_path"] = new_path
+        self.reload()
+
     def _handle_delete_element(self, item: QTreeWidgetItem):
         path_data = item.data(1, Qt.ItemDataRole.UserRole)
         if not path_data:
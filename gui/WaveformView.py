@@ -0,0 +1,189 @@
+from typing import Optional
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QMessageBox, QSpinBox
+from PyQt6.QtGui import QPainter, QPen, QColor, QPainterPath
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF
+
+from core.LogicElements import OutputElement
+from core.WaveformRecorder import WaveformRecorder
+
+ROW_HEIGHT = 28
+NAME_WIDTH = 120
+TRACE_PEN = QPen(QColor(20, 110, 40), 2)
+GRID_PEN = QPen(QColor(225, 225, 225), 1)
+# Период обновления панели, пока она видна
+REFRESH_MS = 100
+
+
+class WaveformView(QWidget):
+    """Осциллограммы сигналов записывающего устройства: последние window миллисекунд времени поля"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.recorder: Optional[WaveformRecorder] = None
+        self.window = 5000
+        # Текущее время поля: осциллограмма доводится до него, даже если с последнего шага ничего не менялось
+        self.now = 0
+        self.setMinimumHeight(ROW_HEIGHT * 2)
+
+    def set_recorder(self, recorder: Optional[WaveformRecorder]):
+        self.recorder = recorder
+        self.setMinimumHeight(ROW_HEIGHT * max(2, len(recorder.traces) if recorder else 0))
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.white)
+        if self.recorder is None or not self.recorder.traces:
+            painter.setPen(Qt.GlobalColor.gray)
+            painter.drawText(QRectF(self.rect()), Qt.AlignmentFlag.AlignCenter,
+                             "Выберите элементы на поле и нажмите «Записывать выбранные»")
+            return
+
+        end = max(self.now, self.recorder.now)
+        start = max(0, end - self.window)
+        plot_width = max(1, self.width() - NAME_WIDTH - 10)
+        scale = plot_width / max(1, end - start)
+
+        def x_of(time):
+            return NAME_WIDTH + (time - start) * scale
+
+        for row, trace in enumerate(self.recorder.traces):
+            top = row * ROW_HEIGHT
+            high, low = top + 6, top + ROW_HEIGHT - 6
+
+            painter.setPen(GRID_PEN)
+            painter.drawLine(QPointF(0, top + ROW_HEIGHT), QPointF(self.width(), top + ROW_HEIGHT))
+            painter.setPen(Qt.GlobalColor.black)
+            painter.drawText(QRectF(4, top, NAME_WIDTH - 8, ROW_HEIGHT),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, trace.name)
+
+            # Ступенчатая линия по изменениям, попавшим в окно; значение до окна берётся из последнего изменения перед ним
+            path = QPainterPath()
+            value = None
+            for time, new_value in trace.changes():
+                if time <= start:
+                    value = new_value
+                    continue
+                if value is None:
+                    path.moveTo(x_of(time), low if new_value == 0 else high)
+                else:
+                    if path.elementCount() == 0:
+                        path.moveTo(x_of(start), low if value == 0 else high)
+                    path.lineTo(x_of(time), low if value == 0 else high)
+                    path.lineTo(x_of(time), low if new_value == 0 else high)
+                value = new_value
+            if value is not None:
+                if path.elementCount() == 0:
+                    path.moveTo(x_of(start), low if value == 0 else high)
+                path.lineTo(x_of(end), low if value == 0 else high)
+
+            painter.setPen(TRACE_PEN)
+            painter.drawPath(path)
+
+
+class WaveformPanel(QWidget):
+    """Панель осциллограмм активной вкладки: выбор сигналов, окно просмотра и экспорт в VCD"""
+
+    def __init__(self, game_ui):
+        super().__init__()
+        self.game_ui = game_ui
+        self.view = WaveformView()
+
+        watch_button = QPushButton("Записывать выбранные")
+        watch_button.clicked.connect(self._watch_selected)
+        clear_button = QPushButton("Очистить")
+        clear_button.clicked.connect(self._clear)
+        export_button = QPushButton("Экспорт VCD")
+        export_button.clicked.connect(self._export_vcd)
+        stop_button = QPushButton("Остановить запись")
+        stop_button.clicked.connect(self._stop_recording)
+
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(10, 3_600_000)
+        self.window_spin.setSingleStep(500)
+        self.window_spin.setValue(self.view.window)
+        self.window_spin.setSuffix(" мс")
+        self.window_spin.valueChanged.connect(self._set_window)
+
+        buttons = QHBoxLayout()
+        for widget in (watch_button, stop_button, clear_button, export_button, self.window_spin):
+            buttons.addWidget(widget)
+        buttons.addStretch()
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(self.view)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self._refresh)
+
+    def showEvent(self, event):
+        self._refresh_timer.start(REFRESH_MS)
+        self._refresh()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._refresh_timer.stop()
+        super().hideEvent(event)
+
+    def _active_grid(self):
+        scene = self.game_ui._get_active_scene() or self.game_ui.scene
+        return scene.grid if scene else None
+
+    def _refresh(self):
+        grid = self._active_grid()
+        recorder = grid.recorder if grid else None
+        if recorder is not None:
+            self.view.now = grid.now_ms()
+        if recorder is not self.view.recorder or (recorder and len(recorder.traces) * ROW_HEIGHT > self.view.minimumHeight()):
+            self.view.set_recorder(recorder)
+        else:
+            self.view.update()
+
+    def _set_window(self, value: int):
+        self.view.window = value
+        self.view.update()
+
+    def _watch_selected(self):
+        scene = self.game_ui._get_active_scene() or self.game_ui.scene
+        items = sorted(scene.selected_elements, key=lambda item: (item.y(), item.x()))
+        if not items:
+            QMessageBox.information(self, "Осциллограмма", "Выберите элементы на поле.")
+            return
+
+        grid = scene.grid
+        if grid.recorder is None:
+            grid.set_recorder(WaveformRecorder())
+        for item in items:
+            element = item.logic_element
+            if isinstance(element, OutputElement):
+                grid.recorder.watch(element)
+            for port in range(element.num_outputs):
+                grid.recorder.watch(element, port)
+        self._refresh()
+
+    def _stop_recording(self):
+        grid = self._active_grid()
+        if grid is not None:
+            grid.set_recorder(None)
+        self._refresh()
+
+    def _clear(self):
+        grid = self._active_grid()
+        if grid is not None and grid.recorder is not None:
+            grid.recorder.clear()
+        self._refresh()
+
+    def _export_vcd(self):
+        grid = self._active_grid()
+        if grid is None or grid.recorder is None or not grid.recorder.traces:
+            QMessageBox.information(self, "Экспорт VCD", "Нет записанных сигналов.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт VCD", "waveform.vcd", "Value Change Dump (*.vcd)")
+        if not path:
+            return
+        try:
+            grid.recorder.export_vcd(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Экспорт VCD", f"Не удалось сохранить файл: {e}")
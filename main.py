@@ -1,10 +1,14 @@
 from PyQt6.QtWidgets import QApplication
+from core.CustomElementFactory import CustomElementFactory
+from core.TruthTableCache import TruthTableCache
 from gui.MainWindow import MainWindow
 
 
 def main() -> None:
     import sys
     app = QApplication(sys.argv)
+    # Таблицы истинности пользовательских элементов сохраняются между запусками
+    CustomElementFactory.truth_table_cache = TruthTableCache()
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
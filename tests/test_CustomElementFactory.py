@@ -1,5 +1,6 @@
 import pytest
 from core import CustomElementFactory, Grid, InputElement, OutputElement
+from core.CustomElementFactory import GridTemplate
 from math import ceil
 
 @pytest.fixture
@@ -32,9 +33,168 @@ def test_custom_element_compute_outputs(test_grid_dict):
     instance = CustomClass()
 
     instance.get_input_value = lambda i: 1
-    for e in instance._subgrid.elements:
-        if isinstance(e, OutputElement):
-            e.get_input_value = lambda i: 1
+    instance.compute_outputs()
+    assert instance.output_values == [1]
+
+def test_template_is_parsed_once(test_grid_dict):
+    CustomClass = CustomElementFactory.make_custom_element_class("Shared", test_grid_dict)
+    template = CustomClass.template
+    assert template.input_indices == [0]
+    assert template.output_indices == [1]
+    assert template.connections == [(0, 0, 1, 0)]
+
+    first, second = CustomClass(), CustomClass()
+    assert first._subgrid.elements[0] is not second._subgrid.elements[0]
+
+    # Состояние у каждого экземпляра своё
+    first.get_input_value = lambda i: 1
+    first.compute_outputs()
+    second.compute_outputs()
+    assert first.output_values == [1]
+    assert second.output_values == [0]
+
+def test_template_skips_unknown_elements(test_grid_dict):
+    data = {
+        "elements": [{"type": "Unknown", "name": "X"}] + test_grid_dict["elements"],
+        "connections": [{"source": (1, 0), "target": (2, 0)}]
+    }
+    instance = CustomElementFactory.make_custom_element_class("WithUnknown", data)()
+    inp, out = instance._subgrid.elements
+    assert inp.output_connections[0] == [(out, 0)]
+
+def test_grid_load_does_not_build_template_prototype(test_grid_dict):
+    template = GridTemplate(test_grid_dict)
+    grid = Grid()
+    grid.load_from_template(template)
+    assert "_port_map" not in template.__dict__  # карта портов строится только по требованию
+    assert template.input_names == ["Input"]
+    assert template.output_indices == [1]
+
+def _xor_grid_dict(extra_inputs=0):
+    from core.LogicElements import XorElement
+    grid = Grid()
+    a, b, gate, out = InputElement(), InputElement(), XorElement(), OutputElement()
+    grid.add_elements([(a, 0, 0), (b, 0, 5), (gate, 10, 0), (out, 20, 0)])
+    grid.add_elements([(InputElement(), 0, 10 + 5 * i) for i in range(extra_inputs)])
+    a.connect_output(0, gate, 0)
+    b.connect_output(0, gate, 1)
+    gate.connect_output(0, out, 0)
+    return grid.to_dict()
+
+def test_combinational_element_uses_truth_table():
+    Xor = CustomElementFactory.make_custom_element_class("XorTable", _xor_grid_dict())
+    assert Xor.truth_table == [(0,), (1,), (1,), (0,)]
+
+    instance = Xor()
+    instance.get_input_value = lambda i: 1 - i
+    instance.compute_outputs()
+    assert instance.output_values == [1]
+    assert instance.compute_bitwise([0b0011, 0b0101], 0b1111) == [0b0110]
+
+def test_compute_bitwise_matches_table_rows():
+    import random
+    Xor = CustomElementFactory.make_custom_element_class("XorWide", _xor_grid_dict(extra_inputs=1))
+    instance = Xor()
+    rng = random.Random(1)
+    mask = (1 << 64) - 1
+    inputs = [rng.getrandbits(64) for _ in range(instance.num_inputs)]
+    inputs[2] = 0  # одна из строк таблицы не встречается ни в одном бите
+
+    outputs = instance.compute_bitwise(inputs, mask)
+    for bit in range(64):
+        row = 0
+        for value in inputs:
+            row = (row << 1) | ((value >> bit) & 1)
+        assert tuple((out >> bit) & 1 for out in outputs) == Xor.truth_table[row]
+
+def test_truth_table_only_for_narrow_combinational_elements(monkeypatch):
+    monkeypatch.setattr(CustomElementFactory, "TRUTH_TABLE_MAX_INPUTS", 3)
+    assert CustomElementFactory.make_custom_element_class("Wide", _xor_grid_dict(extra_inputs=2)).truth_table is None
+    assert CustomElementFactory.make_custom_element_class("Narrow", _xor_grid_dict(extra_inputs=1)).truth_table is not None
 
+    from core.LogicElements import DTriggerElement, OrElement
+    grid = Grid()
+    d, trigger, out = InputElement(), DTriggerElement(), OutputElement()
+    grid.add_elements([(d, 0, 0), (trigger, 10, 0), (out, 20, 0)])
+    d.connect_output(0, trigger, 0)
+    trigger.connect_output(0, out, 0)
+    assert CustomElementFactory.make_custom_element_class("Sync", grid.to_dict()).truth_table is None
+
+    # Комбинаторный цикл не вычисляется побитово — элемент остаётся на подсхеме
+    grid = Grid()
+    inp, gate, out = InputElement(), OrElement(), OutputElement()
+    grid.add_elements([(inp, 0, 0), (gate, 10, 0), (out, 20, 0)])
+    inp.connect_output(0, gate, 0)
+    gate.connect_output(0, gate, 1)
+    gate.connect_output(0, out, 0)
+    Loop = CustomElementFactory.make_custom_element_class("Loop", grid.to_dict())
+    assert Loop.truth_table is None
+    instance = Loop()
+    instance.get_input_value = lambda i: 1
+    instance.compute_outputs()
+    assert instance.output_values == [1]
+
+def test_truth_table_reused_from_disk_cache(tmp_path, monkeypatch):
+    from core.TruthTableCache import TruthTableCache
+    monkeypatch.setattr(CustomElementFactory, "truth_table_cache", TruthTableCache(str(tmp_path)))
+    data = _xor_grid_dict()
+    CustomElementFactory.make_custom_element_class("XorTable", data)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # Подсхема больше не вычисляется: таблица берётся из кэша
+    from core.Netlist import Netlist
+    monkeypatch.setattr(Netlist, "evaluate_bitwise", lambda *args: pytest.fail("таблица построена заново"))
+    assert CustomElementFactory.make_custom_element_class("XorTable", data).truth_table == [(0,), (1,), (1,), (0,)]
+
+def test_no_truth_table_for_elements_with_clocks():
+    from core.LogicElements import AndElement, ClockGeneratorElement
+    grid = Grid()
+    inp, clock, gate, out = InputElement(), ClockGeneratorElement(), AndElement(), OutputElement()
+    grid.add_elements([(inp, 0, 0), (clock, 0, 10), (gate, 10, 0), (out, 20, 0)])
+    inp.connect_output(0, gate, 0)
+    clock.connect_output(0, gate, 1)
+    gate.connect_output(0, out, 0)
+    Gated = CustomElementFactory.make_custom_element_class("Gated", grid.to_dict())
+    assert Gated.truth_table is None
+
+    # Генератор во вложенной схеме тоже не должен застыть в таблице внешнего элемента
+    outer = Grid()
+    a, gated, q = InputElement(), Gated(), OutputElement()
+    outer.add_elements([(a, 0, 0), (gated, 10, 0), (q, 30, 0)])
+    a.connect_output(0, gated, 0)
+    gated.connect_output(0, q, 0)
+    outer_data = outer.to_dict()
+    outer_data["elements"][1]["subgrid"] = grid.to_dict()
+    assert CustomElementFactory.make_custom_element_class("Wrapper", outer_data).truth_table is None
+
+    instance = Gated()
+    instance.get_input_value = lambda i: 1
+    instance.get_subgrid().elements[1].toggle()
     instance.compute_outputs()
-    assert instance.output_values == [1]
\ No newline at end of file
+    assert instance.output_values == [1]
+
+def test_disk_cache_key_follows_nested_registry_elements(tmp_path, monkeypatch):
+    from core.LogicElementRegistry import ELEMENTS_REGISTRY
+    from core.LogicElements import AndElement
+    from core.TruthTableCache import TruthTableCache
+    monkeypatch.setattr(CustomElementFactory, "truth_table_cache", TruthTableCache(str(tmp_path)))
+
+    def outer_grid_dict():
+        grid = Grid()
+        a, b, inner, out = InputElement(), InputElement(), ELEMENTS_REGISTRY["Inner"](), OutputElement()
+        grid.add_elements([(a, 0, 0), (b, 0, 5), (inner, 10, 0), (out, 30, 0)])
+        a.connect_output(0, inner, 0)
+        b.connect_output(0, inner, 1)
+        inner.connect_output(0, out, 0)
+        return grid.to_dict()
+
+    monkeypatch.setitem(ELEMENTS_REGISTRY, "Inner", CustomElementFactory.make_custom_element_class("Inner", _xor_grid_dict()))
+    outer_data = outer_grid_dict()
+    assert "subgrid" not in outer_data["elements"][2]  # вложенный элемент берётся из реестра по имени
+    assert CustomElementFactory.make_custom_element_class("Outer", outer_data).truth_table == [(0,), (1,), (1,), (0,)]
+
+    # Тот же Outer поверх переопределённого Inner не должен получить таблицу старой версии из кэша
+    and_data = _xor_grid_dict()
+    and_data["elements"][2]["type"] = AndElement.__name__
+    monkeypatch.setitem(ELEMENTS_REGISTRY, "Inner", CustomElementFactory.make_custom_element_class("Inner", and_data))
+    assert CustomElementFactory.make_custom_element_class("Outer", outer_data).truth_table == [(0,), (0,), (0,), (1,)]
@@ -1,5 +1,6 @@
 import pytest
 from core import Grid, InputElement, OutputElement, AndElement, Level
+from core.LogicElements import OrElement, XorElement, NotElement, DTriggerElement
 
 @pytest.fixture
 def grid():
@@ -120,4 +121,302 @@ def test_auto_test_failure(grid):
     grid.set_level(level)
 
     errors = grid.auto_test()
-    assert errors is not None
\ No newline at end of file
+    assert errors is not None
+
+def _half_adder_grid(grid, carry_gate):
+    a, b = InputElement(), InputElement()
+    s, c = OutputElement(), OutputElement()
+    a.name, b.name, s.name, c.name = "A", "B", "S", "C"
+    xor_gate = XorElement()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(xor_gate, 10, 0)
+    grid.add_element(carry_gate, 10, 5)
+    grid.add_element(s, 20, 0)
+    grid.add_element(c, 20, 5)
+    for gate in (xor_gate, carry_gate):
+        a.connect_output(0, gate, 0)
+        b.connect_output(0, gate, 1)
+    xor_gate.connect_output(0, s, 0)
+    carry_gate.connect_output(0, c, 0)
+
+    truth_table = {(0, 0): (0, 0), (0, 1): (1, 0), (1, 0): (1, 0), (1, 1): (0, 1)}
+    grid.set_level(Level(truth_table, ["A", "B"], ["S", "C"]))
+
+def test_auto_test_bitwise_success(grid):
+    _half_adder_grid(grid, AndElement())
+    assert grid.get_netlist().is_bitwise_supported()
+    assert grid.auto_test() == []
+
+def test_auto_test_bitwise_matches_simulation(grid):
+    _half_adder_grid(grid, OrElement())  # ошибка: перенос через ИЛИ
+    errors = grid.auto_test()
+    assert errors == [((0, 1), (1, 0), (1, 1)), ((1, 0), (1, 0), (1, 1))]
+
+    grid._auto_test_bitwise = lambda inputs, outputs: None
+    assert grid.auto_test() == errors
+
+def test_auto_test_bitwise_skips_sequential(grid):
+    _half_adder_grid(grid, AndElement())
+    grid.add_element(DTriggerElement(), 30, 0)
+    assert not grid.get_netlist().is_bitwise_supported()
+    assert grid._auto_test_bitwise(grid.get_input_elements(), grid.get_output_elements()) is None
+
+def test_step_propagates_only_fanout(grid):
+    calls = []
+
+    class SpyNot(NotElement):
+        def compute_outputs(self):
+            calls.append(self)
+            super().compute_outputs()
+
+    a, b = InputElement(), InputElement()
+    gate_a, gate_b = SpyNot(), SpyNot()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(gate_a, 10, 0)
+    grid.add_element(gate_b, 10, 5)
+    a.connect_output(0, gate_a, 0)
+    b.connect_output(0, gate_b, 0)
+
+    assert grid.step() == set(grid.elements)  # первый шаг — полный пересчёт
+
+    calls.clear()
+    a.set_value(1)
+    grid.mark_changed(a)
+    assert grid.step() == {a, gate_a}
+    assert gate_a.output_values == [0]
+    assert calls == [gate_a]
+
+def test_step_ticks_sync_elements(grid):
+    d, clk = InputElement(), InputElement()
+    flip_flop, out = DTriggerElement(), OutputElement()
+    grid.add_element(d, 0, 0)
+    grid.add_element(clk, 0, 5)
+    grid.add_element(flip_flop, 10, 0)
+    grid.add_element(out, 20, 0)
+    d.connect_output(0, flip_flop, 0)
+    clk.connect_output(0, flip_flop, 1)
+    flip_flop.connect_output(0, out, 0)
+    grid.step()
+
+    d.set_value(1)
+    clk.set_value(1)
+    grid.mark_changed(d)
+    grid.mark_changed(clk)
+    assert flip_flop in grid.step()
+    assert flip_flop.output_values == [1, 0]
+
+    # Выход триггера доходит до комбинаторной части на следующем шаге, как и при полном пересчёте
+    assert out in grid.step()
+    assert out.value == 1
+    assert grid.step() == set()
+
+def test_spatial_index_follows_elements(grid):
+    gate = AndElement()
+    grid.add_element(gate, 2, 2)
+    assert grid.get_element_at(2 + gate.width - 1, 2 + gate.height - 1) is gate
+    assert grid.get_element_at(2 + gate.width, 2) is None
+    assert len(grid.get_occupied_cells()) == gate.width * gate.height
+
+    assert grid.move_element(gate, 20, 20)
+    assert grid.get_element_at(2, 2) is None
+    assert grid.get_element_at(20, 20) is gate
+
+    # Перемещение внахлёст с собственной старой позицией допустимо
+    assert grid.move_element(gate, 21, 20)
+
+    grid.remove_element(gate)
+    assert grid.get_occupied_cells() == set()
+    assert grid.move_element(gate, 0, 0) is False
+    assert grid.bucket_index == {}
+
+def test_spatial_index_across_bucket_boundaries(grid):
+    size = Grid.BUCKET_SIZE
+    wide = AndElement()
+    assert grid.add_element(wide, size - 2, -2)  # задевает четыре квадрата индекса
+    assert grid.get_element_at(size + wide.width - 3, wide.height - 3) is wide
+    assert grid.get_element_at(size - 3, 0) is None
+
+    # Пересечение ищется по прямоугольникам, а не по общему квадрату индекса
+    assert not grid.add_element(AndElement(), size + 1, 0)
+    assert grid.add_element(AndElement(), size - 2 + wide.width, 0)
+
+def test_add_elements_batch(grid):
+    first, second, overlapping = AndElement(), AndElement(), AndElement()
+    version = grid._elements_version
+    placed = grid.add_elements([(first, 0, 0), (second, 10, 0), (overlapping, 1, 1)])
+
+    assert placed == [first, second]
+    assert grid.elements == [first, second]
+    assert overlapping.position is None  # пересекается с элементом из того же пакета
+    assert grid._elements_version == version + 1
+
+def test_generate_unique_name_reuses_released(grid):
+    names = [grid.generate_unique_name("And") for _ in range(4)]
+    assert names == ["And", "And 1", "And 2", "And 3"]
+    grid.release_name("And 1")
+    assert grid.generate_unique_name("And") == "And 1"
+    assert grid.generate_unique_name("And") == "And 4"
+
+def test_remove_elements_batch(grid):
+    a = grid.create_element(InputElement)
+    gate, out = AndElement(), OutputElement()
+    grid.add_elements([(a, 0, 0), (gate, 10, 0), (out, 20, 0)])
+    a.connect_output(0, gate, 0)
+    gate.connect_output(0, out, 0)
+    version = grid._elements_version
+
+    removed = grid.remove_elements([a, gate, InputElement()])
+
+    assert removed == [a, gate]
+    assert grid.elements == [out]
+    assert grid._elements_version == version + 1
+    assert out.input_connections[0] == []
+    assert grid.get_element_at(10, 0) is None
+    assert a.name not in grid.existing_names
+
+def test_run_cycles_in_virtual_time(grid):
+    from core.LogicElements import ClockGeneratorElement
+    fast, slow = ClockGeneratorElement(interval_ms=10), ClockGeneratorElement(interval_ms=25)
+    out = OutputElement()
+    grid.add_elements([(fast, 0, 0), (slow, 0, 10), (out, 20, 0)])
+    fast.connect_output(0, out, 0)
+    original_source = slow.time_source
+    slow.start()
+
+    steps = []
+    assert grid.run_cycles(5, stop_when=lambda changed: steps.append(changed) and False) == 5
+    # за 100 мс быстрый генератор переключается 10 раз, медленный — 4, из них 2 одновременно с быстрым
+    assert len(steps) == 10 + 4 - 2
+    assert slow.time_source is original_source and slow.is_running()
+    assert not fast.is_running()
+    slow.stop()
+
+def test_run_cycles_in_chunks_can_be_cancelled(grid):
+    from core.LogicElements import ClockGeneratorElement
+    clock, out = ClockGeneratorElement(interval_ms=10), OutputElement()
+    grid.add_elements([(clock, 0, 0), (out, 20, 0)])
+    clock.connect_output(0, out, 0)
+    source = grid.time_source
+
+    run = grid.iter_run_cycles(10, chunk=4)
+    assert list(run) == [4, 8]
+    assert grid.now_ms() == 200 and grid.time_source is source
+
+    run = grid.iter_run_cycles(1000, chunk=4)
+    assert next(run) == 4
+    assert clock.time_source is not source
+    run.close()
+    # Прерванный прогон возвращает генераторы в источник поля остановленными
+    assert clock.time_source is source and not clock.is_running()
+    assert grid.now_ms() == 200 + 80
+
+def test_run_until_changed(grid):
+    from core.LogicElements import ClockGeneratorElement
+    clock, data, latch, out = ClockGeneratorElement(interval_ms=5), InputElement(), DTriggerElement(), OutputElement()
+    grid.add_elements([(clock, 0, 0), (data, 0, 10), (latch, 20, 0), (out, 40, 0)])
+    clock.connect_output(0, latch, 1)
+    data.connect_output(0, latch, 0)
+    latch.connect_output(0, out, 0)
+
+    assert grid.run_until_changed(out, 10) is None
+    data.set_value(1)
+    grid.mark_changed(data)
+    assert grid.run_until_changed(out, 10) == 1
+    assert out.value == 1
+
+def test_auto_test_sequential_level_with_clock(grid):
+    from core.Level import SequentialLevel
+    from core.LogicElements import ClockGeneratorElement
+    sequences = [[((1,), (1,)), ((0,), (0,)), ((1,), (1,))], [((0,), (0,)), ((0,), (None,))]]
+    grid.set_level(SequentialLevel({}, ["D"], ["Q"], sequences))
+
+    clock, d, latch, q = ClockGeneratorElement(), InputElement(), DTriggerElement(), OutputElement()
+    d.name, q.name = "D", "Q"
+    grid.add_elements([(clock, 0, 0), (d, 0, 10), (latch, 20, 0), (q, 40, 0)])
+    clock.connect_output(0, latch, 1)
+    d.connect_output(0, latch, 0)
+    latch.connect_output(0, q, 0)
+
+    assert grid.auto_test() == []
+    # Состояние поля после проверки не меняется
+    assert latch.state == 0 and q.value == 0 and d.value() == 0
+
+    latch.disconnect_port("output", 0)
+    latch.connect_output(1, q, 0)  # Q̅ вместо Q
+    assert grid.auto_test() == [((1,), (1,), (0,)), ((0,), (0,), (1,))]
+
+@pytest.mark.parametrize("event_driven", [True, False])
+def test_sr_level_graded_by_sequences(grid, event_driven):
+    from core.LevelFactory import LevelFactory
+    grid.use_event_driven = event_driven
+    grid.set_level(LevelFactory._make_level_10())
+    s, r, q = InputElement(), InputElement(), OutputElement()
+    s.name, r.name, q.name = "S", "R", "Q"
+    or_q, not_q, or_qb, not_qb = OrElement(), NotElement(), OrElement(), NotElement()
+    grid.add_elements([(s, 0, 0), (r, 0, 10), (or_q, 10, 0), (not_q, 20, 0),
+                       (or_qb, 10, 10), (not_qb, 20, 10), (q, 30, 0)])
+    # Защёлка на ИЛИ-НЕ: Q = not(R or Q̅), Q̅ = not(S or Q)
+    r.connect_output(0, or_q, 0)
+    not_qb.connect_output(0, or_q, 1)
+    or_q.connect_output(0, not_q, 0)
+    s.connect_output(0, or_qb, 0)
+    not_q.connect_output(0, or_qb, 1)
+    or_qb.connect_output(0, not_qb, 0)
+    not_q.connect_output(0, q, 0)
+
+    assert grid.auto_test() == []
+
+def test_sequential_cycle_settles_flip_flop_outputs(grid):
+    from core.Level import SequentialLevel
+    sequences = [[((1, 1), (1,)), ((0, 0), (1,)), ((0, 1), (0,))]]
+    grid.set_level(SequentialLevel({}, ["D", "C"], ["Q"], sequences))
+
+    d, c, latch, q = InputElement(), InputElement(), DTriggerElement(), OutputElement()
+    d.name, c.name, q.name = "D", "C", "Q"
+    grid.add_elements([(d, 0, 0), (c, 0, 10), (latch, 20, 0), (q, 40, 0)])
+    d.connect_output(0, latch, 0)
+    c.connect_output(0, latch, 1)
+    latch.connect_output(0, q, 0)
+    # Новое состояние триггера видно на выходе в том же такте
+    assert grid.auto_test() == []
+
+    # Триггер, переключающий сам себя при C = 1, не успокаивается
+    d.disconnect_port("output", 0)
+    latch.connect_output(1, latch, 0)
+    assert grid.auto_test() == [((1, 1), (1,), ("Cycle",))]
+
+def test_auto_test_restores_nested_state(grid):
+    from core import CustomElementFactory
+    from core.Level import SequentialLevel
+    from core.LogicElements import ClockGeneratorElement
+    inner = Grid()
+    d, c, latch, q = InputElement(), InputElement(), DTriggerElement(), OutputElement()
+    inner.add_elements([(d, 0, 0), (c, 0, 10), (latch, 20, 0), (q, 40, 0)])
+    d.connect_output(0, latch, 0)
+    c.connect_output(0, latch, 1)
+    latch.connect_output(0, q, 0)
+    Register = CustomElementFactory.make_custom_element_class("Register", inner.to_dict())
+
+    # Вторая последовательность проходит, только если начинается с исходного состояния
+    sequences = [[((1, 1), (1,))], [((0, 0), (0,))]]
+    grid.set_level(SequentialLevel({}, ["D", "C"], ["Q"], sequences))
+    d, c, register, q, clock = InputElement(), InputElement(), Register(), OutputElement(), ClockGeneratorElement()
+    d.name, c.name, q.name = "D", "C", "Q"
+    grid.add_elements([(d, 0, 0), (c, 0, 10), (register, 20, 0), (q, 40, 0), (clock, 0, 20)])
+    d.connect_output(0, register, 0)
+    c.connect_output(0, register, 1)
+    register.connect_output(0, q, 0)
+    grid.step()
+
+    def board_state():
+        return {e: (list(e.output_values), list(e.next_output_values), getattr(e, "state", None),
+                    getattr(e, "_state", None), getattr(e, "value", None))
+                for e in Grid._iter_simulated_elements(grid.elements)}
+
+    before = board_state()
+    assert grid.auto_test() == []
+    assert board_state() == before
+    grid.step()
+    assert q.value == 0
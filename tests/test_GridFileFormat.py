@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from core import Grid, InputElement, OutputElement, AndElement
+from core.LogicElements import ClockGeneratorElement
+from core.GridFileFormat import BinaryGridFormat, read_grid_file, write_grid_file, convert_grid_file
+
+@pytest.fixture
+def grid_dict():
+    grid = Grid()
+    a = grid.create_element(InputElement)
+    b = grid.create_element(InputElement)
+    gate = grid.create_element(AndElement)
+    out = grid.create_element(OutputElement)
+    clock = grid.create_element(ClockGeneratorElement)
+    grid.add_elements([(a, 0, 0), (b, 0, 4), (gate, 10, 0), (out, 20, 0), (clock, 0, 10)])
+    grid.connect_elements(a, 0, gate, 0)
+    grid.connect_elements(b, 0, gate, 1)
+    grid.connect_elements(gate, 0, out, 0)
+    return grid.to_dict()
+
+def test_binary_round_trip_matches_json(grid_dict):
+    data = BinaryGridFormat.loads(BinaryGridFormat.dumps(grid_dict))
+    assert data == json.loads(json.dumps(grid_dict))
+
+def test_binary_round_trip_nested_and_irregular_fields(grid_dict):
+    grid_dict["elements"][2]["subgrid"] = json.loads(json.dumps(grid_dict))
+    grid_dict["elements"][0]["position"] = None
+    grid_dict["elements"][1]["name"] = 42  # не строка — уходит в раздел прочих полей
+    grid_dict["version"] = {"scale": 1.5, "flags": [True, False, None], "имя": "схема"}
+
+    data = BinaryGridFormat.loads(BinaryGridFormat.dumps(grid_dict))
+    assert data == json.loads(json.dumps(grid_dict))
+
+def test_binary_rejects_damaged_data(grid_dict):
+    encoded = BinaryGridFormat.dumps(grid_dict)
+    with pytest.raises(ValueError):
+        BinaryGridFormat.loads(b"JSON" + encoded[4:])
+    with pytest.raises(ValueError):
+        BinaryGridFormat.loads(encoded[:-1])
+
+@pytest.mark.parametrize("extension", [".json", ".qgb"])
+def test_grid_file_loads_into_grid(tmp_path, grid_dict, extension):
+    path = str(tmp_path / f"scheme{extension}")
+    write_grid_file(path, grid_dict)
+
+    grid = Grid()
+    grid.load_from_dict(read_grid_file(path))
+    assert [e.name for e in grid.elements] == [e["name"] for e in grid_dict["elements"]]
+    assert grid.to_dict()["connections"] == grid_dict["connections"]
+
+def test_convert_grid_file_both_ways(tmp_path, grid_dict):
+    path = str(tmp_path / "scheme.json")
+    write_grid_file(path, grid_dict)
+
+    binary_path = convert_grid_file(path)
+    assert binary_path == str(tmp_path / "scheme.qgb")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["scheme.qgb"]
+    assert read_grid_file(binary_path) == json.loads(json.dumps(grid_dict))
+
+    assert convert_grid_file(binary_path) == path
+    write_grid_file(binary_path, grid_dict)
+    with pytest.raises(FileExistsError):
+        convert_grid_file(path)
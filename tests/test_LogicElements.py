@@ -74,3 +74,29 @@ def test_not_element():
     a.set_value(1)
     not_gate.compute_outputs()
     assert not_gate.get_output_values()[0] == 0
+
+def test_primitives_keep_attributes_in_slots():
+    for element in (InputElement(), OutputElement(), AndElement(), NotElement(), DTriggerElement()):
+        assert not hasattr(element, "__dict__")
+    assert InputElement().category == "Вход-Выход"
+
+def test_duplicate_connection_rejected():
+    a, gate = InputElement(), AndElement()
+    assert a.connect_output(0, gate, 0) is True
+    assert a.connect_output(0, gate, 0) is False
+    assert a.output_connections[0] == [(gate, 0)]
+
+def test_disconnect_keeps_other_connections_in_order():
+    a, b, c, gate = InputElement(), InputElement(), InputElement(), OrElement()
+    for source in (a, b, c):
+        source.connect_output(0, gate, 0)
+    b.disconnect_port("output", 0)
+    assert gate.input_connections[0] == [(a, 0), (c, 0)]
+    assert b.output_connections[0] == []
+
+def test_constructor_schema_cached_per_class():
+    schema = ClockGeneratorElement.constructor_schema()
+    assert schema is ClockGeneratorElement.constructor_schema()
+    assert [name for name, _ in schema] == ["interval_ms"]
+    assert ClockGeneratorElement.constructor_kwargs({"interval_ms": 250}) == {"interval_ms": 250}
+    assert ClockGeneratorElement(interval_ms=250).to_dict()["interval_ms"] == 250
@@ -0,0 +1,253 @@
+import itertools
+
+import pytest
+from core import Grid, InputElement, OutputElement, AndElement, OrElement, NotElement, Level, CustomElementFactory
+from core.LogicElements import XorElement
+from core.Netlist import Netlist
+
+@pytest.fixture
+def grid():
+    return Grid()
+
+@pytest.fixture
+def no_truth_tables(monkeypatch):
+    # Раскрываются только пользовательские элементы без таблицы истинности
+    monkeypatch.setattr(CustomElementFactory, "TRUTH_TABLE_MAX_INPUTS", -1)
+
+def _not_chain(grid, length):
+    inp = InputElement()
+    grid.add_element(inp, 0, 0)
+    prev = inp
+    gates = []
+    for i in range(length):
+        gate = NotElement()
+        grid.add_element(gate, 10 + i * 6, 0)
+        prev.connect_output(0, gate, 0)
+        gates.append(gate)
+        prev = gate
+    out = OutputElement()
+    grid.add_element(out, 10 + length * 6, 0)
+    prev.connect_output(0, out, 0)
+    # Перемешиваем порядок, чтобы итеративному циклу понадобилось много проходов
+    grid.elements.reverse()
+    return inp, out
+
+def test_schedule_is_topological(grid):
+    inp, out = _not_chain(grid, 5)
+    order = [group[0] for group, _ in grid.get_netlist().schedule]
+    assert order.index(inp) < order.index(out)
+    assert all(not is_cycle for _, is_cycle in grid.get_netlist().schedule)
+
+def test_deep_chain_stabilizes_in_one_pass(grid):
+    inp, out = _not_chain(grid, 25)
+    assert grid.compute_outputs({inp: 0}) == {out: 1}
+    assert grid.compute_outputs({inp: 1}) == {out: 0}
+
+    grid.use_levelized_engine = False
+    assert grid.compute_outputs({inp: 0}) is None  # итеративному циклу не хватает 10 проходов
+
+def test_netlist_is_rebuilt_on_connection_change(grid):
+    a, b = InputElement(), InputElement()
+    gate, out = AndElement(), OutputElement()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(gate, 10, 0)
+    grid.add_element(out, 20, 0)
+    a.connect_output(0, gate, 0)
+    b.connect_output(0, gate, 1)
+
+    netlist = grid.get_netlist()
+    assert grid.get_netlist() is netlist
+
+    gate.connect_output(0, out, 0)
+    assert grid.get_netlist() is not netlist
+    assert grid.compute_outputs({a: 1, b: 1}) == {out: 1}
+
+def test_connections_on_other_grid_keep_netlist(grid):
+    inp, out = InputElement(), OutputElement()
+    grid.add_elements([(inp, 0, 0), (out, 20, 0)])
+    inp.connect_output(0, out, 0)
+    netlist = grid.get_netlist()
+
+    other = Grid()
+    source, target = InputElement(), OutputElement()
+    other.add_elements([(source, 0, 0), (target, 20, 0)])
+    source.connect_output(0, target, 0)
+    NotElement().connect_output(0, OutputElement(), 0)  # и вне всякого поля
+    assert grid.get_netlist() is netlist
+
+    out.modifiers = []
+    assert grid.get_netlist() is not netlist
+
+def test_cycle_falls_back_to_iterations(grid):
+    inp, gate, out = InputElement(), OrElement(), OutputElement()
+    grid.add_element(inp, 0, 0)
+    grid.add_element(gate, 10, 0)
+    grid.add_element(out, 20, 0)
+    inp.connect_output(0, gate, 0)
+    gate.connect_output(0, gate, 1)  # защёлка на ИЛИ
+    gate.connect_output(0, out, 0)
+
+    schedule = grid.get_netlist().schedule
+    assert [is_cycle for group, is_cycle in schedule if gate in group] == [True]
+
+    assert grid.compute_outputs({inp: 1}) == {out: 1}
+    assert grid.compute_outputs({inp: 0}) == {out: 1}
+
+def test_unstable_cycle_returns_none(grid):
+    gate = NotElement()
+    grid.add_element(gate, 0, 0)
+    gate.connect_output(0, gate, 0)
+    assert Netlist(grid.elements).evaluate() is False
+    assert grid.compute_outputs({}) is None
+
+def _half_adder_dict():
+    grid = Grid()
+    a, b = InputElement(), InputElement()
+    s, c = OutputElement(), OutputElement()
+    a.name, b.name, s.name, c.name = "A", "B", "S", "C"
+    xor_gate, and_gate = XorElement(), AndElement()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(s, 30, 0)
+    grid.add_element(c, 30, 5)
+    grid.add_element(xor_gate, 10, 0)
+    grid.add_element(and_gate, 10, 5)
+    for gate in (xor_gate, and_gate):
+        a.connect_output(0, gate, 0)
+        b.connect_output(0, gate, 1)
+    xor_gate.connect_output(0, s, 0)
+    and_gate.connect_output(0, c, 0)
+    return grid.to_dict()
+
+def _board_with_custom(grid, custom_class):
+    a, b = InputElement(), InputElement()
+    s, c = OutputElement(), OutputElement()
+    a.name, b.name, s.name, c.name = "A", "B", "S", "C"
+    adder = custom_class()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(adder, 10, 0)
+    grid.add_element(s, 30, 0)
+    grid.add_element(c, 30, 5)
+    a.connect_output(0, adder, 0)
+    b.connect_output(0, adder, 1)
+    adder.connect_output(0, s, 0)
+    adder.connect_output(1, c, 0)
+    return a, b, adder, s, c
+
+def test_flatten_custom_element(grid, no_truth_tables):
+    HalfAdder = CustomElementFactory.make_custom_element_class("HalfAdder", _half_adder_dict())
+    a, b, adder, s, c = _board_with_custom(grid, HalfAdder)
+
+    netlist = grid.get_netlist()
+    assert adder in netlist.collectors
+    assert all(not is_cycle for _, is_cycle in netlist.schedule)
+    names = set(netlist.hierarchical_names.values())
+    assert {"HalfAdder/A", "HalfAdder/Xor", "HalfAdder/And"} <= names
+
+    for va, vb in itertools.product([0, 1], repeat=2):
+        assert grid.compute_outputs({a: va, b: vb}) == {s: va ^ vb, c: va & vb}
+        assert adder.output_values == [va ^ vb, va & vb]
+
+def test_flatten_matches_hierarchical_evaluation(grid, no_truth_tables):
+    HalfAdder = CustomElementFactory.make_custom_element_class("HalfAdder", _half_adder_dict())
+    a, b, adder, s, c = _board_with_custom(grid, HalfAdder)
+    flat = [grid.compute_outputs({a: va, b: vb}) for va, vb in itertools.product([0, 1], repeat=2)]
+
+    grid.flatten_custom_elements = False
+    assert adder not in grid.get_netlist().collectors
+    nested = [grid.compute_outputs({a: va, b: vb}) for va, vb in itertools.product([0, 1], repeat=2)]
+    assert flat == nested
+
+def test_flatten_nested_custom_elements(grid, no_truth_tables):
+    inner_data = _half_adder_dict()
+    outer = Grid()
+    a, b, adder, s, c = _board_with_custom(outer, CustomElementFactory.make_custom_element_class("HalfAdder", inner_data))
+    outer_data = outer.to_dict()
+    outer_data["elements"][2]["subgrid"] = inner_data
+
+    Wrapper = CustomElementFactory.make_custom_element_class("Wrapper", outer_data)
+    a, b, wrapper, s, c = _board_with_custom(grid, Wrapper)
+
+    netlist = grid.get_netlist()
+    assert "Wrapper/HalfAdder/Xor" in netlist.hierarchical_names.values()
+    assert len(netlist.collectors) == 2
+    assert grid.compute_outputs({a: 1, b: 1}) == {s: 0, c: 1}
+
+def test_unstable_cycle_reported_by_hierarchical_names(grid):
+    ring = Grid()
+    inp, gate, out = InputElement(), XorElement(), OutputElement()
+    ring.add_elements([(inp, 0, 0), (gate, 10, 0), (out, 20, 0)])
+    inp.connect_output(0, gate, 0)
+    gate.connect_output(0, gate, 1)  # при входе 1 элемент переключает сам себя
+    gate.connect_output(0, out, 0)
+    Ring = CustomElementFactory.make_custom_element_class("Ring", ring.to_dict())
+
+    a, ring, q = InputElement(), Ring(), OutputElement()
+    ring.name = "Ring 1"
+    grid.add_elements([(a, 0, 0), (ring, 10, 0), (q, 30, 0)])
+    a.connect_output(0, ring, 0)
+    ring.connect_output(0, q, 0)
+    assert grid.step() is not None and grid.get_unstable_names() == []
+
+    a.set_value(1)
+    grid.mark_changed(a)
+    assert grid.step() is None
+    assert grid.get_unstable_names() == ["Ring 1/Xor"]
+
+def test_flatten_enables_bitwise_auto_test(grid, no_truth_tables):
+    HalfAdder = CustomElementFactory.make_custom_element_class("HalfAdder", _half_adder_dict())
+    _board_with_custom(grid, HalfAdder)
+    truth_table = {(0, 0): (0, 0), (0, 1): (1, 0), (1, 0): (1, 0), (1, 1): (0, 1)}
+    grid.set_level(Level(truth_table, ["A", "B"], ["S", "C"]))
+
+    assert grid.get_netlist().is_bitwise_supported()
+    assert grid.auto_test() == []
+
+def test_tabled_custom_element_is_single_node(grid):
+    HalfAdder = CustomElementFactory.make_custom_element_class("HalfAdder", _half_adder_dict())
+    a, b, adder, s, c = _board_with_custom(grid, HalfAdder)
+
+    netlist = grid.get_netlist()
+    assert adder in netlist.nodes and not netlist.collectors
+    assert adder not in netlist.always_active
+    for va, vb in itertools.product([0, 1], repeat=2):
+        assert grid.compute_outputs({a: va, b: vb}) == {s: va ^ vb, c: va & vb}
+
+    truth_table = {(0, 0): (0, 0), (0, 1): (1, 0), (1, 0): (1, 0), (1, 1): (0, 1)}
+    grid.set_level(Level(truth_table, ["A", "B"], ["S", "C"]))
+    assert netlist.is_bitwise_supported()
+    assert grid.auto_test() == []
+
+def test_fanin_tables_use_slots(grid):
+    a, b = InputElement(), InputElement()
+    gate, out = AndElement(), OutputElement()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(gate, 10, 0)
+    grid.add_element(out, 20, 0)
+    a.connect_output(0, gate, 0)
+    b.connect_output(0, gate, 1)
+
+    netlist = grid.get_netlist()
+    assert netlist.fanin_slots[gate] == [(netlist.slot_of[a],), (netlist.slot_of[b],)]
+    assert netlist.fanin_slots[out] == [(0,)]  # неподключённый порт читает константный ноль
+
+    assert grid.compute_outputs({a: 1, b: 1}) == {out: 0}
+    assert netlist.values[netlist.slot_of[gate]] == 1
+    assert gate.output_values == [1]
+
+def test_fanin_multiple_sources_are_wired_or(grid):
+    a, b = InputElement(), InputElement()
+    gate, out = NotElement(), OutputElement()
+    grid.add_element(a, 0, 0)
+    grid.add_element(b, 0, 5)
+    grid.add_element(gate, 10, 0)
+    grid.add_element(out, 20, 0)
+    a.connect_output(0, gate, 0)
+    b.connect_output(0, gate, 0)
+    gate.connect_output(0, out, 0)
+
+    assert grid.compute_outputs({a: 0, b: 0}) == {out: 1}
+    assert grid.compute_outputs({a: 0, b: 1}) == {out: 0}
@@ -0,0 +1,66 @@
+import pytest
+from core import Grid, LogicElement, InputElement, NotElement
+from core.LogicElements import DTriggerElement
+from core.SignalStore import SignalStore
+
+def test_allocate_returns_consecutive_offsets():
+    store = SignalStore()
+    assert store.allocate(2) == 0
+    assert store.allocate(3) == 2
+    assert len(store) == 5
+
+def test_view_behaves_like_list():
+    gate = DTriggerElement()
+    gate.output_values = [1, 0]
+    assert gate.output_values == [1, 0]
+    assert list(gate.output_values) == [1, 0]
+    assert gate.output_values[:] == [1, 0]
+    assert gate.output_values[-1] == 0
+    with pytest.raises(ValueError):
+        gate.output_values = [1]
+
+def test_elements_share_grid_store():
+    grid = Grid()
+    inp, gate = InputElement(), NotElement()
+    inp.set_value(1)
+    grid.add_element(inp, 0, 0)
+    grid.add_element(gate, 10, 0)
+
+    assert inp._signal_store is gate._signal_store is grid.signals
+    assert inp.value() == 1  # значение перенесено из собственного буфера
+    assert grid.signals.values[inp._signal_offset] == 1
+
+def test_tick_commits_next_values():
+    flip_flop = DTriggerElement()
+    flip_flop.next_output_values = [1, 0]
+    assert flip_flop.output_values == [0, 0]
+    LogicElement.tick(flip_flop)
+    assert flip_flop.output_values == [1, 0]
+
+def test_detached_elements_have_own_store():
+    first, second = NotElement(), NotElement()
+    # Собственный буфер создаётся только при первом обращении к сигналам
+    with pytest.raises(AttributeError):
+        LogicElement._signal_store.__get__(first)
+    first.output_values = [1]
+    assert first._signal_store is not second._signal_store
+    assert len(first._signal_store) == 1 and second.output_values == [0]
+
+def test_placed_element_never_allocates_own_store():
+    grid, gate = Grid(), NotElement()
+    grid.add_element(gate, 0, 0)
+    assert gate._signal_store is grid.signals and len(grid.signals) == 1
+
+def test_removed_elements_release_grid_slots():
+    grid = Grid()
+    gates = [NotElement() for _ in range(10)]
+    grid.add_elements([(gate, i * 10, 0) for i, gate in enumerate(gates)])
+    gates[0].output_values = [1]
+    gates[9].output_values = [1]
+
+    grid.remove_elements(gates[:8])
+    # Больше половины буфера — мусор: буфер пересобран из живых элементов
+    assert len(grid.signals) == 2
+    assert gates[9]._signal_store is grid.signals and gates[9].output_values == [1]
+    # Удалённый элемент сохраняет значение в своём буфере
+    assert gates[0]._signal_store is not grid.signals and gates[0].output_values == [1]
@@ -0,0 +1,95 @@
+import subprocess
+import sys
+
+import pytest
+from core.LogicElements import ClockGeneratorElement
+from core.TimeSource import TimeSource, VirtualTimeSource
+from core.ClockScheduler import ClockScheduler
+
+def test_virtual_clock_toggles_on_advance():
+    source = VirtualTimeSource()
+    clock = ClockGeneratorElement(interval_ms=100)
+    clock.set_time_source(source)
+    toggled = []
+    source.add_listener(toggled.append)
+
+    clock.start()
+    assert clock.is_running()
+    assert source.advance(250) == 2
+    assert toggled == [[clock], [clock]]
+    assert clock.output_values[0] == 0
+
+    source.advance(50)
+    assert clock.output_values[0] == 1
+
+    clock.stop()
+    assert source.advance(1000) == 0
+
+def test_clocks_fire_in_time_order():
+    source = VirtualTimeSource()
+    fast, slow = ClockGeneratorElement(30), ClockGeneratorElement(100)
+    for clock in (slow, fast):
+        clock.set_time_source(source)
+        clock.start()
+    order = []
+    source.add_listener(order.append)
+    source.advance(100)
+    assert order == [[fast], [fast], [fast], [slow]]
+
+def test_coincident_edges_fire_as_one_batch_in_start_order():
+    source = VirtualTimeSource()
+    a, b, c = ClockGeneratorElement(20), ClockGeneratorElement(10), ClockGeneratorElement(40)
+    for clock in (a, b, c):
+        clock.set_time_source(source)
+        clock.start()
+    batches = []
+    source.add_listener(batches.append)
+    source.advance(40)
+    assert batches == [[b], [a, b], [b], [a, b, c]]
+
+def test_each_grid_has_own_time_source():
+    from core import Grid, OutputElement
+    first, second = Grid(), Grid()
+    clocks, outputs = [], []
+    for grid in (first, second):
+        clock, out = ClockGeneratorElement(interval_ms=10), OutputElement()
+        grid.add_elements([(clock, 0, 0), (out, 20, 0)])
+        clock.connect_output(0, out, 0)
+        grid.step()
+        clock.start()
+        clocks.append(clock)
+        outputs.append(out)
+    assert first.time_source is not second.time_source
+    assert clocks[0].time_source is first.time_source
+
+    # Переключение помечает генератор изменённым только в его поле
+    first.time_source.advance(10)
+    first.step()
+    second.step()
+    assert [out.value for out in outputs] == [1, 0]
+
+    first.remove_element(clocks[0])
+    assert not clocks[0].is_running() and clocks[0].time_source is None
+
+def test_scheduler_skips_stopped_and_restarted_clocks():
+    scheduler = ClockScheduler()
+    a, b = object(), object()
+    scheduler.add(a, 10, 0)
+    scheduler.add(b, 10, 0)
+    scheduler.remove(a)
+    scheduler.add(b, 15, 5)  # перезапуск: старая запись b устаревает
+    assert len(scheduler) == 1
+    assert scheduler.pop_due() == (20, [b])
+    assert scheduler.pop_due() == (35, [b])
+    scheduler.remove(b)
+    assert scheduler.next_due() is None
+    assert scheduler.pop_due() == (None, [])
+
+def test_core_import_does_not_load_qt():
+    code = "import sys, core; print('PyQt6' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+def test_time_source_is_abstract():
+    with pytest.raises(TypeError):
+        TimeSource()
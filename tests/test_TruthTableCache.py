@@ -0,0 +1,27 @@
+from core.TruthTableCache import TruthTableCache
+
+def test_store_and_load(tmp_path):
+    cache = TruthTableCache(str(tmp_path / "tables"))
+    key = TruthTableCache.key({"elements": [], "connections": []})
+    assert cache.load(key, 2, 1) is None
+
+    cache.store(key, 2, [0b0110, 0b1000])
+    assert cache.load(key, 2, 2) == [0b0110, 0b1000]
+    # Файл другой формы не подходит
+    assert cache.load(key, 3, 2) is None
+    assert cache.load(key, 2, 1) is None
+
+def test_key_depends_on_content_not_order():
+    first = {"elements": [{"type": "And", "name": "A"}], "connections": []}
+    second = {"connections": [], "elements": [{"name": "A", "type": "And"}]}
+    assert TruthTableCache.key(first) == TruthTableCache.key(second)
+    second["elements"][0]["name"] = "B"
+    assert TruthTableCache.key(first) != TruthTableCache.key(second)
+
+def test_corrupted_file_is_ignored(tmp_path):
+    cache = TruthTableCache(str(tmp_path))
+    key = TruthTableCache.key({})
+    cache.store(key, 4, [0xFFFF])
+    path = next(tmp_path.iterdir())
+    path.write_bytes(path.read_bytes()[:-1])
+    assert cache.load(key, 4, 1) is None
@@ -0,0 +1,126 @@
+import io
+
+from core import Grid, InputElement, OutputElement
+from core.Level import SequentialLevel
+from core.LogicElements import ClockGeneratorElement, NotElement, DTriggerElement
+from core.WaveformRecorder import WaveformRecorder
+
+def make_inverter(grid):
+    inp, gate, out = InputElement(), NotElement(), OutputElement()
+    grid.add_elements([(inp, 0, 0), (gate, 10, 0), (out, 20, 0)])
+    inp.connect_output(0, gate, 0)
+    gate.connect_output(0, out, 0)
+    return inp, gate, out
+
+def toggle(grid, inp, value, after_ms=10):
+    grid.time_source.advance(after_ms)
+    inp.set_value(value)
+    grid.mark_changed(inp)
+    grid.step()
+
+def test_records_only_changes():
+    grid = Grid()
+    inp, gate, out = make_inverter(grid)
+    grid.step()
+    grid.time_source.advance(5)
+    recorder = WaveformRecorder()
+    grid.set_recorder(recorder)
+    trace = recorder.watch(gate)
+
+    for _ in range(5):
+        grid.time_source.advance(10)
+        grid.step()
+    toggle(grid, inp, 1)
+    grid.step()
+    toggle(grid, inp, 0, after_ms=25)
+    assert list(trace.changes()) == [(5, 1), (65, 0), (90, 1)]
+    assert recorder.now == grid.now_ms() == 90
+
+def test_steps_at_same_time_keep_final_value():
+    grid = Grid()
+    inp, gate, out = make_inverter(grid)
+    recorder = WaveformRecorder()
+    grid.set_recorder(recorder)
+    trace = recorder.watch(inp)
+    toggle(grid, inp, 1)
+    toggle(grid, inp, 0, after_ms=0)  # импульс нулевой длительности не записывается
+    toggle(grid, inp, 1, after_ms=5)
+    toggle(grid, inp, 0, after_ms=0)
+    toggle(grid, inp, 1, after_ms=0)
+    assert list(trace.changes()) == [(0, 0), (15, 1)]
+
+def test_ring_buffer_keeps_newest_changes():
+    grid = Grid()
+    inp, gate, out = make_inverter(grid)
+    recorder = WaveformRecorder(capacity=4)
+    grid.set_recorder(recorder)
+    trace = recorder.watch(inp)
+    for i in range(10):
+        toggle(grid, inp, (i + 1) % 2)
+    assert len(trace) == trace.capacity == 4
+    assert list(trace.changes()) == [(70, 1), (80, 0), (90, 1), (100, 0)]
+
+def test_step_without_recorder_does_not_sample():
+    grid = Grid()
+    inp, gate, out = make_inverter(grid)
+    recorder = WaveformRecorder()
+    trace = recorder.watch(out)
+    toggle(grid, inp, 1)
+    assert list(trace.changes()) == [(0, 0)]
+
+    grid.set_recorder(recorder)
+    toggle(grid, inp, 0)
+    grid.set_recorder(None)
+    toggle(grid, inp, 1)
+    assert list(trace.changes()) == [(0, 0), (20, 1)]
+
+def test_write_vcd():
+    grid = Grid()
+    clock, out = ClockGeneratorElement(interval_ms=10), OutputElement()
+    clock.name, out.name = "clk", "Q out"
+    grid.add_elements([(clock, 0, 0), (out, 20, 0)])
+    clock.connect_output(0, out, 0)
+    recorder = WaveformRecorder()
+    grid.set_recorder(recorder)
+    recorder.watch(clock)
+    recorder.watch(out)
+    grid.run_cycles(1)
+
+    stream = io.StringIO()
+    recorder.write_vcd(stream)
+    text = stream.getvalue()
+    assert "$timescale 1 ms $end" in text
+    assert "$var wire 1 ! clk $end" in text
+    assert '$var wire 1 " Q_out $end' in text
+    body = text.split("$enddefinitions $end\n")[1]
+    assert body == '#0\n0!\n0"\n#10\n1!\n1"\n#20\n0!\n0"\n'
+
+def test_run_cycles_time_continues_across_runs():
+    grid = Grid()
+    clock = ClockGeneratorElement(interval_ms=10)
+    grid.add_element(clock, 0, 0)
+    recorder = WaveformRecorder()
+    grid.set_recorder(recorder)
+    trace = recorder.watch(clock)
+    grid.run_cycles(1)
+    grid.time_source.advance(100)
+    grid.run_cycles(1)
+    assert grid.now_ms() == 140
+    assert list(trace.changes()) == [(0, 0), (10, 1), (20, 0), (130, 1), (140, 0)]
+
+def test_auto_test_is_not_recorded():
+    grid = Grid()
+    grid.set_level(SequentialLevel({}, ["D"], ["Q"], [[((1,), (1,)), ((0,), (0,))]]))
+    clock, d, latch, q = ClockGeneratorElement(), InputElement(), DTriggerElement(), OutputElement()
+    d.name, q.name = "D", "Q"
+    grid.add_elements([(clock, 0, 0), (d, 0, 10), (latch, 20, 0), (q, 40, 0)])
+    clock.connect_output(0, latch, 1)
+    d.connect_output(0, latch, 0)
+    latch.connect_output(0, q, 0)
+    recorder = WaveformRecorder()
+    grid.set_recorder(recorder)
+    trace = recorder.watch(q)
+
+    assert grid.auto_test() == []
+    assert grid.recorder is recorder and grid.step_count == 0 and grid.now_ms() == 0
+    assert list(trace.changes()) == [(0, 0)]